@@ -13,6 +13,8 @@ const AnimationViz = {
     // Animation state
     state: {
         currentYear: 1950,
+        // Frame within the year: 0 is the year itself, 1..n the tweens towards the next year
+        currentStep: 0,
         isPlaying: false,
         animationInterval: null,
         animationSpeed: 1000,
@@ -340,19 +342,34 @@ const AnimationViz = {
         controlsContainer.insertBefore(axisControls, controlsContainer.firstChild);
     },
     /**
- * Update visualization for given year
+ * Update visualization for given year (and tween step while playing)
  */
-update(year) {
+update(year, step = 0) {
     this.state.currentYear = year;
+    this.state.currentStep = step;
     
     // Update displays
     d3.select('#year-display').text(year);
     document.getElementById('anim-slider-label').textContent = year;
     document.getElementById('anim-year-slider').value = year;
     
-    // Filter data for current year
-    const yearData = this.data.filter(d => 
-        d.year === year && d.region !== 'Unknown');
+    // Frames load per year: fetch this one first, then draw it if it is still the current frame
+    if (!DataLoader.hasAnimationYear(year)) {
+        DataLoader.ensureAnimationYear(year).then(frames => {
+            if (frames && this.state.currentYear === year && this.state.currentStep === step) this.update(year, step);
+        }).catch(e => console.warn(e.message));
+        return;
+    }
+    DataLoader.ensureAnimationYear(year + 1).catch(e => console.warn(e.message));
+    
+    // Prepared frame of the year ('Unknown' regions already left out)
+    const yearData = DataLoader.getAnimationFrame(year, step);
+    
+    // Tween frames follow each other at the frame rate; a year change without tweens eases over most of the interval
+    const framesPerYear = this.framesPerYear();
+    const tweening = this.state.isPlaying && framesPerYear > 1;
+    const duration = tweening ? this.state.animationSpeed / framesPerYear : this.state.animationSpeed * 0.8;
+    const ease = tweening ? d3.easeLinear : d3.easeCubic;
     
     // Get current metric accessors
     const xMetric = this.metrics[this.state.xAxis];
@@ -437,7 +454,8 @@ update(year) {
         })
         .merge(circles)
         .transition()
-        .duration(this.state.animationSpeed * 0.8)
+        .duration(duration)
+        .ease(ease)
         .attr('cx', d => this.xScale(xMetric.accessor(d)))
         .attr('cy', d => this.yScale(yMetric.accessor(d)))
         .attr('r', d => this.sizeScale(d.population));
@@ -469,7 +487,8 @@ update(year) {
         .text(d => d.country)
         .merge(labels)
         .transition()
-        .duration(this.state.animationSpeed * 0.8)
+        .duration(duration)
+        .ease(ease)
         .attr('x', d => this.xScale(xMetric.accessor(d)) + 8)
         .attr('y', d => this.yScale(yMetric.accessor(d)) + 4)
         .attr('opacity', 0.8);
@@ -492,13 +511,27 @@ update(year) {
         document.getElementById('anim-pause-btn').disabled = false;
         
         const self = this;
+        const years = DataLoader.getAnimationYears();
+        const lastYear = years.length ? years[years.length - 1] : 2023;
         this.state.animationInterval = setInterval(() => {
-            if (self.state.currentYear < 2023) {
-                self.update(self.state.currentYear + 1);
+            const year = self.state.currentYear;
+            // Wait for a year that is still loading rather than skipping it
+            if (!DataLoader.hasAnimationYear(year)) return;
+            if (self.state.currentStep + 1 < DataLoader.getAnimationFrameCount(year)) {
+                self.update(year, self.state.currentStep + 1);
+            } else if (year < lastYear) {
+                self.update(year + 1);
             } else {
                 self.pause();
             }
-        }, this.state.animationSpeed);
+        }, this.state.animationSpeed / this.framesPerYear());
+    },
+    
+    /**
+     * Frames drawn per year: the keyframe plus the precomputed tweens (data/animation/index.json)
+     */
+    framesPerYear() {
+        return DataLoader.animationIndex ? DataLoader.animationIndex.tweens + 1 : 1;
     },
     
     /**
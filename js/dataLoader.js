@@ -2,11 +2,66 @@
  * Data Loading Module - Loads preprocessed JSON files
  */
 
+const loaderParams = new URLSearchParams(typeof window !== 'undefined' ? window.location.search : '');
+
 const DataLoader = {
+    // Loader options - lazy mode (opt-in with ?lazy in the page URL) fetches the shards
+    // listed in data/manifest.json on demand instead of the monolithic globe/detail files;
+    // ?api (or ?api=<base URL>) is lazy mode with the shards served by scripts/query_api.py
+    config: {
+        lazy: loaderParams.has('lazy') || loaderParams.has('api'),
+        api: loaderParams.has('api') ? (loaderParams.get('api') || 'api').replace(/\/?$/, '/') : null,
+        prefetchRadius: 1,
+        // Animation year files fetched ahead of the one being played
+        animationPrefetch: 2,
+        // Globe geometry: the coarsest level whose simplification stays within this many pixels
+        // is drawn; the first level loaded is the one for a globe of `geometryScale` pixels
+        geometryPixelError: 1,
+        geometryScale: 300
+    },
+
+    // Shard index (lazy mode) and in-flight/finished shard requests keyed by path
+    manifest: null,
+    shardRequests: new Map(),
+    countryIso3: {},
+    // Time series of the countries whose shards are loaded (lazy mode, until the indicator cube is)
+    shardTimeSeries: {},
+    
+    // Geometry levels (data/geometry/index.json) and in-flight/finished level requests by name
+    geometryIndex: null,
+    geometryRequests: new Map(),
+
+    // Globe modes -> the globe record fields they color by (two fields: their difference),
+    // as in GLOBE_MODE_FIELDS of scripts/prepare_dataviz.py
+    globeModeFields: {
+        'population': ['population_number'],
+        'density': ['population_density_number'],
+        'sex-ratio': ['sex_ratio_number'],
+        'median-age': ['median_age_number'],
+        'demographic-transition': ['birth_rate_number'],
+        'growth-drivers': ['natural_change_number'],
+        'longevity-gap': ['life_expectancy_number'],
+        'fertility-health': ['fertility_rate_number'],
+        'healthcare-quality': ['infant_mortality_number'],
+        'gender-gap': ['life_expectancy_female_number', 'life_expectancy_male_number']
+    },
+
+    // Animation frame index (data/animation/index.json), in-flight/finished year file requests,
+    // loaded year files and the records built from their frames ('year:step')
+    animationIndex: null,
+    animationRequests: new Map(),
+    animationYears: new Map(),
+    animationFrames: new Map(),
+
+    // Feature-aligned value arrays derived from the globe records ('year:mode', lazy mode)
+    // and per-year ISO3 -> globe record maps
+    globeValueArrays: new Map(),
+    globeRecordMaps: new Map(),
+
     // Cache for loaded data
     cache: {
         globeData: null,
-        countryDetailData: null,
+        countryDetailData: {},
         regionalTimeSeries: null,
         birthDeathRates: null,
         countryTimeSeries: null,
@@ -14,106 +69,115 @@ const DataLoader = {
         animationData: null,
         regionMetadata: null,
         geoJson: null,
+        // Per-mode choropleth arrays aligned to the geometry features (globe_values.json)
+        globeValues: null,
+        // Per-mode, per-year color domains, class breaks and histograms (globe_statistics.json)
+        globeStatistics: null,
+        // Decoded geometry levels by name (FeatureCollections with centroid/bbox/label/radius)
+        geometryLevels: {},
         radarChartData: null,
+        // Radar profiles of every country and year, min-max and percentile-rank normalized (radar_profiles.json)
+        radarProfiles: null,
         ridgelineData: null,
+        // Annual KDE densities of the ridgeline indicators on shared grids (ridgeline_density.json)
+        ridgelineDensity: null,
         growthDriversData: null,
         genderGapData: null,
-        projectionData: null
+        projectionData: null,
+        // Canonical country x year x indicator cube; the per-country detail, time-series
+        // and birth/death views above are derived from it on first use (and loaded from
+        // country_detail_data.json / country_population_timeseries.json when it is missing)
+        countryCube: null,
+        // World/region/subregion x year x indicator statistics (see getAggregate)
+        regionAggregates: null,
+        // Raw columnar tables (null when the row-oriented files are served)
+        animationTable: null,
+        growthDriversTable: null,
+        // Country x year gender gap table (gender_gap_data.json, see getGenderGapComparison)
+        genderGapTable: null
     },
 
+    // Data files by cache key. The accessors of an `optional` file derive what they can from the
+    // other files when it is missing; a file with a `fallback` is replaced by those files
+    files: {
+        globeData: { path: 'data/globe_data_all_years.json' },
+        globeValues: { path: 'data/globe_values.json', optional: true },
+        globeStatistics: { path: 'data/globe_statistics.json', optional: true },
+        countryCube: { path: 'data/country_indicators.json', fallback: ['countryTimeSeries', 'countryDetailData'] },
+        countryTimeSeries: { path: 'data/country_population_timeseries.json' },
+        countryDetailData: { path: 'data/country_detail_data.json' },
+        regionAggregates: { path: 'data/region_aggregates.json', optional: true },
+        regionalTimeSeries: { path: 'data/regional_population_nested.json' },
+        birthDeathRates: { path: 'data/birth_death_rates.json' },
+        countriesList: { path: 'data/countries_list.json' },
+        animationData: { path: 'data/country_animation_data.json' },
+        animationIndex: { path: 'data/animation/index.json', optional: true },
+        regionMetadata: { path: 'data/region_metadata.json' },
+        radarChartData: { path: 'data/radar_chart_data.json' },
+        radarProfiles: { path: 'data/radar_profiles.json', optional: true },
+        ridgelineData: { path: 'data/ridgeline_data.json' },
+        ridgelineDensity: { path: 'data/ridgeline_density.json', optional: true },
+        growthDriversData: { path: 'data/growth_drivers_data.json' },
+        genderGapData: { path: 'data/gender_gap_data.json' },
+        projectionData: { path: 'data/projection_uncertainty.json' }
+    },
+
+    // Files loaded with the page (lazy mode starts with the manifest and the latest globe year only)
+    startupFiles: [
+        'globeData', 'countryCube', 'regionalTimeSeries', 'birthDeathRates', 'countriesList',
+        'animationData', 'regionMetadata', 'radarChartData', 'ridgelineData', 'growthDriversData',
+        'projectionData'
+    ],
+
+    // Files fetched after the first render (eager mode); until they arrive, their accessors
+    // derive the same values from the startup files
+    backgroundFiles: ['globeValues', 'globeStatistics'],
+
+    // Files each view reads, loaded the first time it is opened (ensureView)
+    viewFiles: {
+        'overview': ['radarChartData'],
+        'timeseries': ['regionalTimeSeries', 'countryCube', 'projectionData', 'regionMetadata'],
+        'comparison': ['countriesList', 'regionMetadata', 'regionalTimeSeries', 'countryCube'],
+        'multiples': ['birthDeathRates', 'countryCube'],
+        'animation': ['animationData', 'animationIndex'],
+        'radar': ['radarChartData', 'radarProfiles'],
+        'growth-drivers': ['growthDriversData', 'regionAggregates'],
+        'gender-gap': ['genderGapData'],
+        'statistics': ['countryCube', 'animationData']
+    },
+
+    // In-flight/finished file requests by cache key
+    fileRequests: new Map(),
+
     /**
      * Load all required data files
      */
     async loadAllData() {
+        if (this.config.lazy) {
+            return this.loadLazyData();
+        }
+        
         try {
             console.log('Loading preprocessed data...');
             
-            // Load each file separately to get better error messages
-            console.log('  Loading globe data...');
-            const globeData = await d3.json('data/globe_data_all_years.json')
-                .catch(e => { throw new Error('Failed to load globe_data_all_years.json: ' + e.message); });
-            
-            console.log('  Loading country detail data...');
-            const countryDetailData = await d3.json('data/country_detail_data.json')
-                .catch(e => { throw new Error('Failed to load country_detail_data.json: ' + e.message); });
-            
-            console.log('  Loading regional time series...');
-            const regionalTimeSeries = await d3.json('data/regional_population_nested.json')
-                .catch(e => { throw new Error('Failed to load regional_population_nested.json: ' + e.message); });
-            
-            console.log('  Loading birth/death rates...');
-            const birthDeathRates = await d3.json('data/birth_death_rates.json')
-                .catch(e => { throw new Error('Failed to load birth_death_rates.json: ' + e.message); });
-            
-            console.log('  Loading country time series...');
-            const countryTimeSeries = await d3.json('data/country_population_timeseries.json')
-                .catch(e => { throw new Error('Failed to load country_population_timeseries.json: ' + e.message); });
-            
-            console.log('  Loading countries list...');
-            const countriesList = await d3.json('data/countries_list.json')
-                .catch(e => { throw new Error('Failed to load countries_list.json: ' + e.message); });
-            
-            console.log('  Loading animation data...');
-            const animationData = await d3.json('data/country_animation_data.json')
-                .catch(e => { throw new Error('Failed to load country_animation_data.json: ' + e.message); });
-            
-            console.log('  Loading region metadata...');
-            const regionMetadata = await d3.json('data/region_metadata.json')
-                .catch(e => { throw new Error('Failed to load region_metadata.json: ' + e.message); });
-            
-            console.log('  Loading globe coordinates (GeoJSON)...');
-            const geoJson = await d3.json('data/globeCoordinates.json')
-                .catch(e => { throw new Error('Failed to load globeCoordinates.json: ' + e.message); });
-
-            // NEW: Load advanced visualization data
-            console.log('  Loading radar chart data...');
-            const radarChartData = await d3.json('data/radar_chart_data.json')
-                .catch(e => { throw new Error('Failed to load radar_chart_data.json: ' + e.message); });
-            
-            console.log('  Loading ridgeline data...');
-            const ridgelineData = await d3.json('data/ridgeline_data.json')
-                .catch(e => { throw new Error('Failed to load ridgeline_data.json: ' + e.message); });
-            
-            console.log('  Loading growth drivers data...');
-            const growthDriversData = await d3.json('data/growth_drivers_data.json')
-                .catch(e => { throw new Error('Failed to load growth_drivers_data.json: ' + e.message); });
-            
-            console.log('  Loading gender gap data...');
-            const genderGapData = await d3.json('data/gender_gap_data.json')
-                .catch(e => { throw new Error('Failed to load gender_gap_data.json: ' + e.message); });
-            
-            console.log('  Loading projection uncertainty data...');
-            const projectionData = await d3.json('data/projection_uncertainty.json')
-                .catch(e => { throw new Error('Failed to load projection_uncertainty.json: ' + e.message); });
-
-            // Cache all data
-            this.cache.globeData = globeData;
-            this.cache.countryDetailData = countryDetailData;
-            this.cache.regionalTimeSeries = regionalTimeSeries;
-            this.cache.birthDeathRates = birthDeathRates;
-            this.cache.countryTimeSeries = countryTimeSeries;
-            this.cache.countriesList = countriesList;
-            this.cache.animationData = animationData;
-            this.cache.regionMetadata = regionMetadata;
+            // The startup files load concurrently, with the globe geometry
+            const [geoJson] = await Promise.all([this.loadGeometry(), this.ensureFiles(this.startupFiles)]);
             this.cache.geoJson = geoJson;
-            // NEW: Cache advanced visualization data
-            this.cache.radarChartData = radarChartData;
-            this.cache.ridgelineData = ridgelineData;
-            this.cache.growthDriversData = growthDriversData;
-            this.cache.genderGapData = genderGapData;
-            this.cache.projectionData = projectionData;
+            this.ensureFiles(this.backgroundFiles).catch(e => console.warn(e.message));
 
             console.log('✓ All data loaded successfully');
-            console.log(`  - Globe data: ${Object.keys(globeData).length} years`);
-            console.log(`  - Country details: ${Object.keys(countryDetailData).length} countries`);
-            console.log(`  - Regional data: ${regionalTimeSeries.length} regions`);
-            console.log(`  - Animation data: ${animationData.length} records`);
+            console.log(`  - Globe data: ${Object.keys(this.cache.globeData).length} years`);
+            const cube = this.cache.countryCube;
+            console.log(cube
+                ? `  - Country indicators: ${cube.countries.name.length} countries, ${cube.years.length} years, ${cube.indicators.length} indicators`
+                : `  - Country time series: ${Object.keys(this.cache.countryTimeSeries).length} countries`);
+            console.log(`  - Regional data: ${this.cache.regionalTimeSeries.length} regions`);
+            console.log(`  - Animation data: ${this.cache.animationData.length} records`);
             console.log(`  - GeoJSON features: ${geoJson.features ? geoJson.features.length : 0}`);
-            console.log(`  - Radar chart data: ${Object.keys(radarChartData.countries).length} countries`);
-            console.log(`  - Ridgeline data: ${ridgelineData.length} entries`);
-            console.log(`  - Growth drivers data: ${growthDriversData.length} records`);
-            console.log(`  - Gender gap data: ${genderGapData.comparison ? genderGapData.comparison.length : 0} countries`);
-            console.log(`  - Projection data: ${projectionData.length} projections`);
+            console.log(`  - Radar chart data: ${Object.keys(this.cache.radarChartData.countries).length} countries`);
+            console.log(`  - Ridgeline data: ${this.cache.ridgelineData.length} entries`);
+            console.log(`  - Growth drivers data: ${this.cache.growthDriversData.length} records`);
+            console.log(`  - Projection data: ${this.cache.projectionData.length} projections`);
             
             return {
                 raw: null, // Not loading raw CSV anymore
@@ -124,24 +188,462 @@ const DataLoader = {
             console.error('Error details:', error.message);
             console.error('Make sure all JSON files exist in the data/ folder');
             console.error('Required files:');
-            console.error('  - data/globe_data_all_years.json');
-            console.error('  - data/country_detail_data.json');
-            console.error('  - data/regional_population_nested.json');
-            console.error('  - data/birth_death_rates.json');
-            console.error('  - data/country_population_timeseries.json');
-            console.error('  - data/countries_list.json');
-            console.error('  - data/country_animation_data.json');
-            console.error('  - data/region_metadata.json');
+            this.startupFiles.filter(key => !this.files[key].optional).forEach(key => {
+                const fallback = (this.files[key].fallback || []).map(other => this.files[other].path);
+                console.error(`  - ${this.files[key].path}${fallback.length ? ` (or ${fallback.join(' and ')})` : ''}`);
+            });
             console.error('  - data/globeCoordinates.json');
-            console.error('  - data/radar_chart_data.json');
-            console.error('  - data/ridgeline_data.json');
-            console.error('  - data/growth_drivers_data.json');
-            console.error('  - data/gender_gap_data.json');
-            console.error('  - data/projection_uncertainty.json');
             throw error;
         }
     },
 
+    /**
+     * Lazy mode: load the shard manifest, then the latest globe year with the globe geometry.
+     * Other years and per-country shards load on demand, the color statistics in the background
+     * and the other files when a view needs them
+     */
+    async loadLazyData() {
+        console.log('Loading preprocessed data (lazy mode)...');
+        
+        this.cache.globeData = {};
+        const manifestPath = `${this.shardRoot()}manifest${this.config.api ? '' : '.json'}`;
+        const [, geoJson] = await Promise.all([
+            d3.json(manifestPath)
+                .catch(e => { throw new Error(`Failed to load ${manifestPath}: ${e.message}`); })
+                .then(manifest => {
+                    this.manifest = manifest;
+                    this.countryIso3 = {};
+                    Object.entries(manifest.countries).forEach(([iso3, entry]) => {
+                        this.countryIso3[entry.country] = iso3;
+                    });
+                    // The globe opens on the latest year
+                    return this.ensureGlobeYear(Math.max(...Object.keys(manifest.globe).map(Number)));
+                }),
+            this.loadGeometry()
+        ]);
+        this.cache.geoJson = geoJson;
+        // The globe values are built from the shards; the color statistics cover every year
+        this.ensureFile('globeStatistics').catch(e => console.warn(e.message));
+        
+        console.log('✓ Data loaded (lazy mode)');
+        console.log(`  - Globe shards: ${Object.keys(this.manifest.globe).length} years`);
+        console.log(`  - Country shards: ${Object.keys(this.manifest.countries).length} countries`);
+        
+        return {
+            raw: null,
+            geoJson: geoJson
+        };
+    },
+
+    /**
+     * Load a data file (see `files`) into the cache once; concurrent and repeated requests share
+     * the same promise. A missing optional file resolves to null, a missing file with a fallback
+     * loads the fallback files instead
+     */
+    ensureFile(key) {
+        if (!this.fileRequests.has(key)) {
+            const file = this.files[key];
+            console.log(`  Loading ${file.path}...`);
+            const request = d3.json(file.path)
+                .then(data => {
+                    this.cacheFile(key, data);
+                    return data;
+                }, e => {
+                    if (file.fallback) {
+                        console.warn(`${file.path} unavailable (${e.message}), loading ${file.fallback.join(', ')}`);
+                        return this.ensureFiles(file.fallback).then(() => null);
+                    }
+                    if (file.optional) {
+                        console.warn(`${file.path} unavailable (${e.message}), deriving it from the other files`);
+                        return null;
+                    }
+                    throw new Error(`Failed to load ${file.path}: ${e.message}`);
+                })
+                .catch(e => {
+                    this.fileRequests.delete(key);
+                    throw e;
+                });
+            this.fileRequests.set(key, request);
+        }
+        return this.fileRequests.get(key);
+    },
+
+    /**
+     * Load several data files concurrently
+     */
+    ensureFiles(keys) {
+        return Promise.all(keys.map(key => this.ensureFile(key)));
+    },
+
+    /**
+     * Load the files a view reads (see `viewFiles`)
+     */
+    ensureView(view) {
+        return this.ensureFiles(this.viewFiles[view] || []);
+    },
+
+    /**
+     * Store a loaded file in the cache, decoded into what the accessors expect
+     */
+    cacheFile(key, data) {
+        switch (key) {
+            case 'globeValues':
+                data = this.decodeGlobeValues(data);
+                break;
+            case 'globeStatistics':
+                data = this.decodeGlobeStatistics(data);
+                break;
+            // Animation and growth drivers may be written in the compact columnar layout
+            case 'animationData':
+                this.cache.animationTable = data.format === 'columnar' ? data : null;
+                data = this.decodeColumnar(data);
+                break;
+            case 'growthDriversData':
+                this.cache.growthDriversTable = data.format === 'columnar' ? data : null;
+                data = this.decodeColumnar(data);
+                break;
+            case 'genderGapData':
+                this.cache.genderGapTable = data.format === 'gender-gap' ? data : null;
+                data = this.decodeGenderGap(data);
+                break;
+            case 'animationIndex':
+                this.animationIndex = data;
+                return;
+        }
+        this.cache[key] = data;
+    },
+
+    /**
+     * Load the globe geometry at the level for the default globe size; finer levels load on zoom
+     * (ensureGeometryLevel). Falls back to the raw GeoJSON when data/geometry/ has not been built
+     */
+    async loadGeometry() {
+        try {
+            this.geometryIndex = await d3.json('data/geometry/index.json');
+        } catch (e) {
+            console.warn(`Geometry levels unavailable (${e.message}), loading globeCoordinates.json`);
+            return d3.json('data/globeCoordinates.json')
+                .catch(e => { throw new Error('Failed to load globeCoordinates.json: ' + e.message); });
+        }
+        return this.ensureGeometryLevel(this.geometryLevelFor(this.config.geometryScale));
+    },
+
+    /**
+     * Name of the coarsest geometry level that looks exact at a projection scale (pixels per radian),
+     * or null without geometry levels
+     */
+    geometryLevelFor(scale) {
+        if (!this.geometryIndex) return null;
+        const levels = this.geometryIndex.levels.slice().sort((a, b) => b.tolerance - a.tolerance);
+        const pixelsPerDegree = scale * Math.PI / 180;
+        const level = levels.find(entry => entry.tolerance * pixelsPerDegree <= this.config.geometryPixelError);
+        return (level || levels[levels.length - 1]).name;
+    },
+
+    /**
+     * True if a geometry level is decoded and can be drawn synchronously
+     */
+    hasGeometryLevel(name) {
+        return !!this.cache.geometryLevels[name];
+    },
+
+    /**
+     * Fetch and decode a geometry level once (TopoJSON -> GeoJSON FeatureCollection)
+     */
+    ensureGeometryLevel(name) {
+        if (!this.geometryRequests.has(name)) {
+            const entry = this.geometryIndex.levels.find(level => level.name === name);
+            const request = d3.json(`data/${entry.path}`)
+                .then(topology => {
+                    this.cache.geometryLevels[name] = topojson.feature(topology, topology.objects.countries);
+                    return this.cache.geometryLevels[name];
+                })
+                .catch(e => {
+                    this.geometryRequests.delete(name);
+                    throw new Error(`Failed to load ${entry.path}: ${e.message}`);
+                });
+            this.geometryRequests.set(name, request);
+        }
+        return this.geometryRequests.get(name);
+    },
+
+    /**
+     * Where manifest paths are resolved: the data directory, or the query API
+     */
+    shardRoot() {
+        return this.config.api || 'data/';
+    },
+
+    /**
+     * Fetch a shard once; concurrent and repeated requests share the same promise
+     */
+    fetchShard(path) {
+        if (!this.shardRequests.has(path)) {
+            const request = d3.json(`${this.shardRoot()}${path}`).catch(e => {
+                this.shardRequests.delete(path);
+                throw new Error(`Failed to load ${path}: ${e.message}`);
+            });
+            this.shardRequests.set(path, request);
+        }
+        return this.shardRequests.get(path);
+    },
+
+    /**
+     * Years with globe records: the manifest's globe shards (lazy mode) or the loaded globe data
+     */
+    getGlobeYears() {
+        const years = this.manifest ? this.manifest.globe : (this.cache.globeData || {});
+        return Object.keys(years).map(Number).sort(d3.ascending);
+    },
+
+    /**
+     * True if the globe records for a year are available synchronously
+     */
+    hasGlobeYear(year) {
+        return !!(this.cache.globeData && this.cache.globeData[year.toString()]);
+    },
+
+    /**
+     * Make sure a globe year is loaded (lazy mode) and prefetch its neighbours
+     */
+    async ensureGlobeYear(year) {
+        const key = year.toString();
+        if (!this.hasGlobeYear(year) && this.manifest && this.manifest.globe[key]) {
+            this.cache.globeData[key] = await this.fetchShard(this.manifest.globe[key].path);
+        }
+        this.prefetchGlobeYears(year);
+        return this.cache.globeData[key] || [];
+    },
+
+    /**
+     * Start loading the years around `year` in the background
+     */
+    prefetchGlobeYears(year) {
+        if (!this.manifest) return;
+        for (let offset = 1; offset <= this.config.prefetchRadius; offset++) {
+            [year - offset, year + offset].forEach(y => {
+                const entry = this.manifest.globe[y.toString()];
+                if (entry && !this.hasGlobeYear(y)) {
+                    this.fetchShard(entry.path)
+                        .then(records => { this.cache.globeData[y.toString()] = records; })
+                        .catch(e => console.warn(e.message));
+                }
+            });
+        }
+    },
+
+    /**
+     * Load one country's shard (lazy mode) - detail, time-series, birth/death and projections
+     */
+    async loadCountry(countryName) {
+        const iso3 = this.countryIso3[countryName];
+        if (!this.manifest || !iso3) return null;
+        
+        const shard = await this.fetchShard(this.manifest.countries[iso3].path);
+        this.cache.countryDetailData[countryName] = shard.detail;
+        this.shardTimeSeries[countryName] = shard.timeseries;
+        return shard;
+    },
+
+    /**
+     * Decode a columnar table (dictionary-encoded countries/regions + parallel value arrays,
+     * sorted by year) into the row-oriented records the views expect:
+     * {country, year, <value columns>, iso3, region}
+     * Row-oriented input is returned unchanged
+     */
+    decodeColumnar(table) {
+        if (!table || table.format !== 'columnar') return table;
+        
+        const countries = table.countries;
+        const valueNames = Object.keys(table.columns).filter(name => name !== 'country');
+        const valueColumns = valueNames.map(name => table.columns[name]);
+        const countryColumn = table.columns.country;
+        const records = new Array(countryColumn.length);
+        
+        table.years.forEach((year, y) => {
+            for (let i = table.yearOffsets[y]; i < table.yearOffsets[y + 1]; i++) {
+                const c = countryColumn[i];
+                const record = { country: countries.name[c], year: year };
+                for (let v = 0; v < valueNames.length; v++) {
+                    record[valueNames[v]] = valueColumns[v][i];
+                }
+                record.iso3 = countries.iso3[c];
+                record.region = table.regions[countries.region[c]];
+                records[i] = record;
+            }
+        });
+        return records;
+    },
+
+    /**
+     * Decode the gender gap table into what the views expect: {years: {start, end}, comparison,
+     * timeseries}, the comparison of the default years and the featured countries' series
+     * Tables in the older record layout are returned unchanged
+     */
+    decodeGenderGap(table) {
+        if (!table || table.format !== 'gender-gap') return table;
+        const { start, end } = table.comparisonYears;
+        return {
+            years: { start, end },
+            comparison: this.genderGapComparison(table, start, end),
+            timeseries: table.featured.map(name => this.genderGapSeries(table, name)).filter(Boolean)
+        };
+    },
+
+    /**
+     * Slopegraph records comparing two years of the gender gap table: {country, iso3, region,
+     * year<start>: {male, female, gap}, year<end>: {...}, gapChange} for every country with
+     * both sexes known in both years
+     */
+    genderGapComparison(table, start, end) {
+        const years = table.years.length;
+        const from = table.years.indexOf(+start);
+        const to = table.years.indexOf(+end);
+        if (from < 0 || to < 0) return [];
+        
+        const cell = i => ({ male: table.male[i], female: table.female[i], gap: table.gap[i] });
+        const records = [];
+        table.countries.name.forEach((country, c) => {
+            const a = c * years + from;
+            const b = c * years + to;
+            if ([a, b].some(i => table.male[i] == null || table.female[i] == null)) return;
+            records.push({
+                country,
+                iso3: table.countries.iso3[c],
+                region: table.countries.region[c],
+                [`year${start}`]: cell(a),
+                [`year${end}`]: cell(b),
+                gapChange: Math.round((table.gap[b] - table.gap[a]) * 10) / 10
+            });
+        });
+        return records;
+    },
+
+    /**
+     * {country, values: [{year, male, female, gap}]} of one country from the gender gap table,
+     * for the years with both sexes known; null for unknown countries or without any such year
+     */
+    genderGapSeries(table, country) {
+        const c = table.countries.name.indexOf(country);
+        if (c < 0) return null;
+        
+        const values = [];
+        table.years.forEach((year, y) => {
+            const i = c * table.years.length + y;
+            if (table.male[i] != null && table.female[i] != null) {
+                values.push({ year, male: table.male[i], female: table.female[i], gap: table.gap[i] });
+            }
+        });
+        return values.length ? { country, values } : null;
+    },
+
+    /**
+     * Records of one country from the indicator cube, for the years where every `required`
+     * indicator is known. `build(get, year)` maps a cell to a record; get(key, fallback)
+     * reads one indicator of that cell, with `fallback` (default 0) for missing values
+     */
+    cubeRecords(countryIndex, required, build) {
+        const cube = this.cache.countryCube;
+        const nYears = cube.years.length;
+        const records = [];
+        
+        for (let y = 0; y < nYears; y++) {
+            const cell = countryIndex * nYears + y;
+            if (required.some(key => cube.values[key][cell] == null)) continue;
+            const get = (key, fallback = 0) => {
+                const value = cube.values[key][cell];
+                return value == null ? fallback : value;
+            };
+            records.push(build(get, cube.years[y]));
+        }
+        return records;
+    },
+
+    /**
+     * {country: records} view of the indicator cube (countries without records are omitted)
+     */
+    cubeView(required, build) {
+        const view = {};
+        const cube = this.cache.countryCube;
+        if (!cube) return view;
+        
+        cube.countries.name.forEach((name, c) => {
+            const records = this.cubeRecords(c, required, (get, year) => build(get, year, c));
+            if (records.length) view[name] = records;
+        });
+        return view;
+    },
+
+    /**
+     * Country time-series records (population in thousands), as in country_population_timeseries.json
+     */
+    buildCountryTimeSeries() {
+        const iso3 = this.cache.countryCube ? this.cache.countryCube.countries.iso3 : [];
+        return this.cubeView(['population'], (get, year, c) => ({
+            year: year,
+            population: get('population'),
+            density: get('density'),
+            sexRatio: get('sexRatio', 100),
+            medianAge: get('medianAge'),
+            birthRate: get('birthRate'),
+            deathRate: get('deathRate'),
+            naturalChange: get('naturalChange'),
+            migrationRate: get('migrationRate'),
+            fertilityRate: get('fertilityRate'),
+            meanAgeChildbearing: get('meanAgeChildbearing'),
+            infantMortality: get('infantMortality'),
+            underFiveMortality: get('underFiveMortality'),
+            lifeExpectancyMale: get('lifeExpectancyMale'),
+            lifeExpectancyFemale: get('lifeExpectancyFemale'),
+            lifeExpectancyBoth: get('lifeExpectancyBoth'),
+            iso3: iso3[c]
+        }));
+    },
+
+    /**
+     * Country birth/death rate records, for the years with both rates; from the country time
+     * series when the indicator cube is not loaded (there, years without a population are
+     * left out and missing rates read as 0)
+     */
+    buildCountryBirthDeathRates() {
+        if (!this.cache.countryCube) {
+            const rates = {};
+            Object.entries(this.getCountryTimeSeriesData()).forEach(([name, records]) => {
+                const known = records.filter(d => d.birthRate != null && d.deathRate != null);
+                if (known.length) rates[name] = known.map(d => ({
+                    year: d.year,
+                    birthRate: d.birthRate,
+                    deathRate: d.deathRate,
+                    naturalChange: Math.round((d.birthRate - d.deathRate) * 100) / 100
+                }));
+            });
+            return rates;
+        }
+        return this.cubeView(['birthRate', 'deathRate'], (get, year) => ({
+            year: year,
+            birthRate: get('birthRate'),
+            deathRate: get('deathRate'),
+            naturalChange: Math.round((get('birthRate') - get('deathRate')) * 100) / 100
+        }));
+    },
+
+    /**
+     * Country detail records (absolute population) of one country, as in country_detail_data.json
+     */
+    buildCountryDetail(countryName) {
+        const cube = this.cache.countryCube;
+        const c = cube ? cube.countries.name.indexOf(countryName) : -1;
+        if (c < 0) return [];
+        
+        return this.cubeRecords(c, ['population'], (get, year) => ({
+            year: year,
+            population: Math.round(get('population') * 1000),
+            density: get('density'),
+            sexRatio: get('sexRatio', 100),
+            medianAge: get('medianAge')
+        }));
+    },
+
     /**
      * Format population for display
      * Note: Input values are in thousands, so we need to adjust the thresholds
@@ -171,6 +673,147 @@ const DataLoader = {
         return yearData || [];
     },
 
+    /**
+     * Typed per-mode arrays of a globe_values.json table (null -> NaN), with a year -> position map
+     */
+    decodeGlobeValues(table) {
+        const modes = {};
+        Object.entries(table.modes).forEach(([mode, values]) => {
+            modes[mode] = Float64Array.from(values, value => value == null ? NaN : value);
+        });
+        return Object.assign({}, table, {
+            modes: modes,
+            yearIndex: new Map(table.years.map((year, y) => [year, y]))
+        });
+    },
+
+    /**
+     * Values of one globe mode in a year, aligned to the geometry features (value i colors
+     * feature i; NaN where a feature has no data). Sliced from globe_values.json when loaded,
+     * otherwise derived once from the year's globe records (lazy mode)
+     */
+    getGlobeValues(year, mode = 'population') {
+        const table = this.cache.globeValues;
+        if (table && table.yearIndex.has(+year) && table.modes[mode]) {
+            const y = table.yearIndex.get(+year);
+            return table.modes[mode].subarray(y * table.features, (y + 1) * table.features);
+        }
+        
+        const features = this.cache.geoJson ? this.cache.geoJson.features : [];
+        const key = `${year}:${mode}`;
+        if (this.globeValueArrays.has(key)) return this.globeValueArrays.get(key);
+        
+        const values = new Float64Array(features.length).fill(NaN);
+        if (!this.hasGlobeYear(year)) return values;
+        
+        const fields = this.globeModeFields[mode] || this.globeModeFields.population;
+        const records = this.getGlobeRecords(year);
+        features.forEach((feature, i) => {
+            const record = records.get(feature.id);
+            if (!record || fields.some(field => record[field] == null)) return;
+            values[i] = fields.length === 1 ? record[fields[0]] : record[fields[0]] - record[fields[1]];
+        });
+        this.globeValueArrays.set(key, values);
+        return values;
+    },
+
+    /**
+     * globe_statistics.json with a year -> position map
+     */
+    decodeGlobeStatistics(table) {
+        return Object.assign({}, table, {
+            yearIndex: new Map(table.years.map((year, y) => [year, y]))
+        });
+    },
+
+    /**
+     * [min, max] of the values a globe mode colors (positive, or non-zero for the gender gap)
+     * in a year, or over every year with scope 'all'; null when no country has a value.
+     * Computed from the loaded globe years when globe_statistics.json is not loaded
+     */
+    getColorDomain(year, mode, scope = 'year') {
+        const stats = this.cache.globeStatistics;
+        if (!stats) {
+            return this.valueDomain(scope === 'all' ? Object.keys(this.cache.globeData || {}) : [year], mode);
+        }
+        if (!stats.extent[mode]) return null;
+        if (scope === 'all') {
+            return stats.extent[mode][0] == null ? null : stats.extent[mode].slice();
+        }
+        const y = stats.yearIndex.get(+year);
+        if (y === undefined || stats.statistics.min[mode][y] == null) return null;
+        return [stats.statistics.min[mode][y], stats.statistics.max[mode][y]];
+    },
+
+    /**
+     * [min, max] of the values a globe mode colors over the globe records of some years, or null
+     */
+    valueDomain(years, mode) {
+        const fields = this.globeModeFields[mode] || this.globeModeFields.population;
+        let min = Infinity;
+        let max = -Infinity;
+        years.forEach(year => {
+            this.getGlobeRecords(year).forEach(record => {
+                if (fields.some(field => record[field] == null)) return;
+                const value = fields.length === 1 ? record[fields[0]] : record[fields[0]] - record[fields[1]];
+                if (mode === 'gender-gap' ? value === 0 : value <= 0) return;
+                if (value < min) min = value;
+                if (value > max) max = value;
+            });
+        });
+        return min <= max ? [min, max] : null;
+    },
+
+    /**
+     * Class edges [min, ..., max] of a globe mode in a year: equal-count classes ('quantiles')
+     * or Jenks natural breaks ('jenks'); null when the year has too few values
+     */
+    getClassBreaks(year, mode, method = 'quantiles') {
+        const stats = this.cache.globeStatistics;
+        const y = stats ? stats.yearIndex.get(+year) : undefined;
+        if (y === undefined || !stats.statistics[method] || !stats.statistics[method][mode]) return null;
+        const size = stats.classes + 1;
+        const breaks = stats.statistics[method][mode].slice(y * size, (y + 1) * size);
+        return breaks.some(value => value == null) ? null : breaks;
+    },
+
+    /**
+     * Histogram of a globe mode in a year: {edges, counts}; the bins are the same for every year
+     */
+    getHistogram(year, mode) {
+        const stats = this.cache.globeStatistics;
+        const y = stats ? stats.yearIndex.get(+year) : undefined;
+        if (y === undefined || !stats.histograms[mode]) return null;
+        const histogram = stats.histograms[mode];
+        return {
+            edges: histogram.edges,
+            counts: histogram.counts.slice(y * stats.bins, (y + 1) * stats.bins)
+        };
+    },
+
+    /**
+     * ISO3 -> globe record map of a year (built once per loaded year)
+     */
+    getGlobeRecords(year) {
+        const key = year.toString();
+        if (!this.globeRecordMaps.has(key)) {
+            if (!this.hasGlobeYear(year)) return new Map();
+            const records = new Map();
+            this.processGlobeData(year).forEach(record => {
+                if (!records.has(record.alpha3_code)) records.set(record.alpha3_code, record);
+            });
+            this.globeRecordMaps.set(key, records);
+        }
+        return this.globeRecordMaps.get(key);
+    },
+
+    /**
+     * Globe record of one country in a year, or undefined
+     */
+    getGlobeRecord(year, iso3) {
+        return this.getGlobeRecords(year).get(iso3);
+    },
+
     /**
      * Get regional time series data
      */
@@ -182,7 +825,7 @@ const DataLoader = {
      * Get country time series data
      */
     processCountryTimeSeries() {
-        return this.cache.countryTimeSeries || [];
+        return this.getCountryTimeSeriesData();
     },
 
     /**
@@ -210,7 +853,11 @@ const DataLoader = {
      */
     getCountryBirthDeathRates() {
         if (!this.cache.birthDeathRates) return {};
-        return this.cache.birthDeathRates.countries || {};
+        // Country rates are served from the indicator cube (or the country time series)
+        if (!this.cache.birthDeathRates.countries) {
+            this.cache.birthDeathRates.countries = this.buildCountryBirthDeathRates();
+        }
+        return this.cache.birthDeathRates.countries;
     },
 
     /**
@@ -220,12 +867,103 @@ const DataLoader = {
         return this.cache.animationData || [];
     },
 
+    /**
+     * Years with animation frames (the years of the animation records without a frame index)
+     */
+    getAnimationYears() {
+        if (this.animationIndex) return this.animationIndex.years;
+        return [...new Set(this.processAnimationData().map(d => d.year))].sort(d3.ascending);
+    },
+
+    /**
+     * True if a year's animation frames are loaded and can be drawn synchronously
+     */
+    hasAnimationYear(year) {
+        return this.animationIndex ? this.animationYears.has(+year) : !!this.cache.animationData;
+    },
+
+    /**
+     * Fetch a year's animation frames once, and start fetching the following years
+     */
+    ensureAnimationYear(year) {
+        year = +year;
+        for (let offset = 1; offset <= this.config.animationPrefetch; offset++) {
+            this.fetchAnimationYear(year + offset).catch(e => console.warn(e.message));
+        }
+        return this.fetchAnimationYear(year);
+    },
+
+    /**
+     * Fetch one animation year file (data/animation/<year>.json); years without frames resolve to null
+     */
+    fetchAnimationYear(year) {
+        const entry = this.animationIndex ? this.animationIndex.frames[year] : null;
+        if (!entry) return Promise.resolve(null);
+        if (!this.animationRequests.has(year)) {
+            const request = d3.json(`data/${entry.path}`)
+                .then(frames => {
+                    this.animationYears.set(year, frames);
+                    return frames;
+                })
+                .catch(e => {
+                    this.animationRequests.delete(year);
+                    throw new Error(`Failed to load ${entry.path}: ${e.message}`);
+                });
+            this.animationRequests.set(year, request);
+        }
+        return this.animationRequests.get(year);
+    },
+
+    /**
+     * Number of frames of a loaded animation year: its keyframe plus the tweens towards the next year
+     */
+    getAnimationFrameCount(year) {
+        const frames = this.animationYears.get(+year);
+        return frames ? frames.frames : 1;
+    },
+
+    /**
+     * Records {country, year, <fields>, iso3, region} of one animation frame (step 0 is the year
+     * itself, step k the k-th tween towards the next year); empty until the year is loaded.
+     * Without a frame index, the year's animation records (keyframes only)
+     */
+    getAnimationFrame(year, step = 0) {
+        const key = `${year}:${step}`;
+        if (this.animationFrames.has(key)) return this.animationFrames.get(key);
+        
+        if (!this.animationIndex) {
+            if (step > 0) return [];
+            const records = this.processAnimationData().filter(d => d.year === +year && d.region !== 'Unknown');
+            this.animationFrames.set(key, records);
+            return records;
+        }
+        
+        const frames = this.animationYears.get(+year);
+        if (!frames || step >= frames.frames) return [];
+        
+        const countries = this.animationIndex.countries;
+        const fields = this.animationIndex.fields;
+        const n = frames.countries.length;
+        const records = frames.countries.map((c, i) => {
+            const record = { country: countries.name[c], year: +year };
+            fields.forEach(field => { record[field] = frames.values[field][step * n + i]; });
+            record.iso3 = countries.iso3[c];
+            record.region = countries.region[c];
+            return record;
+        });
+        this.animationFrames.set(key, records);
+        return records;
+    },
+
     /**
      * Get country detail data for all years
      */
     getCountryDetailData(countryName) {
         if (!this.cache.countryDetailData) return [];
         
+        if (!this.cache.countryDetailData[countryName] && this.cache.countryCube) {
+            this.cache.countryDetailData[countryName] = this.buildCountryDetail(countryName);
+        }
         return this.cache.countryDetailData[countryName] || [];
     },
 
@@ -240,7 +978,10 @@ const DataLoader = {
      * Get country time series data
      */
     getCountryTimeSeriesData() {
-        return this.cache.countryTimeSeries || {};
+        if (!this.cache.countryTimeSeries && this.cache.countryCube) {
+            this.cache.countryTimeSeries = this.buildCountryTimeSeries();
+        }
+        return this.cache.countryTimeSeries || this.shardTimeSeries;
     },
 
     /**
@@ -250,6 +991,82 @@ const DataLoader = {
         return this.cache.radarChartData || { countries: {}, regional_averages: {} };
     },
 
+    /**
+     * Country, group and year positions in the radar profiles, built once
+     */
+    radarIndex() {
+        const table = this.cache.radarProfiles;
+        if (!table) return null;
+        if (!this._radarIndex) {
+            this._radarIndex = {
+                country: new Map(table.countries.name.map((name, i) => [name, i])),
+                group: new Map(table.groups.name.map((name, i) => [name, i])),
+                year: new Map(table.years.map((year, i) => [year, i]))
+            };
+        }
+        return this._radarIndex;
+    },
+
+    /**
+     * Years covered by the radar profiles
+     */
+    getRadarYears() {
+        return this.cache.radarProfiles ? this.cache.radarProfiles.years : [];
+    },
+
+    /**
+     * {key: {raw, normalized}} of every radar indicator at one position of a flat year-major block
+     * ('values' or 'averages'); null when any indicator is missing
+     */
+    radarValues(block, position, normalization) {
+        const table = this.cache.radarProfiles;
+        if (!table.normalizations.includes(normalization)) return null;
+        const values = {};
+        for (const indicator of table.indicators) {
+            const series = table[block][indicator.key];
+            const raw = series.raw[position];
+            const normalized = series[normalization][position];
+            if (raw == null || normalized == null) return null;
+            values[indicator.key] = { raw, normalized };
+        }
+        return values;
+    },
+
+    /**
+     * Radar profile of a country in one year: {country, iso3, region, year, values: {key: {raw, normalized}}},
+     * normalized against that year's countries by `normalization` ('minmax' or 'percentile').
+     * Null for unknown countries/years or when the country lacks any indicator that year
+     */
+    getRadarProfile(country, year, normalization = 'minmax') {
+        const index = this.radarIndex();
+        const c = index ? index.country.get(country) : undefined;
+        const y = index ? index.year.get(+year) : undefined;
+        if (c === undefined || y === undefined) return null;
+        
+        const table = this.cache.radarProfiles;
+        const values = this.radarValues('values', y * table.countries.name.length + c, normalization);
+        if (!values) return null;
+        return {
+            country,
+            iso3: table.countries.iso3[c],
+            region: table.countries.region[c],
+            year: +year,
+            values
+        };
+    },
+
+    /**
+     * Population-weighted average profile of the world or a region in one year, normalized like
+     * getRadarProfile: {key: {raw, normalized}}, null when unknown or incomplete
+     */
+    getRadarAverage(group, year, normalization = 'minmax') {
+        const index = this.radarIndex();
+        const g = index ? index.group.get(group) : undefined;
+        const y = index ? index.year.get(+year) : undefined;
+        if (g === undefined || y === undefined) return null;
+        return this.radarValues('averages', y * this.cache.radarProfiles.groups.name.length + g, normalization);
+    },
+
     /**
      * NEW: Get ridgeline data
      */
@@ -257,6 +1074,32 @@ const DataLoader = {
         return this.cache.ridgelineData || [];
     },
 
+    /**
+     * Density of a ridgeline indicator across countries in one year: {x, y, mean, median, bandwidth}
+     * with y[i] the density at x[i]; `variant` is 'unweighted' (each country once) or 'weighted'
+     * (by population). Null for unknown indicators/years and years without enough countries,
+     * and until ridgeline_density.json is loaded (ensureFile('ridgelineDensity'))
+     */
+    getRidgelineDensity(indicator, year, variant = 'unweighted') {
+        const table = this.cache.ridgelineDensity;
+        const entry = table ? table.indicators[indicator] : null;
+        const y = table ? table.years.indexOf(+year) : -1;
+        if (!entry || !entry[variant] || y < 0) return null;
+        
+        const stats = entry[variant];
+        const points = table.points;
+        const levels = stats.density.slice(y * points, (y + 1) * points);
+        if (levels.some(level => level == null)) return null;
+        
+        return {
+            x: d3.range(points).map(i => entry.grid.start + i * entry.grid.step),
+            y: levels.map(level => level * stats.scale),
+            mean: stats.mean[y],
+            median: stats.median[y],
+            bandwidth: stats.bandwidth[y]
+        };
+    },
+
     /**
      * NEW: Get growth drivers data
      */
@@ -270,12 +1113,86 @@ const DataLoader = {
     getGenderGapData() {
         return this.cache.genderGapData || { comparison: [], timeseries: [] };
     },
+
+    /**
+     * Years of the gender gap table (empty with the older record layout)
+     */
+    getGenderGapYears() {
+        return this.cache.genderGapTable ? this.cache.genderGapTable.years : [];
+    },
+
+    /**
+     * Slopegraph comparison of any two years (see genderGapComparison); empty for unknown years
+     */
+    getGenderGapComparison(start, end) {
+        const table = this.cache.genderGapTable;
+        return table ? this.genderGapComparison(table, start, end) : [];
+    },
+
+    /**
+     * Male, female and gap series of any country (see genderGapSeries); null when unknown
+     */
+    getGenderGapSeries(country) {
+        const table = this.cache.genderGapTable;
+        return table ? this.genderGapSeries(table, country) : null;
+    },
     
     /**
      * NEW: Get projection uncertainty data
      */
     getProjectionData() {
         return this.cache.projectionData || [];
+    },
+
+    /**
+     * Group, year and indicator positions in the aggregate cube, built once
+     */
+    aggregateIndex() {
+        const aggregates = this.cache.regionAggregates;
+        if (!aggregates) return null;
+        if (!this._aggregateIndex) {
+            this._aggregateIndex = {
+                group: new Map(aggregates.groups.name.map((name, i) => [name, i])),
+                year: new Map(aggregates.years.map((year, i) => [year, i]))
+            };
+        }
+        return this._aggregateIndex;
+    },
+
+    /**
+     * Names of the aggregate groups of one type ('World', 'Region' or 'Subregion'), in UN order
+     */
+    getAggregateGroups(type = 'Region') {
+        const aggregates = this.cache.regionAggregates;
+        if (!aggregates) return [];
+        return aggregates.groups.name.filter((name, i) => aggregates.groups.type[i] === type);
+    },
+
+    /**
+     * One precomputed statistic of an indicator for a group and year, or null
+     * statistic: 'mean' (population-weighted), 'weightedMedian', 'min', 'p10', 'p25', 'median',
+     * 'p75', 'p90', 'max', 'count' or 'total' (population only)
+     */
+    getAggregate(group, indicator, statistic = 'mean', year) {
+        const index = this.aggregateIndex();
+        if (!index || !index.group.has(group) || !index.year.has(+year)) return null;
+        const aggregates = this.cache.regionAggregates;
+        const values = statistic === 'total'
+            ? aggregates.totals[indicator]
+            : (aggregates.statistics[statistic] || {})[indicator];
+        if (!values) return null;
+        return values[index.group.get(group) * aggregates.years.length + index.year.get(+year)];
+    },
+
+    /**
+     * Year series of one statistic for a group: [{year, value}], skipping years without data
+     */
+    getAggregateSeries(group, indicator, statistic = 'mean') {
+        const aggregates = this.cache.regionAggregates;
+        if (!aggregates) return [];
+        return aggregates.years
+            .map(year => ({ year: year, value: this.getAggregate(group, indicator, statistic, year) }))
+            .filter(d => d.value !== null && d.value !== undefined);
     }
 };
 
@@ -71,27 +71,10 @@ const GenderGapViz = {
     render() {
         this.svg.selectAll('*').remove();
         
-        // Find data for selected country
-        // Note: We need to check both timeseries (major) and comparison (all)
-        // For a better experience, we'll try to get the full series from country_population_timeseries 
-        // if it's not in the pre-calculated gender_gap_data timeseries
-        let displayData = this.data.timeseries.find(d => d.country === this.currentCountry);
-        
-        // Fallback: Calculate on the fly if not in "major_countries" list
-        if (!displayData) {
-            const allSeries = DataLoader.getCountryTimeSeries();
-            if (allSeries && allSeries[this.currentCountry]) {
-                displayData = {
-                    country: this.currentCountry,
-                    values: allSeries[this.currentCountry].map(d => ({
-                        year: d.year,
-                        male: d.lifeExpectancyMale,
-                        female: d.lifeExpectancyFemale,
-                        gap: d.lifeExpectancyFemale - d.lifeExpectancyMale
-                    }))
-                };
-            }
-        }
+        // Full series of the selected country from the gender gap table; older builds only
+        // carry the featured countries' series
+        const displayData = DataLoader.getGenderGapSeries(this.currentCountry)
+            || this.data.timeseries.find(d => d.country === this.currentCountry);
 
         if (!displayData) {
             this.svg.append('text')
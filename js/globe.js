@@ -11,7 +11,9 @@ const GlobeViz = {
         radius: null,
         center: null,
         rotationSensitivity: 60,
-        zoomSensitivity: 0.5
+        zoomSensitivity: 0.5,
+        // Color domain: 'year' fits each year's values, 'all' keeps one domain across years
+        colorDomain: 'year'
     },
     
     // State
@@ -23,6 +25,7 @@ const GlobeViz = {
         animationTimer: null,
         isPlaying: false,
         cachedGeoJson: null,
+        geometryLevel: null,
         cachedData: null
     },
     
@@ -59,6 +62,7 @@ const GlobeViz = {
         
         // Cache data
         this.state.cachedGeoJson = appState.data.geoJson;
+        this.state.geometryLevel = DataLoader.geometryLevelFor(DataLoader.config.geometryScale);
         
         // Set up controls
         this.setupControls();
@@ -99,9 +103,22 @@ const GlobeViz = {
             dispatcher.call('modeChanged', null, mode);
         });
         
-        // Year slider
+        // Year slider, over the years with globe records; the globe opens on the latest one
         const yearSlider = document.getElementById('year-slider');
         const currentYearDisplay = document.getElementById('current-year');
+        const years = DataLoader.getGlobeYears();
+        if (years.length) {
+            const marks = yearSlider.parentNode.querySelectorAll('.year-mark');
+            yearSlider.min = years[0];
+            yearSlider.max = years[years.length - 1];
+            yearSlider.value = yearSlider.max;
+            if (marks.length === 2) {
+                marks[0].textContent = yearSlider.min;
+                marks[1].textContent = yearSlider.max;
+            }
+            this.appState.currentYear = years[years.length - 1];
+            currentYearDisplay.textContent = this.appState.currentYear;
+        }
         
         yearSlider.addEventListener('input', (e) => {
             const year = parseInt(e.target.value);
@@ -138,7 +155,10 @@ const GlobeViz = {
         this.state.cachedData = contextData;
         
         // Create color palette
-        const colorPalette = this.createColorPalette(contextData, mode);
+        const colorPalette = this.createColorPalette(year, mode);
+        
+        // Feature-aligned values: path i is colored by values[i]
+        const values = DataLoader.getGlobeValues(year, mode);
         
         // Set up projection
         if (this.state.currentViewMode === '3d') {
@@ -192,14 +212,14 @@ const GlobeViz = {
             .selectAll('path')
             .data(this.state.cachedGeoJson.features)
             .enter().append('path')
-            .attr('d', this.pathGenerator)
-            .attr('fill', country => this.getColor(country, contextData, colorPalette))
+            .attr('fill', (country, i) => this.getColor(values[i], colorPalette))
             .attr('stroke', '#fff')
             .attr('stroke-width', 0.5)
-            .on('mouseover', function(country) { self.onCountryMouseOver(this, country, contextData); })
+            .on('mouseover', function(country) { self.onCountryMouseOver(this, country); })
             .on('mousemove', function() { self.onCountryMouseMove(); })
             .on('mouseout', function() { self.onCountryMouseOut(this); })
             .on('click', (country) => this.onCountryClick(country));
+        this.renderPaths();
         
         // Draw legend
         this.drawLegend(colorPalette, mode);
@@ -211,62 +231,19 @@ const GlobeViz = {
     },
     
     /**
-     * Create color palette for current mode
+     * Create color palette for current mode, from the precomputed color domain of the year
      */
-    createColorPalette(data, mode) {
+    createColorPalette(year, mode) {
         const colorScheme = this.colorSchemes[mode];
-        
-        let dataValues;
-        switch(mode) {
-            case 'population':
-                dataValues = data.map(d => d.population_number);
-                break;
-            case 'density':
-                dataValues = data.map(d => d.population_density_number);
-                break;
-            case 'sex-ratio':
-                dataValues = data.map(d => d.sex_ratio_number);
-                break;
-            case 'median-age':
-                dataValues = data.map(d => d.median_age_number);
-                break;
-            case 'demographic-transition':
-                dataValues = data.map(d => d.birth_rate_number || 0);
-                break;
-            case 'growth-drivers':
-                dataValues = data.map(d => d.natural_change_number || 0);
-                break;
-            case 'longevity-gap':
-                dataValues = data.map(d => d.life_expectancy_number || 0);
-                break;
-            case 'fertility-health':
-                dataValues = data.map(d => d.fertility_rate_number || 0);
-                break;
-            case 'healthcare-quality':
-                dataValues = data.map(d => d.infant_mortality_number || 0);
-                break;
-            case 'gender-gap':
-                // Calculate gender gap for all countries
-                dataValues = data.map(d => {
-                    const female = d.life_expectancy_female_number || 0;
-                    const male = d.life_expectancy_male_number || 0;
-                    return female - male;
-                });
-                break;
-            default:
-                dataValues = data.map(d => d.population_number);
-        }
+        const [minValue, maxValue] = DataLoader.getColorDomain(year, mode, this.config.colorDomain) || [0, 1];
         
         // Handle gender gap with diverging scale (can be negative)
         if (mode === 'gender-gap') {
-            const [minValue, maxValue] = d3.extent(dataValues);
             const absMax = Math.max(Math.abs(minValue), Math.abs(maxValue));
             return d3.scaleSequential(colorScheme)
                 .domain([-absMax, absMax]);  // Symmetric domain for diverging scale
         }
         
-        const [minValue, maxValue] = d3.extent(dataValues.filter(v => v > 0));
-        
         // Use log scale for population and density
         if (mode === 'population' || mode === 'density') {
             return d3.scaleLog()
@@ -280,55 +257,13 @@ const GlobeViz = {
     },
     
     /**
-     * Get color for a country
+     * Get color for a country's value (NaN where the country has no data)
      */
-    getColor(geoFeature, contextData, colorPalette) {
-        const countryData = contextData.find(d => d.alpha3_code === geoFeature.id);
-        if (!countryData) return '#ccc';
-        
-        const mode = this.appState.currentVisualization;
-        let value;
-        
-        switch(mode) {
-            case 'population':
-                value = countryData.population_number;
-                break;
-            case 'density':
-                value = countryData.population_density_number;
-                break;
-            case 'sex-ratio':
-                value = countryData.sex_ratio_number;
-                break;
-            case 'median-age':
-                value = countryData.median_age_number;
-                break;
-            case 'demographic-transition':
-                value = countryData.birth_rate_number || 0;
-                break;
-            case 'growth-drivers':
-                value = countryData.natural_change_number || 0;
-                break;
-            case 'longevity-gap':
-                value = countryData.life_expectancy_number || 0;
-                break;
-            case 'fertility-health':
-                value = countryData.fertility_rate_number || 0;
-                break;
-            case 'healthcare-quality':
-                value = countryData.infant_mortality_number || 0;
-                break;
-            case 'gender-gap':
-                // Calculate gender gap from life expectancy data
-                const femaleLE = countryData.life_expectancy_female_number || 0;
-                const maleLE = countryData.life_expectancy_male_number || 0;
-                value = femaleLE - maleLE;
-                break;
-            default:
-                value = countryData.population_number;
-        }
+    getColor(value, colorPalette) {
+        if (value == null || Number.isNaN(value)) return '#ccc';
         
         // For gender-gap, allow negative values; for others, filter out zero/negative
-        if (mode === 'gender-gap') {
+        if (this.appState.currentVisualization === 'gender-gap') {
             return (value !== 0) ? colorPalette(value) : '#ccc';
         }
         return value > 0 ? colorPalette(value) : '#ccc';
@@ -337,7 +272,7 @@ const GlobeViz = {
     /**
      * Handle country mouse over
      */
-    onCountryMouseOver(element, country, contextData) {
+    onCountryMouseOver(element, country) {
         // Highlight country
         d3.select(element)
             .style('opacity', 0.7)
@@ -349,7 +284,7 @@ const GlobeViz = {
         const countryCode = country.id;
         const countryName = country.properties.name;
         
-        const countryData = contextData.find(d => d.alpha3_code === countryCode);
+        const countryData = DataLoader.getGlobeRecord(this.appState.currentYear, countryCode);
         
         if (countryData) {
             const mode = this.appState.currentVisualization;
@@ -632,8 +567,7 @@ const GlobeViz = {
                 
                 self.state.currentRotation = self.projection.rotate();
                 
-                self.pathGenerator = d3.geoPath().projection(self.projection);
-                self.svg.selectAll('path').attr('d', self.pathGenerator);
+                self.renderPaths();
             })
             .on('end', function() {
                 self.state.currentRotation = self.projection.rotate();
@@ -654,8 +588,7 @@ const GlobeViz = {
                     self.projection.scale(newScale);
                     self.state.currentZoomScale = newScale;
                     
-                    const path = d3.geoPath().projection(self.projection);
-                    self.svg.selectAll('path').attr('d', path);
+                    self.renderPaths();
                     
                     if (self.state.currentViewMode === '3d') {
                         self.svg.selectAll('circle').attr('r', self.projection.scale());
@@ -687,29 +620,74 @@ const GlobeViz = {
             
             self.state.currentRotation = self.projection.rotate();
             
-            self.pathGenerator = d3.geoPath().projection(self.projection);
-            self.svg.selectAll('path').attr('d', self.pathGenerator);
+            self.renderPaths();
         });
     },
     
+    /**
+     * Redraw the country paths for the current projection
+     * Uses the geometry level that matches the zoom (drawing the current one until a finer level
+     * has loaded) and, on the globe, skips countries entirely on the far side
+     */
+    renderPaths() {
+        const level = DataLoader.geometryLevelFor(this.projection.scale());
+        if (level && level !== this.state.geometryLevel) {
+            if (DataLoader.hasGeometryLevel(level)) {
+                this.state.geometryLevel = level;
+                this.state.cachedGeoJson = DataLoader.cache.geometryLevels[level];
+                // Every level lists the same countries in the same order
+                this.svg.selectAll('.countries path').data(this.state.cachedGeoJson.features);
+            } else {
+                DataLoader.ensureGeometryLevel(level)
+                    .then(() => { if (this.svg) this.renderPaths(); })
+                    .catch(e => console.warn(e.message));
+            }
+        }
+        
+        this.pathGenerator = d3.geoPath().projection(this.projection);
+        const path = this.pathGenerator;
+        
+        // A country is hidden when its bounding circle (centroid + radius) lies beyond the horizon
+        const rotate = this.projection.rotate();
+        const center = [-rotate[0], -rotate[1]];
+        const cull = this.state.currentViewMode === '3d';
+        const visible = country => {
+            const properties = country.properties || {};
+            if (!cull || !properties.centroid) return true;
+            return d3.geoDistance(properties.centroid, center) - properties.radius * Math.PI / 180 < Math.PI / 2;
+        };
+        
+        this.svg.selectAll('.countries path').attr('d', country => visible(country) ? path(country) : null);
+    },
+    
     /**
      * Update globe for new year
      */
     updateYear(year) {
         this.appState.currentYear = year;
         
+        // Lazy loading: fetch the year's shard first, then recolor if it is still the current year.
+        // A year without a shard has no records to wait for and is drawn empty
+        if (!DataLoader.hasGlobeYear(year) && DataLoader.manifest && DataLoader.manifest.globe[year]) {
+            DataLoader.ensureGlobeYear(year).then(() => {
+                if (this.appState.currentYear === year && DataLoader.hasGlobeYear(year)) this.updateYear(year);
+            }).catch(e => console.warn(e.message));
+            return;
+        }
+        
         // Get new data
         const mode = this.appState.currentVisualization;
         const contextData = DataLoader.processGlobeData(year, mode);
         this.state.cachedData = contextData;
         
         // Update colors
-        const colorPalette = this.createColorPalette(contextData, mode);
+        const colorPalette = this.createColorPalette(year, mode);
+        const values = DataLoader.getGlobeValues(year, mode);
         
         this.svg.selectAll('.countries path')
             .transition()
             .duration(300)
-            .attr('fill', country => this.getColor(country, contextData, colorPalette));
+            .attr('fill', (country, i) => this.getColor(values[i], colorPalette));
         
         this.drawLegend(colorPalette, mode);
     },
@@ -722,12 +700,13 @@ const GlobeViz = {
         const contextData = DataLoader.processGlobeData(year, mode);
         this.state.cachedData = contextData;
         
-        const colorPalette = this.createColorPalette(contextData, mode);
+        const colorPalette = this.createColorPalette(year, mode);
+        const values = DataLoader.getGlobeValues(year, mode);
         
         this.svg.selectAll('.countries path')
             .transition()
             .duration(300)
-            .attr('fill', country => this.getColor(country, contextData, colorPalette));
+            .attr('fill', (country, i) => this.getColor(values[i], colorPalette));
         
         this.drawLegend(colorPalette, mode);
     },
@@ -745,9 +724,11 @@ const GlobeViz = {
         const yearSlider = document.getElementById('year-slider');
         const currentYearDisplay = document.getElementById('current-year');
         
+        const years = DataLoader.getGlobeYears();
+        const lastYear = years.length ? years[years.length - 1] : 2023;
         this.state.animationTimer = setInterval(() => {
             let year = this.appState.currentYear;
-            if (year < 2023) {
+            if (year < lastYear) {
                 year++;
                 this.updateYear(year);
                 yearSlider.value = year;
@@ -770,17 +751,19 @@ const GlobeViz = {
     },
     
     /**
-     * Reset to 2023
+     * Reset to the latest year
      */
     reset() {
         if (this.state.isPlaying) {
             this.pause();
         }
         
-        this.updateYear(2023);
-        document.getElementById('year-slider').value = 2023;
-        document.getElementById('current-year').textContent = 2023;
-        dispatcher.call('yearChanged', null, 2023);
+        const years = DataLoader.getGlobeYears();
+        const year = years.length ? years[years.length - 1] : 2023;
+        this.updateYear(year);
+        document.getElementById('year-slider').value = year;
+        document.getElementById('current-year').textContent = year;
+        dispatcher.call('yearChanged', null, year);
     },
     
     /**
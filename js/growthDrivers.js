@@ -212,9 +212,13 @@ const GrowthDriversViz = {
      * Draw legend
      */
     drawLegend() {
-        const uniqueRegions = [...new Set(this.data.map(d => d.region))]
-            .filter(r => r !== 'Unknown')
-            .sort();
+        // Regions come from the precomputed aggregates; scan the records only if they are missing
+        let uniqueRegions = DataLoader.getAggregateGroups('Region').slice().sort();
+        if (uniqueRegions.length === 0) {
+            uniqueRegions = [...new Set(this.data.map(d => d.region))]
+                .filter(r => r !== 'Unknown')
+                .sort();
+        }
         
         const legend = d3.select('#growth-legend');
         legend.selectAll('*').remove();
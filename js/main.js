@@ -159,58 +159,44 @@ function switchVisualization(vizType) {
         case 'timeseries':
             document.getElementById('timeseries-view').classList.add('active');
             document.getElementById('details-title').textContent = 'Regional Population Trends';
-            if (!AppState.data.processed.timeseries) {
-                TimeSeriesViz.init(d3.select('#timeseries-chart'), AppState);
-            }
+            openView('timeseries', 'timeseries', () => TimeSeriesViz.init(d3.select('#timeseries-chart'), AppState));
             break;
             
         case 'comparison':
             document.getElementById('comparison-view').classList.add('active');
             document.getElementById('details-title').textContent = 'Population Comparison';
-            if (!AppState.data.processed.comparison) {
-                ComparisonViz.init(d3.select('#comparison-chart'), AppState);
-            }
+            openView('comparison', 'comparison', () => ComparisonViz.init(d3.select('#comparison-chart'), AppState));
             break;
             
         case 'multiples':
             document.getElementById('multiples-view').classList.add('active');
             document.getElementById('details-title').textContent = 'Regional Birth & Death Rates';
-            if (!AppState.data.processed.multiples) {
-                SmallMultiplesViz.init(d3.select('#multiples-container'), AppState);
-            }
+            openView('multiples', 'multiples', () => SmallMultiplesViz.init(d3.select('#multiples-container'), AppState));
             break;
             
         case 'animation':
             document.getElementById('animation-view').classList.add('active');
             document.getElementById('details-title').textContent = 'Demographic Transition Animation';
-            if (!AppState.data.processed.animation) {
-                AnimationViz.init(d3.select('#animation-chart'), AppState);
-            }
+            openView('animation', 'animation', () => AnimationViz.init(d3.select('#animation-chart'), AppState));
             break;
             
         // NEW ADVANCED VISUALIZATIONS
         case 'radar':
             document.getElementById('radar-view').classList.add('active');
             document.getElementById('details-title').textContent = 'Country DNA Profile';
-            if (!AppState.data.processed.radar) {
-                RadarChartViz.init(d3.select('#radar-chart'), AppState);
-            }
+            openView('radar', 'radar', () => RadarChartViz.init(d3.select('#radar-chart'), AppState));
             break;
             
         case 'growth-drivers':
             document.getElementById('growth-drivers-view').classList.add('active');
             document.getElementById('details-title').textContent = 'Drivers of Population Growth';
-            if (!AppState.data.processed.growthDrivers) {
-                GrowthDriversViz.init(d3.select('#growth-drivers-chart'), AppState);
-            }
+            openView('growth-drivers', 'growthDrivers', () => GrowthDriversViz.init(d3.select('#growth-drivers-chart'), AppState));
             break;
             
         case 'gender-gap':
             document.getElementById('gender-gap-view').classList.add('active');
             document.getElementById('details-title').textContent = 'Life Expectancy Gender Gap';
-            if (!AppState.data.processed.genderGap) {
-                GenderGapViz.init(d3.select('#gender-gap-chart'), AppState);
-            }
+            openView('gender-gap', 'genderGap', () => GenderGapViz.init(d3.select('#gender-gap-chart'), AppState));
             break;
             
         case 'statistics':
@@ -218,13 +204,13 @@ function switchVisualization(vizType) {
             document.getElementById('details-title').textContent = 'Global Statistical Analysis';
             
             // Use requestAnimationFrame to ensure DOM is updated before calculating dimensions
-            requestAnimationFrame(() => {
+            DataLoader.ensureView('statistics').then(() => requestAnimationFrame(() => {
                 if (!AppState.data.processed.statistics) {
                     StatisticsViz.init(AppState);
                 } else {
                     StatisticsViz.update();
                 }
-            });
+            })).catch(error => console.error('Error loading statistics data:', error));
             break;
     }
     
@@ -232,6 +218,16 @@ function switchVisualization(vizType) {
     dispatcher.call('visualizationChanged', null, vizType);
 }
 
+/**
+ * Initialize a view once the files it reads are loaded (DataLoader.ensureView), unless it was
+ * initialized or left in the meantime
+ */
+function openView(vizType, processedKey, init) {
+    DataLoader.ensureView(vizType).then(() => {
+        if (AppState.currentMode === vizType && !AppState.data.processed[processedKey]) init();
+    }).catch(error => console.error(`Error loading ${vizType} data:`, error));
+}
+
 /**
  * Set up pane maximize/minimize controls
  */
@@ -326,9 +322,18 @@ function setupEventListeners() {
         AppState.selectedCountry = countryName;
         AppState.selectedCountryCode = countryCode;
         
-        // Only show country detail view if in overview mode
+        // Lazy loading: fetch the country's shard in the background
+        const shard = DataLoader.config.lazy ? DataLoader.loadCountry(countryName) : null;
+        
+        // Only show country detail view if in overview mode (once its data is loaded)
         if (AppState.currentMode === 'overview') {
-            showCountryDetail(countryCode, countryName);
+            Promise.all([DataLoader.ensureView('overview'), shard]).then(() => {
+                if (AppState.currentMode === 'overview' && AppState.selectedCountry === countryName) {
+                    showCountryDetail(countryCode, countryName);
+                }
+            }).catch(e => console.warn(e.message));
+        } else if (shard) {
+            shard.catch(e => console.warn(e.message));
         }
         
         // BRUSHING & LINKING: Highlight country in all other visualizations
@@ -355,10 +360,10 @@ function setupEventListeners() {
         AppState.currentYear = year;
         
         // Sync year across animated visualizations
-        if (AnimationViz.update) {
+        if (AppState.data.processed.animation) {
             AnimationViz.update(year);
         }
-        if (GrowthDriversViz.update) {
+        if (AppState.data.processed.growthDrivers) {
             GrowthDriversViz.update(year);
         }
         if (AppState.currentMode === 'statistics' && AppState.data.processed.statistics) {
@@ -11,6 +11,9 @@ const RadarChartViz = {
     height: null,
     radius: null,
     selectedCountry: null,
+    // Profile year and normalization ('minmax' or 'percentile'), from radar_profiles.json
+    year: null,
+    normalization: 'minmax',
     
     /**
      * Initialize radar chart visualization
@@ -49,8 +52,9 @@ const RadarChartViz = {
             return;
         }
         
-        // Set up country selector
+        // Set up country selector, year slider and normalization buttons
         this.setupControls();
+        this.setupTimeControls();
         
         // Draw static elements
         this.drawAxes();
@@ -61,7 +65,7 @@ const RadarChartViz = {
         // Listen for country selections from globe
         dispatcher.on('countrySelected.radar', (countryCode, countryName) => {
             console.log('Radar chart: Country selected from globe:', countryName);
-            if (this.data && this.data.countries[countryName]) {
+            if (this.hasCountry(countryName)) {
                 this.updateChart(countryName);
                 // Hide instructions after first selection
                 const instructions = document.getElementById('radar-instructions');
@@ -84,7 +88,8 @@ const RadarChartViz = {
         const countrySelect = d3.select('#radar-country-select');
         countrySelect.selectAll('option:not([value=""])').remove();
         
-        const countries = Object.keys(this.data.countries).sort();
+        const index = DataLoader.radarIndex();
+        const countries = (index ? Array.from(index.country.keys()) : Object.keys(this.data.countries)).sort();
         
         countries.forEach(country => {
             countrySelect.append('option')
@@ -101,6 +106,75 @@ const RadarChartViz = {
         });
     },
     
+    /**
+     * Set up the year slider and normalization buttons (hidden when no radar profiles are loaded)
+     */
+    setupTimeControls() {
+        const years = DataLoader.getRadarYears();
+        const controls = document.getElementById('radar-time-controls');
+        if (!years.length) {
+            if (controls) controls.style.display = 'none';
+            return;
+        }
+        
+        this.year = years[years.length - 1];
+        const slider = document.getElementById('radar-year-slider');
+        slider.min = years[0];
+        slider.max = this.year;
+        slider.value = this.year;
+        document.getElementById('radar-slider-label').textContent = this.year;
+        
+        slider.addEventListener('input', (e) => {
+            this.year = +e.target.value;
+            document.getElementById('radar-slider-label').textContent = this.year;
+            if (this.selectedCountry) this.updateChart(this.selectedCountry);
+        });
+        
+        document.querySelectorAll('#radar-time-controls .speed-btn').forEach(btn => {
+            btn.addEventListener('click', () => {
+                document.querySelectorAll('#radar-time-controls .speed-btn').forEach(b => b.classList.remove('active'));
+                btn.classList.add('active');
+                this.normalization = btn.dataset.normalization;
+                if (this.selectedCountry) this.updateChart(this.selectedCountry);
+            });
+        });
+    },
+    
+    /**
+     * Whether a country has a radar profile (in any year when profiles are loaded)
+     */
+    hasCountry(countryName) {
+        const index = DataLoader.radarIndex();
+        if (index) return index.country.has(countryName);
+        return Boolean(this.data && this.data.countries[countryName]);
+    },
+    
+    /**
+     * Profile of a country for the selected year and normalization, with its region and world averages
+     * ({values: {indicator: {raw, normalized}}} each); falls back to the latest-year radar chart data
+     */
+    getProfile(countryName) {
+        if (this.year === null) {
+            const countryData = this.data.countries[countryName];
+            if (!countryData) return null;
+            return {
+                country: countryData,
+                regional: this.data.regionalAverages[countryData.region] ? { values: this.data.regionalAverages[countryData.region] } : null,
+                world: this.data.worldAverage ? { values: this.data.worldAverage } : null
+            };
+        }
+        
+        const country = DataLoader.getRadarProfile(countryName, this.year, this.normalization);
+        if (!country) return null;
+        const regional = DataLoader.getRadarAverage(country.region, this.year, this.normalization);
+        const world = DataLoader.getRadarAverage('World', this.year, this.normalization);
+        return {
+            country,
+            regional: regional ? { values: regional } : null,
+            world: world ? { values: world } : null
+        };
+    },
+    
     /**
      * Draw axes and gridlines
      */
@@ -173,8 +247,12 @@ const RadarChartViz = {
         // Clear instruction text if present
         this.svg.selectAll('.radar-instruction-text').remove();
         
-        const countryData = this.data.countries[countryName];
-        if (!countryData) return;
+        const profile = this.getProfile(countryName);
+        if (!profile) {
+            this.showMissing(countryName);
+            return;
+        }
+        const countryData = profile.country;
         
         const indicators = Object.keys(this.data.indicators);
         const numAxes = indicators.length;
@@ -191,18 +269,15 @@ const RadarChartViz = {
         
         // Create path data for regional average
         const regionName = countryData.region;
-        const regionalAvg = this.data.regionalAverages[regionName];
-        
-        let regionalPath = null;
-        if (regionalAvg) {
-            regionalPath = indicators.map((indicator, i) => {
-                const angle = angleSlice * i - Math.PI / 2;
-                const value = regionalAvg[indicator] ? regionalAvg[indicator].normalized : 0;
-                const x = Math.cos(angle) * (this.radius * value);
-                const y = Math.sin(angle) * (this.radius * value);
-                return [x, y];
-            });
-        }
+        const averagePath = (average) => average ? indicators.map((indicator, i) => {
+            const angle = angleSlice * i - Math.PI / 2;
+            const value = average.values[indicator] ? average.values[indicator].normalized : 0;
+            const x = Math.cos(angle) * (this.radius * value);
+            const y = Math.sin(angle) * (this.radius * value);
+            return [x, y];
+        }) : null;
+        const regionalPath = averagePath(profile.regional);
+        const worldPath = averagePath(profile.world);
         
         // Line generator
         const lineGenerator = d3.lineRadial()
@@ -214,7 +289,19 @@ const RadarChartViz = {
         this.svg.selectAll('.radar-path').remove();
         this.svg.selectAll('.radar-dot').remove();
         
-        // Draw regional average first (background)
+        // Draw the world average first (background)
+        if (worldPath) {
+            this.svg.append('path')
+                .datum(worldPath.map(([x, y], i) => [Math.sqrt(x * x + y * y), angleSlice * i]))
+                .attr('class', 'radar-path world')
+                .attr('d', lineGenerator)
+                .attr('fill', 'none')
+                .attr('stroke', '#718096')
+                .attr('stroke-width', 1.5)
+                .attr('stroke-dasharray', '2,4');
+        }
+        
+        // Then the regional average
         if (regionalPath) {
             const regionalPathData = regionalPath.map(([x, y], i) => {
                 const angle = angleSlice * i;
@@ -276,10 +363,12 @@ const RadarChartViz = {
                         .style('left', d3.event.pageX + 10 + 'px')
                         .style('top', d3.event.pageY - 10 + 'px')
                         .html(`
-                            <div style="font-weight: 600; margin-bottom: 4px;">${countryName}</div>
+                            <div style="font-weight: 600; margin-bottom: 4px;">${countryName}${self.year !== null ? ` (${self.year})` : ''}</div>
                             <div>${self.data.indicators[indicator]}</div>
                             <div>Raw: ${data.raw.toFixed(2)}</div>
-                            <div>Normalized: ${data.normalized.toFixed(2)}</div>
+                            <div>${self.normalization === 'percentile' && self.year !== null
+                                ? `Percentile rank: ${Math.round(data.normalized * 100)}%`
+                                : `Normalized: ${data.normalized.toFixed(2)}`}</div>
                         `);
                 })
                 .on('mouseout', function() {
@@ -293,13 +382,31 @@ const RadarChartViz = {
         });
         
         // Update legend
-        this.updateLegend(countryName, regionName);
+        this.updateLegend(countryName, regionName, Boolean(worldPath));
+    },
+    
+    /**
+     * Clear the chart and note that a country has no complete profile in the selected year
+     */
+    showMissing(countryName) {
+        this.svg.selectAll('.radar-path').remove();
+        this.svg.selectAll('.radar-dot').remove();
+        d3.select('#radar-legend').selectAll('*').remove();
+        
+        this.svg.append('text')
+            .attr('class', 'radar-instruction-text')
+            .attr('x', 0)
+            .attr('y', 0)
+            .attr('text-anchor', 'middle')
+            .attr('font-size', '14px')
+            .attr('fill', '#999')
+            .text(`No complete profile for ${countryName}${this.year !== null ? ` in ${this.year}` : ''}`);
     },
     
     /**
      * Update legend
      */
-    updateLegend(countryName, regionName) {
+    updateLegend(countryName, regionName, showWorld = false) {
         const legend = d3.select('#radar-legend');
         legend.selectAll('*').remove();
         
@@ -337,6 +444,25 @@ const RadarChartViz = {
         regionalItem.append('span')
             .style('font-size', '13px')
             .text(`${regionName} Average`);
+        
+        // World average
+        if (showWorld) {
+            const worldItem = legend.append('div')
+                .attr('class', 'legend-item')
+                .style('display', 'inline-flex')
+                .style('align-items', 'center')
+                .style('gap', '8px')
+                .style('margin-left', '20px');
+            
+            worldItem.append('div')
+                .style('width', '20px')
+                .style('height', '3px')
+                .style('border-top', '2px dotted #718096');
+            
+            worldItem.append('span')
+                .style('font-size', '13px')
+                .text('World Average');
+        }
     },
     
     /**
@@ -372,7 +498,7 @@ const RadarChartViz = {
      * Highlight country (called from coordinated views)
      */
     highlightCountry(countryName) {
-        if (this.data && this.data.countries[countryName]) {
+        if (this.hasCountry(countryName)) {
             this.updateChart(countryName);
             document.getElementById('radar-country-select').value = countryName;
             // Hide instructions
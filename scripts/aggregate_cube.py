@@ -0,0 +1,137 @@
+"""
+Region Aggregate Cube
+Statistics of the country indicator cube over location groups (world, regions, subregions):
+group x year x indicator, with population-weighted means and medians, order statistics and totals
+"""
+
+import numpy as np
+
+# Order statistics taken over the member countries of a group (unweighted)
+QUANTILES = {'min': 0.0, 'p10': 0.1, 'p25': 0.25, 'median': 0.5, 'p75': 0.75, 'p90': 0.9, 'max': 1.0}
+
+# Statistics in artifact order; 'count' is the number of countries with a value
+STATISTICS = ['mean', 'weightedMedian'] + list(QUANTILES) + ['count']
+
+
+def location_groups(hierarchy, countries):
+    """
+    [(name, type, parent name, member mask over `countries`)] for the world, every region and every subregion
+    Membership follows the hierarchy's nearest Region/Subregion ancestor of each country
+    """
+    index = hierarchy.index
+    members = index[index['type'] == 'Country/Area'].drop_duplicates('name').set_index('name')
+    region = members['region'].reindex(countries).to_numpy(dtype=object)
+    subregion = members['subregion'].reindex(countries).to_numpy(dtype=object)
+
+    groups = [('World', 'World', None, np.ones(len(countries), dtype=bool))]
+    for level, column, parents in (('Region', region, None), ('Subregion', subregion, region)):
+        for name in index.loc[index['type'] == level, 'name'].drop_duplicates():
+            mask = column == name
+            if mask.any():
+                parent = parents[mask][0] if parents is not None else 'World'
+                groups.append((name, level, parent if isinstance(parent, str) else None, mask))
+    return groups
+
+
+def member_statistics(values, weights):
+    """
+    Order statistics (QUANTILES, linear interpolation like np.nanquantile) and the weighted median
+    over axis 0 of `values` (members, ...), from one sort; `weights` broadcast to `values`
+    NaN values and non-positive weights are ignored; NaN where a slice has no values (or no weight)
+    """
+    order = np.argsort(values, axis=0)
+    ordered = np.take_along_axis(values, order, axis=0)
+    count = (~np.isnan(values)).sum(0)
+    last = np.maximum(count - 1, 0)
+
+    statistics = {}
+    for name, q in QUANTILES.items():
+        position = q * last
+        below = np.floor(position).astype(int)
+        above = np.minimum(below + 1, last)
+        low = np.take_along_axis(ordered, below[None], axis=0)[0]
+        high = np.take_along_axis(ordered, above[None], axis=0)[0]
+        statistics[name] = np.where(count > 0, low + (high - low) * (position - below), np.nan)
+
+    weights = np.maximum(np.where(np.isnan(values), 0, np.broadcast_to(weights, values.shape)), 0)
+    cumulative = np.cumsum(np.take_along_axis(weights, order, axis=0), axis=0)
+    total = cumulative[-1]
+    position = np.argmax(cumulative >= total / 2, axis=0)
+    median = np.take_along_axis(ordered, position[None], axis=0)[0]
+    statistics['weightedMedian'] = np.where(total > 0, median, np.nan)
+    return statistics
+
+
+class AggregateCube:
+    """
+    statistics[name][group, year, indicator] for the groups of `location_groups`, aligned to a country cube's
+    years and indicators; weights are the cube's population (missing population counts as no weight)
+    """
+
+    def __init__(self, groups, years, indicators, statistics, totals, weight='population'):
+        self.groups = groups
+        self.years = years
+        self.indicators = indicators
+        self.statistics = statistics
+        self.totals = totals
+        self.weight = weight
+        self._group = {name: i for i, (name, *_) in enumerate(groups)}
+        self._axis = {indicator['key']: i for i, indicator in enumerate(indicators)}
+
+    @classmethod
+    def from_cube(cls, cube, groups, weight='population', totals=('population',)):
+        """Aggregate every indicator of `cube` over each group's member countries"""
+        values = cube.values
+        weights = np.nan_to_num(cube[weight])
+        valid = ~np.isnan(values)
+        membership = np.array([mask for *_, mask in groups], dtype=float)
+
+        # Sums over members as one matrix product per quantity: (groups, countries) x (countries, years, indicators)
+        weighted = np.where(valid, values * weights[..., None], 0)
+        weight_sum = np.einsum('gc,cyi->gyi', membership, np.where(valid, weights[..., None], 0))
+        count = np.einsum('gc,cyi->gyi', membership, valid.astype(float))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            statistics = {'mean': np.einsum('gc,cyi->gyi', membership, weighted) / weight_sum}
+
+        # Order statistics group by group (groups overlap: the world contains its regions)
+        per_group = [member_statistics(values[mask], weights[mask][..., None]) for *_, mask in groups]
+        for name in ['weightedMedian'] + list(QUANTILES):
+            statistics[name] = np.stack([group[name] for group in per_group])
+        statistics['count'] = count.astype(int)
+
+        # Additive indicators (population) also get group totals
+        total = {key: np.where(membership @ ~np.isnan(cube[key]) > 0, membership @ np.nan_to_num(cube[key]), np.nan)
+                 for key in totals}
+        return cls(groups, cube.years, cube.indicators, statistics, total, weight)
+
+    def get(self, statistic, group, key):
+        """(year,) series of one statistic of one indicator for one group"""
+        return self.statistics[statistic][self._group[group], :, self._axis[key]]
+
+    def to_json(self):
+        """
+        Serializable layout: group and indicator metadata plus, per statistic, one flat group-major array per
+        indicator (value of group g in year y at index g * len(years) + y, null where no member has a value)
+        """
+        return {
+            'format': 'aggregates',
+            'version': 1,
+            'groups': {
+                'name': [name for name, *_ in self.groups],
+                'type': [level for _, level, *_ in self.groups],
+                'parent': [parent for _, _, parent, _ in self.groups]
+            },
+            'years': self.years.tolist(),
+            'indicators': [
+                {'key': indicator['key'], 'label': indicator['label'], 'unit': indicator['unit']}
+                for indicator in self.indicators
+            ],
+            'weight': self.weight,
+            'statistics': {
+                name: {indicator['key']: self.statistics[name][:, :, i].ravel()
+                       for i, indicator in enumerate(self.indicators)}
+                for name in STATISTICS
+            },
+            'totals': {key: values.ravel() for key, values in self.totals.items()}
+        }
@@ -0,0 +1,289 @@
+"""
+Pipeline Benchmarks
+Times load_and_clean_data and every prepare_* stage of prepare_dataviz.py on synthetic UN datasets
+`run` writes machine-readable results, `compare` flags regressions against a stored baseline
+Runs fully offline: datasets come from synthetic_data.py and are cached between runs
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import prepare_dataviz as pipeline
+from scheduler import run_stages
+from synthetic_data import FREQUENCIES, generate_csv
+
+RESULTS_PATH = 'benchmarks/results.json'
+BASELINE_PATH = 'benchmarks/baseline.json'
+
+# Dataset names are x<scale>-<frequency>; x100 and monthly x10 are opt-in (millions of rows)
+DEFAULT_DATASETS = ['x1-annual', 'x10-annual', 'x1-monthly']
+
+
+def parse_dataset(name):
+    """'x10-annual' -> (10, 'annual')"""
+    match = re.fullmatch(r'x(\d+)-(\w+)', name)
+    if not match or match.group(2) not in FREQUENCIES:
+        raise ValueError(f"Unknown dataset {name!r} (expected x<scale>-<{'|'.join(sorted(FREQUENCIES))}>)")
+    return int(match.group(1)), match.group(2)
+
+
+def dataset_csv(cache_dir, name, seed):
+    """Path of the synthetic CSV for a dataset, generating it on first use"""
+    path = os.path.join(cache_dir, f'un-{name}-seed{seed}.csv')
+    if not os.path.exists(path):
+        scale, frequency = parse_dataset(name)
+        print(f"  Generating {name} dataset...")
+        generate_csv(path + '.tmp', scale, frequency, seed)
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def _timed(func, *args, **kwargs):
+    """(seconds, result) of one call, with the stage's progress output suppressed"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def _clean_outputs(data_dir):
+    """Remove every artifact from a previous repeat, keeping the input CSV and GeoJSON"""
+    for name in os.listdir(data_dir):
+        path = os.path.join(data_dir, name)
+        if name in (os.path.basename(pipeline.INPUT_CSV), os.path.basename(pipeline.GEOMETRY_PATH)):
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+
+def check_country_cube(cube, df):
+    """Fail the run unless the country cube has one row per country and one column per period"""
+    countries = df[df['Type'] == 'Country/Area']
+    expected = (countries[pipeline.NAME_COL].nunique(), countries['Year'].nunique(), len(pipeline.COUNTRY_INDICATORS))
+    if cube.values.shape != expected:
+        raise AssertionError(f"country cube has shape {cube.values.shape}, expected {expected} "
+                             f"(countries, periods, indicators)")
+
+
+def benchmark_dataset(csv_path, run_dir, repeat):
+    """
+    Time the loader, the shared inputs and every stage (in registry order) `repeat` times
+    Returns {timing name: [seconds per repeat]} and {timing name: error} for stages that failed
+    """
+    data_dir = os.path.join(run_dir, os.path.dirname(pipeline.INPUT_CSV))
+    os.makedirs(data_dir, exist_ok=True)
+    shutil.copyfile(csv_path, os.path.join(run_dir, pipeline.INPUT_CSV))
+    if os.path.exists(pipeline.GEOMETRY_PATH):
+        shutil.copyfile(pipeline.GEOMETRY_PATH, os.path.join(run_dir, pipeline.GEOMETRY_PATH))
+
+    runs, errors = {}, {}
+    cwd = os.getcwd()
+    os.chdir(run_dir)
+    try:
+        for _ in range(repeat):
+            _clean_outputs(data_dir)
+
+            # CSV parse (plus snapshot write), then the snapshot read later builds take
+            seconds, df = _timed(pipeline.load_and_clean_data, pipeline.PIPELINE_COLUMNS, refresh=True)
+            runs.setdefault('load_and_clean_data', []).append(seconds)
+            seconds, df = _timed(pipeline.load_and_clean_data, pipeline.PIPELINE_COLUMNS)
+            runs.setdefault('load_and_clean_data:snapshot', []).append(seconds)
+
+            for name, provider in pipeline.SHARED_INPUTS.items():
+                seconds, value = _timed(provider, df)
+                runs.setdefault(f'shared:{name}', []).append(seconds)
+                if name == 'country_cube':
+                    check_country_cube(value, df)
+
+            # One stage at a time, so a failing stage is recorded without stopping the others
+            for stage in pipeline.STAGES:
+                timing = stage['func'].__name__
+                if timing in errors:
+                    continue
+
+                def record(stage, seconds):
+                    runs.setdefault(timing, []).append(seconds)
+
+                try:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        run_stages([stage], df, pipeline.SHARED_INPUTS, options=pipeline.DEFAULT_OPTIONS,
+                                   on_complete=record)
+                except Exception as error:
+                    errors[timing] = f"{type(error).__name__}: {error}"
+                    runs.pop(timing, None)
+    finally:
+        os.chdir(cwd)
+    return runs, errors
+
+
+def summarize(samples):
+    return {
+        'min': round(min(samples), 6),
+        'median': round(statistics.median(samples), 6),
+        'runs': [round(seconds, 6) for seconds in samples]
+    }
+
+
+def environment():
+    """Machine and library versions the timings were taken on"""
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__
+    }
+
+
+def run(args):
+    cache_dir = args.cache_dir or os.path.join(tempfile.gettempdir(), 'prepare_dataviz_benchmarks')
+    os.makedirs(cache_dir, exist_ok=True)
+    results = {
+        'version': 1,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'environment': environment(),
+        'datasets': {}
+    }
+
+    for name in args.datasets:
+        scale, frequency = parse_dataset(name)
+        csv_path = dataset_csv(cache_dir, name, args.seed)
+        print(f"\nBenchmarking {name} ({scale}x locations, {frequency})...")
+
+        run_dir = tempfile.mkdtemp(prefix=f'{name}-', dir=cache_dir)
+        try:
+            runs, errors = benchmark_dataset(csv_path, run_dir, args.repeat)
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+        with open(csv_path, 'rb') as f:
+            rows = sum(1 for _ in f) - 1
+        results['datasets'][name] = {
+            'scale': scale,
+            'frequency': frequency,
+            'rows': rows,
+            'csv_bytes': os.path.getsize(csv_path),
+            'timings': {timing: summarize(samples) for timing, samples in runs.items()},
+            'errors': errors
+        }
+        for timing, samples in runs.items():
+            print(f"  {timing:<45} {min(samples):9.3f} s")
+        for timing, error in errors.items():
+            print(f"  {timing:<45} ✗ {error}")
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✓ Wrote {args.output}")
+
+
+def compare_results(baseline, current, threshold, min_delta):
+    """
+    Rows of (dataset, timing, baseline s, current s, ratio, status) for every timing in either file
+    A timing regresses when its best time is more than `threshold` slower and at least `min_delta`
+    seconds slower (sub-noise differences on tiny stages are ignored); new errors also count
+    """
+    rows = []
+    for name, dataset in current['datasets'].items():
+        base = baseline['datasets'].get(name)
+        if base is None:
+            continue
+        for timing in sorted(set(base['timings']) | set(dataset['timings']) | set(dataset.get('errors', {}))):
+            before = base['timings'].get(timing, {}).get('min')
+            after = dataset['timings'].get(timing, {}).get('min')
+            if timing in dataset.get('errors', {}):
+                rows.append((name, timing, before, None, None, 'ERROR'))
+            elif before is None or after is None:
+                rows.append((name, timing, before, after, None, 'new' if before is None else 'missing'))
+            else:
+                ratio = after / before if before else float('inf')
+                if ratio > 1 + threshold and after - before >= min_delta:
+                    status = 'REGRESSION'
+                elif ratio < 1 - threshold and before - after >= min_delta:
+                    status = 'faster'
+                else:
+                    status = 'ok'
+                rows.append((name, timing, before, after, ratio, status))
+    return rows
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.results) as f:
+        current = json.load(f)
+
+    if baseline.get('environment') != current.get('environment'):
+        print("⚠ Baseline and results were recorded on different environments - compare with care")
+
+    rows = compare_results(baseline, current, args.threshold, args.min_delta)
+
+    def seconds(value):
+        return f"{value:9.3f}" if value is not None else f"{'-':>9}"
+
+    print(f"\n{'dataset':<12} {'timing':<45} {'baseline':>9} {'current':>9} {'change':>8}  status")
+    for name, timing, before, after, ratio, status in rows:
+        change = f"{(ratio - 1) * 100:+7.1f}%" if ratio is not None else f"{'':>8}"
+        print(f"{name:<12} {timing:<45} {seconds(before)} {seconds(after)} {change}  {status}")
+
+    failures = [row for row in rows if row[5] in ('REGRESSION', 'ERROR')]
+    if failures:
+        print(f"\n✗ {len(failures)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    print(f"\n✓ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the prepare_dataviz.py stages on synthetic data")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="time every stage and write the results")
+    run_parser.add_argument('--datasets', type=lambda value: value.split(','), default=DEFAULT_DATASETS,
+                            help=f"comma-separated x<scale>-<frequency> names (default: {','.join(DEFAULT_DATASETS)})")
+    run_parser.add_argument('--repeat', type=int, default=3, help="timed runs per dataset; the best is compared (default: 3)")
+    run_parser.add_argument('--seed', type=int, default=0, help="synthetic data seed (default: 0)")
+    run_parser.add_argument('--output', default=RESULTS_PATH, help=f"results file (default: {RESULTS_PATH})")
+    run_parser.add_argument('--cache-dir', help="where generated datasets are kept (default: system temp directory)")
+
+    compare_parser = commands.add_parser('compare', help="flag regressions against a stored baseline")
+    compare_parser.add_argument('--baseline', default=BASELINE_PATH, help=f"baseline results (default: {BASELINE_PATH})")
+    compare_parser.add_argument('--results', default=RESULTS_PATH, help=f"current results (default: {RESULTS_PATH})")
+    compare_parser.add_argument('--threshold', type=float, default=0.15,
+                                help="relative slowdown that counts as a regression (default: 0.15)")
+    compare_parser.add_argument('--min-delta', type=float, default=0.02,
+                                help="ignore slowdowns smaller than this many seconds (default: 0.02)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'run':
+        run(args)
+        return 0
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
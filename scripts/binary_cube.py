@@ -0,0 +1,182 @@
+"""
+Binary Indicator Cube
+Memory-mapped float32 location x year x indicator cube for offline analysis, with index files for
+location codes, names, ISO3 codes, years and indicators
+open_cube() maps it in milliseconds whatever its size; worker processes share it through the page cache
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from indicator_cube import year_axis
+
+NAME_COL = 'Region, subregion, country or area *'
+ISO3_COL = 'ISO3 Alpha-code'
+
+# Files of a cube directory; the index is written last, so a directory without it is an incomplete write
+VALUES_FILE = 'values.npy'
+CODES_FILE = 'location_codes.npy'
+YEARS_FILE = 'years.npy'
+INDEX_FILE = 'index.json'
+
+
+def write_cube(df, indicators, directory):
+    """
+    Scatter every location of the cleaned frame (world, regions, subregions, countries) into a
+    float32 cube and write it to `directory`; `indicators` are {'key', 'column', 'label', 'unit'}
+    Locations keep their order of first appearance, years are sorted (sub-annual periods keep their
+    fractional years, see indicator_cube.year_axis), NaN marks a missing value
+    Returns the cube shape
+    """
+    codes, locations = pd.factorize(df['Location code'].astype(int), sort=False)
+    years, year_codes = year_axis(df['Year'])
+
+    values = np.full((len(locations), len(years), len(indicators)), np.nan, dtype=np.float32)
+    values[codes, year_codes] = df[[indicator['column'] for indicator in indicators]].to_numpy(dtype=np.float32)
+
+    first = df.groupby(codes, sort=True)[[NAME_COL, 'Type', ISO3_COL]].first()
+    index = {
+        'format': 'cube',
+        'version': 1,
+        'shape': list(values.shape),
+        'dtype': 'float32',
+        'locations': {
+            'name': first[NAME_COL].tolist(),
+            'type': first['Type'].tolist(),
+            'iso3': first[ISO3_COL].fillna('').tolist()
+        },
+        'indicators': [
+            {'key': indicator['key'], 'label': indicator['label'], 'unit': indicator['unit']}
+            for indicator in indicators
+        ]
+    }
+
+    os.makedirs(directory, exist_ok=True)
+    for name, array in ((VALUES_FILE, values), (CODES_FILE, np.asarray(locations, dtype=np.int32)),
+                        (YEARS_FILE, years.astype(np.int32) if years.dtype.kind == 'i' else years)):
+        # Replace rather than overwrite, so processes that still map the old file keep reading it intact
+        tmp_path = os.path.join(directory, f'.{name}.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, os.path.join(directory, name))
+
+    tmp_path = os.path.join(directory, f'.{INDEX_FILE}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(directory, INDEX_FILE))
+    return values.shape
+
+
+def _axis_index(positions):
+    """
+    Index for a list of axis positions: a slice when they are evenly spaced and increasing
+    (basic indexing, so the result is a view), otherwise the positions themselves (a copy)
+    """
+    positions = np.asarray(positions, dtype=int)
+    if len(positions) == 1:
+        return slice(positions[0], positions[0] + 1)
+    if len(positions) > 1 and positions[1] > positions[0] and np.all(np.diff(positions) == positions[1] - positions[0]):
+        return slice(positions[0], positions[-1] + 1, positions[1] - positions[0])
+    return positions
+
+
+class BinaryCube:
+    """
+    values[location, year, indicator], a read-only float32 memory map
+    `codes`, `years` and `iso3`/`names`/`types` label the first two axes, `indicators` the third
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            index = json.load(f)
+        self.directory = directory
+        self.values = np.load(os.path.join(directory, VALUES_FILE), mmap_mode='r')
+        self.codes = np.load(os.path.join(directory, CODES_FILE), mmap_mode='r')
+        self.years = np.load(os.path.join(directory, YEARS_FILE), mmap_mode='r')
+        self.names = index['locations']['name']
+        self.types = index['locations']['type']
+        self.iso3 = index['locations']['iso3']
+        self.indicators = index['indicators']
+
+        self._by_iso3 = {code.upper(): i for i, code in enumerate(self.iso3) if code}
+        self._by_code = {int(code): i for i, code in enumerate(self.codes)}
+        self._by_key = {indicator['key']: i for i, indicator in enumerate(self.indicators)}
+
+    def location(self, iso3=None, code=None):
+        """Position of a location on the first axis, by ISO3 code or UN location code"""
+        try:
+            return self._by_iso3[iso3.upper()] if iso3 is not None else self._by_code[int(code)]
+        except KeyError:
+            raise KeyError(f"unknown location {iso3 if iso3 is not None else code!r}") from None
+
+    def indicator(self, key):
+        """Position of an indicator on the third axis"""
+        try:
+            return self._by_key[key]
+        except KeyError:
+            raise KeyError(f"unknown indicator {key!r} (choose from {', '.join(self._by_key)})") from None
+
+    def year_range(self, first=None, last=None):
+        """Slice of the year axis covering first..last (inclusive, either end open)"""
+        start = 0 if first is None else int(np.searchsorted(self.years, first, side='left'))
+        stop = len(self.years) if last is None else int(np.searchsorted(self.years, last, side='right'))
+        return slice(start, stop)
+
+    def slice(self, iso3=None, codes=None, years=None, indicators=None):
+        """
+        Sub-cube of the selected locations, years and indicators (every one where not given)
+        iso3/codes and indicators take one value (that axis is dropped, as with a NumPy scalar index)
+        or a list; years takes one year, a (first, last) range (either end may be None) or a list
+        Single values, ranges and evenly spaced lists are basic indexing and return views of the
+        memory map; other lists fall back to a copy
+        """
+        index = []
+        if iso3 is not None or codes is not None:
+            selected, lookup = (iso3, 'iso3') if iso3 is not None else (codes, 'code')
+            if isinstance(selected, (str, int, np.integer)):
+                index.append(self.location(**{lookup: selected}))
+            else:
+                index.append(_axis_index([self.location(**{lookup: value}) for value in selected]))
+        else:
+            index.append(slice(None))
+
+        if years is None:
+            index.append(slice(None))
+        elif isinstance(years, tuple):
+            index.append(self.year_range(*years))
+        elif isinstance(years, (int, float, np.integer, np.floating)):
+            found = self.year_range(years, years)
+            if found.start == found.stop:
+                raise KeyError(f"unknown year {years}")
+            index.append(found.start)
+        else:
+            positions = np.searchsorted(self.years, years)
+            if np.any(positions >= len(self.years)) or np.any(self.years[np.minimum(positions, len(self.years) - 1)] != years):
+                raise KeyError(f"unknown year(s) in {list(years)}")
+            index.append(_axis_index(positions))
+
+        if indicators is None:
+            index.append(slice(None))
+        elif isinstance(indicators, str):
+            index.append(self.indicator(indicators))
+        else:
+            index.append(_axis_index([self.indicator(key) for key in indicators]))
+
+        # Basic indexing first (a view); lists that are not evenly spaced are then taken one axis at a time,
+        # since advanced indices on two axes would pair up instead of crossing
+        result = self.values[tuple(slice(None) if isinstance(i, np.ndarray) else i for i in index)]
+        for axis, positions in enumerate(index):
+            if isinstance(positions, np.ndarray):
+                dropped = sum(isinstance(i, (int, np.integer)) for i in index[:axis])
+                result = np.take(result, positions, axis=axis - dropped)
+        return result
+
+
+def open_cube(path):
+    """Map the cube written to `path` by the pipeline (data/cube); no values are read until sliced"""
+    if not os.path.exists(os.path.join(path, INDEX_FILE)):
+        raise FileNotFoundError(f"no indicator cube in {path} (run scripts/prepare_dataviz.py)")
+    return BinaryCube(path)
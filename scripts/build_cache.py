@@ -0,0 +1,183 @@
+"""
+Incremental Build Cache
+Content-addressed fingerprints for the prepare_* stages, recorded in a manifest next to the outputs
+A stage is skipped when its source, the build code it shares, the columns and input files it reads
+and its output files are all unchanged
+"""
+
+import hashlib
+import inspect
+import json
+import os
+
+import pandas as pd
+
+MANIFEST_NAME = 'build_manifest.json'
+
+
+# (path, size, mtime) -> digest, so the input CSV is only hashed once per run
+_file_hashes = {}
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """SHA-256 of a file, read in chunks"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _file_hashes:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        _file_hashes[key] = digest.hexdigest()
+    return _file_hashes[key]
+
+
+def text_sha256(*parts):
+    """SHA-256 over a sequence of strings"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def source_sha256(*objects):
+    """SHA-256 of the source code of functions/modules"""
+    return text_sha256(*(inspect.getsource(obj) for obj in objects))
+
+
+def column_sha256(series):
+    """SHA-256 of a column's cleaned values"""
+    return hashlib.sha256(pd.util.hash_pandas_object(series, index=False).values.tobytes()).hexdigest()
+
+
+class BuildCache:
+    """
+    Manifest-backed cache of stage fingerprints
+    Manifest layout:
+      input   - path, size and key (CSV hash + loader source hash) of the cleaned frame
+      columns - hash of every cleaned column a stage has declared it reads
+      stages  - per stage: fingerprint, timing and the hash/size of each output file
+    """
+
+    def __init__(self, output_dir='data', enabled=True, options=None, shared_sources=()):
+        """
+        `shared_sources` are the modules (or functions) every stage's output depends on; their whole
+        source enters every fingerprint, so a change to a helper or constant a stage calls rebuilds it
+        """
+        self.output_dir = output_dir
+        self.options = options or {}
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.enabled = enabled
+        self.shared_hash = source_sha256(*shared_sources) if shared_sources else ''
+        self.manifest = {'input': {}, 'columns': {}, 'stages': {}}
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    self.manifest = json.load(f)
+            except (OSError, ValueError):
+                print(f"⚠ Ignoring unreadable build manifest {self.path}")
+
+    def set_input(self, csv_path, *loaders, selection=''):
+        """
+        Register the input CSV, its loader code and the row selection applied after loading;
+        returns True if any of them changed since the last build
+        Column hashes from a previous build are only reused while the input key is unchanged
+        """
+        key = text_sha256(file_sha256(csv_path), source_sha256(*loaders), selection)
+        changed = self.manifest.get('input', {}).get('key') != key
+        if changed:
+            self.manifest['columns'] = {}
+        self.manifest['input'] = {
+            'path': csv_path,
+            'size': os.path.getsize(csv_path),
+            'selection': selection,
+            'key': key
+        }
+        return changed
+
+    def hash_columns(self, df, columns):
+        """Hash the given cleaned columns (missing columns hash to a fixed marker)"""
+        for col in sorted(columns):
+            if col not in self.manifest['columns']:
+                self.manifest['columns'][col] = column_sha256(df[col]) if col in df.columns else 'missing'
+
+    def fingerprint(self, stage):
+        """Fingerprint of a stage, or None if one of its columns has not been hashed yet"""
+        column_hashes = []
+        for col in stage['columns']:
+            if col not in self.manifest['columns']:
+                return None
+            column_hashes.append(f"{col}={self.manifest['columns'][col]}")
+        # Build options the stage takes as arguments change its output too
+        option_values = [f"{arg}={self.options[arg]!r}" for arg in stage['args'] if arg in self.options]
+        # ... and so does the content of input files named by an option ('files')
+        file_hashes = [f"{arg}={file_sha256(self.options[arg]) if os.path.exists(self.options[arg]) else 'missing'}"
+                       for arg in stage.get('files', ())]
+        # Stages that read other stages' artifacts depend on those artifacts' hashes
+        upstream_hashes = []
+        for dep in stage.get('after', ()):
+            entry = self.manifest['stages'].get(dep)
+            if entry is None:
+                return None
+            upstream_hashes.extend(f"{name}={output['sha256']}" for name, output in entry['outputs'].items())
+        return text_sha256(
+            source_sha256(stage['func']),
+            self.shared_hash,
+            *stage['outputs'],
+            *column_hashes,
+            *option_values,
+            *file_hashes,
+            *upstream_hashes
+        )
+
+    def is_fresh(self, stage):
+        """True if the stage's fingerprint and every output file match the manifest"""
+        if not self.enabled:
+            return False
+        entry = self.manifest['stages'].get(stage['name'])
+        fingerprint = self.fingerprint(stage)
+        if entry is None or fingerprint is None or entry.get('fingerprint') != fingerprint:
+            return False
+
+        for output in stage['outputs']:
+            path = os.path.join(self.output_dir, output)
+            recorded = entry.get('outputs', {}).get(output)
+            if recorded is None or not os.path.exists(path):
+                return False
+            if os.path.getsize(path) != recorded['size'] or file_sha256(path) != recorded['sha256']:
+                return False
+        return True
+
+    def stale_stages(self, stages):
+        """Stages that must run: not fresh, or downstream ('after') of a stage that must run"""
+        stale = {stage['name'] for stage in stages if not self.is_fresh(stage)}
+        changed = True
+        while changed:
+            changed = False
+            for stage in stages:
+                if stage['name'] not in stale and stale.intersection(stage.get('after', ())):
+                    stale.add(stage['name'])
+                    changed = True
+        return [stage for stage in stages if stage['name'] in stale]
+
+    def record(self, stage, seconds):
+        """Store the fingerprint, timing and output hashes of a stage that just ran"""
+        outputs = {}
+        for output in stage['outputs']:
+            path = os.path.join(self.output_dir, output)
+            outputs[output] = {
+                'sha256': file_sha256(path),
+                'size': os.path.getsize(path)
+            }
+        self.manifest['stages'][stage['name']] = {
+            'fingerprint': self.fingerprint(stage),
+            'seconds': round(seconds, 3),
+            'outputs': outputs
+        }
+
+    def save(self):
+        """Write the manifest next to the outputs"""
+        with open(self.path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
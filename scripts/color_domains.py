@@ -0,0 +1,141 @@
+"""
+Color Domains
+Color-scale inputs of the globe's choropleth modes, for every year at once: extents, quantile and
+Jenks natural-breaks classes, and histograms over a year x country matrix (NaN where missing)
+"""
+
+import numpy as np
+
+# Classes of the quantile and Jenks breaks, and histogram bins
+CLASSES = 5
+BINS = 20
+
+# Scale types: 'log' (positive values, log-spaced), 'diverging' (non-zero values, symmetric around 0), 'linear'
+SCALES = ('linear', 'log', 'diverging')
+
+
+def colored(values, scale):
+    """Mask of the values the globe colors: non-zero for diverging scales, positive otherwise"""
+    with np.errstate(invalid='ignore'):
+        if scale == 'diverging':
+            return (values != 0) & ~np.isnan(values)
+        return values > 0
+
+
+def quantile_breaks(ordered, count, classes=CLASSES):
+    """
+    (rows, classes + 1) class edges at equal-count quantiles of every row (linear interpolation
+    like np.nanquantile); `ordered` rows are sorted with their `count` values first
+    """
+    last = np.maximum(count - 1, 0)[:, None]
+    position = np.linspace(0, 1, classes + 1) * last
+    below = np.floor(position).astype(int)
+    above = np.minimum(below + 1, last)
+    low = np.take_along_axis(ordered, below, axis=1)
+    high = np.take_along_axis(ordered, above, axis=1)
+    return np.where(count[:, None] > 0, low + (high - low) * (position - below), np.nan)
+
+
+def jenks_breaks(ordered, count, classes=CLASSES):
+    """
+    (rows, classes + 1) Jenks natural breaks of every row: [min, upper bound of class 1, ..., max],
+    the split into `classes` runs of the sorted values with the least within-class sum of squares
+    (Fisher's exact dynamic program, one step per class and end position for all rows together)
+    NaN for rows with fewer than `classes` values
+    """
+    rows, n = ordered.shape
+    if n == 0:
+        return np.full((rows, classes + 1), np.nan)
+    x = np.nan_to_num(ordered)
+    # Prefix sums: the squared deviation of ordered[start..end] is O(1); the padded tail of a row is never read
+    s1 = np.concatenate([np.zeros((rows, 1)), np.cumsum(x, axis=1)], axis=1)
+    s2 = np.concatenate([np.zeros((rows, 1)), np.cumsum(x * x, axis=1)], axis=1)
+
+    def deviation(start, end):
+        size = end + 1 - start
+        total = s1[:, end + 1, None] - s1[:, start]
+        return s2[:, end + 1, None] - s2[:, start] - total * total / size
+
+    # cost[c, :, i]: least squares of ordered[0..i] in c + 1 classes; first[c, :, i]: where its last class starts
+    cost = np.full((classes, rows, n), np.inf)
+    first = np.zeros((classes, rows, n), dtype=int)
+    cost[0] = s2[:, 1:] - s1[:, 1:] ** 2 / np.arange(1, n + 1)
+    for c in range(1, classes):
+        for end in range(c, n):
+            starts = np.arange(c, end + 1)
+            candidates = cost[c - 1][:, starts - 1] + deviation(starts, end)
+            best = np.argmin(candidates, axis=1)
+            cost[c, :, end] = candidates[np.arange(rows), best]
+            first[c, :, end] = starts[best]
+
+    # Walk back from each row's last value
+    index = np.arange(rows)
+    end = np.maximum(count - 1, 0)
+    edges = np.empty((rows, classes + 1))
+    edges[:, classes] = ordered[index, end]
+    for c in range(classes - 1, 0, -1):
+        start = first[c, index, end]
+        end = np.maximum(start - 1, 0)
+        edges[:, c] = ordered[index, end]
+    edges[:, 0] = ordered[:, 0]
+    edges[count < classes] = np.nan
+    return edges
+
+
+def histogram_edges(low, high, scale, bins=BINS):
+    """Shared bin edges over [low, high]: log-spaced for log scales, symmetric around 0 for diverging ones"""
+    if not (np.isfinite(low) and np.isfinite(high)):
+        return np.full(bins + 1, np.nan)
+    if scale == 'diverging':
+        bound = max(abs(low), abs(high))
+        return np.linspace(-bound, bound, bins + 1)
+    if scale == 'log':
+        return np.geomspace(low, high, bins + 1) if high > low else np.full(bins + 1, low)
+    return np.linspace(low, high, bins + 1)
+
+
+def color_statistics(values, scale='linear', classes=CLASSES, bins=BINS):
+    """
+    Color-scale statistics of one mode: `values` is (years, countries), NaN where a country has
+    no record; only the values the globe colors count (see `colored`)
+    Returns {'extent': [min, max] over all years, 'min'/'max'/'count': (years,),
+    'quantiles'/'jenks': (years, classes + 1), 'edges': (bins + 1,), 'histogram': (years, bins)}
+    Jenks breaks are found on log values for log scales; histogram bins are shared by all years
+    """
+    values = np.asarray(values, dtype=float)
+    mask = colored(values, scale)
+    count = mask.sum(1)
+    # Masked-out values sort to the end of each row as NaN
+    ordered = np.sort(np.where(mask, values, np.nan), axis=1)
+    index = np.arange(len(values))
+
+    has = count > 0
+    low = np.where(has, ordered[:, 0], np.nan)
+    high = np.where(has, ordered[index, np.maximum(count - 1, 0)], np.nan)
+    extent = [np.nanmin(low), np.nanmax(high)] if has.any() else [np.nan, np.nan]
+
+    if scale == 'log':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            jenks = 10 ** jenks_breaks(np.log10(ordered), count, classes)
+        # Exact ends, rather than the round trip through log10
+        jenks[:, 0], jenks[:, -1] = np.where(count >= classes, low, np.nan), np.where(count >= classes, high, np.nan)
+    else:
+        jenks = jenks_breaks(ordered, count, classes)
+
+    edges = histogram_edges(extent[0], extent[1], scale, bins)
+    histogram = np.zeros((len(values), bins), dtype=int)
+    if np.isfinite(edges).all():
+        # Bins are closed on the left, and the last one on the right too
+        position = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, bins - 1)
+        np.add.at(histogram, (np.broadcast_to(index[:, None], values.shape)[mask], position[mask]), 1)
+
+    return {
+        'extent': extent,
+        'min': low,
+        'max': high,
+        'count': count,
+        'quantiles': quantile_breaks(ordered, count, classes),
+        'jenks': jenks,
+        'edges': edges,
+        'histogram': histogram
+    }
@@ -0,0 +1,79 @@
+"""
+Kernel Density Estimates
+Gaussian KDEs of many samples at once (e.g. every year x indicator), each row on its own grid,
+optionally weighted, evaluated by broadcasting in bounded chunks
+"""
+
+import math
+
+import numpy as np
+
+# Bandwidth rules: kernel standard deviation = factor x the sample's (weighted) standard deviation,
+# with the factor from the effective sample size n (as scipy.stats.gaussian_kde); a number is used as the factor
+BANDWIDTH_RULES = {
+    'scott': lambda n: n ** -0.2,
+    'silverman': lambda n: (n * 3 / 4) ** -0.2
+}
+
+# Points of each density grid, and the most (row, grid point, sample) cells evaluated at once
+GRID_POINTS = 128
+CHUNK_CELLS = 2_000_000
+
+
+def _weights(values, weights):
+    """Weights broadcast to `values`, zero where a value is missing or the weight is missing/negative"""
+    weights = np.broadcast_to(1.0 if weights is None else weights, values.shape)
+    return np.where(np.isnan(values) | ~(weights > 0), 0.0, weights)
+
+
+def effective_size(weights):
+    """Kish effective sample size of every row: (sum w)^2 / sum w^2 (the count when unweighted)"""
+    squares = (weights * weights).sum(-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(squares > 0, weights.sum(-1) ** 2 / squares, 0.0)
+
+
+def bandwidths(values, weights=None, rule='scott'):
+    """
+    Kernel bandwidth of every row of `values` (rows, samples), NaN marking missing samples
+    `rule` is a BANDWIDTH_RULES name or a number (the factor itself); NaN for rows with no spread
+    """
+    values = np.asarray(values, dtype=float)
+    weights = _weights(values, weights)
+    total = weights.sum(-1)
+    x = np.nan_to_num(values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (weights * x).sum(-1) / total
+        n = effective_size(weights)
+        # Unbiased weighted variance (reduces to the sample variance with ddof=1 when unweighted)
+        sd = np.sqrt((weights * (x - mean[..., None]) ** 2).sum(-1) / (total * (1 - 1 / n)))
+        factor = BANDWIDTH_RULES[rule](n) if isinstance(rule, str) else np.full(n.shape, float(rule))
+    return np.where((total > 0) & (sd > 0), factor * sd, np.nan)
+
+
+def gaussian_kde(values, grid, bandwidth, weights=None, chunk_cells=CHUNK_CELLS):
+    """
+    Densities (rows, grid points) of every row of `values` (rows, samples) on its row of `grid`
+    (rows, grid points), with one bandwidth per row; missing samples (NaN) and non-positive weights
+    are left out, and each row integrates to 1. NaN for rows without samples or bandwidth
+    """
+    values = np.asarray(values, dtype=float)
+    grid = np.asarray(grid, dtype=float)
+    bandwidth = np.asarray(bandwidth, dtype=float)
+    weights = _weights(values, weights)
+    total = weights.sum(-1)
+    x = np.nan_to_num(values)
+    h = np.where(np.isfinite(bandwidth) & (bandwidth > 0), bandwidth, 1.0)
+
+    rows, points = grid.shape
+    sums = np.empty((rows, points))
+    chunk = max(1, chunk_cells // max(1, points * values.shape[1]))
+    for start in range(0, rows, chunk):
+        part = slice(start, start + chunk)
+        z = (grid[part, :, None] - x[part, None, :]) / h[part, None, None]
+        sums[part] = np.einsum('rgs,rs->rg', np.exp(-0.5 * z * z), weights[part])
+
+    valid = (total > 0) & np.isfinite(bandwidth) & (bandwidth > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        density = sums / (total * h * math.sqrt(2 * math.pi))[:, None]
+    return np.where(valid[:, None], density, np.nan)
@@ -0,0 +1,59 @@
+"""
+Frame Store
+Column-per-file binary layout for the cleaned frame (.npy columns + a small JSON index)
+Used for the parsed-CSV snapshot and to share the frame with worker processes
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+FRAME_META = 'frame.json'
+
+
+def write_frame(df, directory, columns=None):
+    """
+    Write the frame (or only `columns`) to `directory`
+    Numeric columns are stored as .npy files so readers can memory-map them (zero-copy,
+    shared through the page cache). Other columns are dictionary-encoded: integer codes are
+    stored as .npy and the small table of unique values goes into the JSON index.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    meta = {'length': len(df), 'columns': []}
+    for i, col in enumerate(c for c in df.columns if columns is None or c in columns):
+        values = df[col]
+        entry = {'name': col, 'file': f'{i}.npy'}
+        if values.dtype.kind in 'biuf':
+            np.save(os.path.join(directory, entry['file']), values.to_numpy())
+        else:
+            codes, uniques = pd.factorize(values, use_na_sentinel=True)
+            np.save(os.path.join(directory, entry['file']), codes)
+            entry['dictionary'] = uniques.tolist()
+        meta['columns'].append(entry)
+
+    # The index is written last, so a directory without it is an incomplete write
+    with open(os.path.join(directory, FRAME_META), 'w') as f:
+        json.dump(meta, f)
+
+
+def read_frame(directory):
+    """Rebuild a frame written by write_frame(); numeric columns stay memory-mapped"""
+    with open(os.path.join(directory, FRAME_META)) as f:
+        meta = json.load(f)
+
+    data = {}
+    for entry in meta['columns']:
+        values = np.load(os.path.join(directory, entry['file']), mmap_mode='r')
+        if 'dictionary' in entry:
+            dictionary = np.array(entry['dictionary'] + [np.nan], dtype=object)
+            values = dictionary[values]  # -1 (missing) picks the trailing NaN
+        data[entry['name']] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def has_frame(directory):
+    """True if `directory` holds a complete frame"""
+    return os.path.exists(os.path.join(directory, FRAME_META))
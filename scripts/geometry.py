@@ -0,0 +1,284 @@
+"""
+Globe Geometry
+Turns the country GeoJSON into a TopoJSON-style topology: coordinates quantized to an integer grid,
+shared borders stored once as delta-encoded arcs, and several Douglas-Peucker detail levels of the arcs
+Also computes per-feature centroids, bounding boxes, label anchors and bounding radii
+"""
+
+import math
+
+import numpy as np
+
+# Detail levels: name -> Douglas-Peucker tolerance in degrees (0 keeps every quantized vertex)
+LEVELS = {'full': 0.0, 'high': 0.1, 'medium': 0.3, 'low': 0.8}
+
+# Grid size of the quantized coordinates on each axis (1e5 is about 400 m of longitude at the equator)
+QUANTIZATION = 100_000
+
+
+def _polygons(geometry):
+    """Polygons (lists of rings) of a Polygon or MultiPolygon geometry"""
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    raise ValueError(f"unsupported geometry type {geometry['type']!r}")
+
+
+def _ring_area(ring):
+    """(signed area, centroid x, centroid y) of a closed ring, planar in degrees"""
+    x, y = ring[:-1, 0], ring[:-1, 1]
+    x1, y1 = np.roll(x, -1), np.roll(y, -1)
+    cross = x * y1 - x1 * y
+    area = cross.sum() / 2
+    if area == 0:
+        return 0.0, x.mean(), y.mean()
+    return area, ((x + x1) * cross).sum() / (6 * area), ((y + y1) * cross).sum() / (6 * area)
+
+
+def _polygon_area(polygon):
+    """(area, centroid x, centroid y) of a polygon: its exterior ring minus its holes"""
+    parts = [_ring_area(np.asarray(ring, dtype=float)) for ring in polygon]
+    weights = [abs(parts[0][0])] + [-abs(area) for area, _, _ in parts[1:]]
+    area = sum(weights)
+    if area <= 0:
+        return 0.0, parts[0][1], parts[0][2]
+    return (area, sum(w * cx for w, (_, cx, _) in zip(weights, parts)) / area,
+            sum(w * cy for w, (_, _, cy) in zip(weights, parts)) / area)
+
+
+def _inside(x, y, polygon):
+    """Even-odd point in polygon test (holes included)"""
+    inside = False
+    for ring in polygon:
+        ring = np.asarray(ring, dtype=float)
+        x0, y0, x1, y1 = ring[:-1, 0], ring[:-1, 1], ring[1:, 0], ring[1:, 1]
+        crosses = (y0 > y) != (y1 > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            at = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+        inside ^= bool(np.count_nonzero(crosses & (x < at)) % 2)
+    return inside
+
+
+def _label_anchor(polygon, cx, cy):
+    """
+    A point inside the polygon to place a label: its centroid when that lies inside, otherwise
+    the middle of the widest interior stretch of the horizontal line through the centroid
+    """
+    if _inside(cx, cy, polygon):
+        return cx, cy
+    crossings = []
+    for ring in polygon:
+        ring = np.asarray(ring, dtype=float)
+        x0, y0, x1, y1 = ring[:-1, 0], ring[:-1, 1], ring[1:, 0], ring[1:, 1]
+        crosses = (y0 > cy) != (y1 > cy)
+        crossings.extend(x0[crosses] + (cy - y0[crosses]) * (x1[crosses] - x0[crosses]) / (y1[crosses] - y0[crosses]))
+    crossings = np.sort(crossings)
+    if len(crossings) < 2:
+        return cx, cy
+    widths = crossings[1::2] - crossings[:-1:2]
+    widest = int(np.argmax(widths))
+    return (crossings[2 * widest] + crossings[2 * widest + 1]) / 2, cy
+
+
+def feature_metrics(geometry):
+    """
+    Centroid (area-weighted over all parts), bbox [west, south, east, north], label anchor (inside
+    the largest part) and bounding radius (largest angular distance from the centroid to a vertex,
+    in degrees) of a geometry, all in planar longitude/latitude
+    """
+    polygons = _polygons(geometry)
+    parts = [_polygon_area(polygon) for polygon in polygons]
+    total = sum(area for area, _, _ in parts)
+    if total > 0:
+        cx = sum(area * x for area, x, _ in parts) / total
+        cy = sum(area * y for area, _, y in parts) / total
+    else:
+        cx, cy = parts[0][1], parts[0][2]
+
+    largest = max(range(len(parts)), key=lambda i: parts[i][0])
+    label = _label_anchor(polygons[largest], parts[largest][1], parts[largest][2])
+
+    points = np.radians(np.concatenate([np.asarray(ring, dtype=float) for polygon in polygons for ring in polygon]))
+    lon, lat = math.radians(cx), math.radians(cy)
+    cos_distance = (np.sin(lat) * np.sin(points[:, 1])
+                    + np.cos(lat) * np.cos(points[:, 1]) * np.cos(points[:, 0] - lon))
+    radius = math.degrees(float(np.arccos(np.clip(cos_distance, -1, 1)).max()))
+
+    points = np.degrees(points)
+    bbox = [points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max()]
+    return {'centroid': [cx, cy], 'bbox': bbox, 'label': list(label), 'radius': radius}
+
+
+def _junctions(rings):
+    """
+    Points where rings meet or part ways: a point is a junction when it is visited with
+    different neighbours (in either direction) than on its first visit
+    """
+    neighbours, junctions = {}, set()
+    for ring in rings:
+        n = len(ring) - 1
+        for i in range(n):
+            point, pair = ring[i], (ring[i - 1], ring[i + 1])
+            seen = neighbours.setdefault(point, pair)
+            if seen != pair and seen != pair[::-1]:
+                junctions.add(point)
+    return junctions
+
+
+def _canonical_ring(points):
+    """A closed ring without junctions, rotated to start at its smallest point"""
+    start = points.index(min(points[:-1]))
+    return points[start:-1] + points[:start] + [points[start]]
+
+
+def _unit_vectors(points):
+    """(n, 3) unit vectors of longitude/latitude points in degrees"""
+    lon, lat = np.radians(points[:, 0]), np.radians(points[:, 1])
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def _importance(arc, scale, translate):
+    """
+    Douglas-Peucker importance of every vertex of an arc: the largest tolerance (in degrees)
+    at which the vertex is still kept. Endpoints are always kept (np.inf)
+    Distances are angles to the great circle through the segment ends, since that is the edge
+    the globe draws (a planar test would drop vertices along parallels such as straight borders)
+    """
+    points = _unit_vectors(arc * scale + translate)
+    importance = np.zeros(len(points))
+    importance[[0, -1]] = np.inf
+
+    stack = [(0, len(points) - 1, np.inf)]
+    while stack:
+        start, end, limit = stack.pop()
+        if end - start < 2:
+            continue
+        inner = points[start + 1:end]
+        normal = np.cross(points[start], points[end])
+        length = np.linalg.norm(normal)
+        if length < 1e-12:
+            distance = np.arccos(np.clip(inner @ points[start], -1, 1))
+        else:
+            distance = np.arcsin(np.clip(np.abs(inner @ normal) / length, 0, 1))
+        split = start + 1 + int(np.argmax(distance))
+        # Kept only while every split above it is kept
+        importance[split] = min(np.degrees(distance.max()), limit)
+        stack.append((start, split, importance[split]))
+        stack.append((split, end, importance[split]))
+    return importance
+
+
+def _keep_rings(rings, importances):
+    """
+    Mark the most important vertices of each ring's arcs as always kept until the ring has
+    three distinct kept vertices, so no ring collapses at any level (shared arcs stay shared)
+    """
+    for ring in rings:
+        arcs = [importances[i if i >= 0 else ~i] for i in ring]
+        # Each arc's last vertex is the next arc's first
+        kept = sum(int(np.isinf(importance).sum()) - 1 for importance in arcs)
+        while kept < 3:
+            best = max(arcs, key=lambda importance: np.max(np.where(np.isinf(importance), -1, importance)))
+            candidates = np.where(np.isinf(best), -1, best)
+            if candidates.max() < 0:
+                break
+            best[int(np.argmax(candidates))] = np.inf
+            kept += 1
+
+
+def build_topologies(features, levels=LEVELS, quantization=QUANTIZATION):
+    """
+    TopoJSON topologies of GeoJSON polygon features, one per detail level: {level name: topology}
+    Every level has the same arcs (in the same order) with fewer vertices, and the same 'countries'
+    object; arcs are delta-encoded on the shared quantization grid ('transform'), and the features
+    keep their id and properties, plus centroid, bbox, label and radius
+    """
+    coordinates = np.concatenate([np.asarray(ring, dtype=float) for feature in features
+                                  for polygon in _polygons(feature['geometry']) for ring in polygon])
+    x0, y0 = coordinates.min(0)
+    x1, y1 = coordinates.max(0)
+    scale = np.array([(x1 - x0) / (quantization - 1) or 1, (y1 - y0) / (quantization - 1) or 1])
+    translate = np.array([x0, y0])
+
+    def quantize(ring):
+        grid = np.round((np.asarray(ring, dtype=float) - translate) / scale).astype(int)
+        keep = np.ones(len(grid), dtype=bool)
+        keep[1:] = (grid[1:] != grid[:-1]).any(1)
+        points = [tuple(point) for point in grid[keep].tolist()]
+        if points[0] != points[-1]:
+            points.append(points[0])
+        return points
+
+    # Quantized rings (closed, consecutive duplicates removed); rings that collapse to a point or line are dropped
+    shapes = []
+    for feature in features:
+        polygons = []
+        for polygon in _polygons(feature['geometry']):
+            rings = [quantize(ring) for ring in polygon]
+            if len(rings[0]) >= 4:
+                polygons.append([ring for ring in rings if len(ring) >= 4])
+        shapes.append(polygons)
+
+    junctions = _junctions([ring for polygons in shapes for rings in polygons for ring in rings])
+
+    # Cut every ring at its junctions and store each distinct arc once (~index when used reversed)
+    arcs, index = [], {}
+
+    def arc_index(points):
+        key = tuple(points)
+        if key in index:
+            return index[key]
+        reverse = tuple(points[::-1])
+        if points[0] == points[-1] and not junctions.intersection(points):
+            reverse = tuple(_canonical_ring(list(reverse)))
+        if reverse in index:
+            return ~index[reverse]
+        index[key] = len(arcs)
+        arcs.append(points)
+        return index[key]
+
+    def cut(ring):
+        cuts = [i for i, point in enumerate(ring[:-1]) if point in junctions]
+        if not cuts:
+            return [arc_index(_canonical_ring(ring))]
+        ring = ring[cuts[0]:-1] + ring[:cuts[0] + 1]
+        cuts = [i - cuts[0] for i in cuts] + [len(ring) - 1]
+        return [arc_index(ring[start:end + 1]) for start, end in zip(cuts, cuts[1:])]
+
+    geometries, ring_arcs = [], []
+    for feature, polygons in zip(features, shapes):
+        topology_arcs = [[cut(ring) for ring in rings] for rings in polygons]
+        ring_arcs.extend(ring for rings in topology_arcs for ring in rings)
+        properties = dict(feature.get('properties') or {})
+        properties.update(feature_metrics(feature['geometry']))
+        geometry = {'type': 'Polygon' if len(topology_arcs) == 1 else 'MultiPolygon',
+                    'arcs': topology_arcs[0] if len(topology_arcs) == 1 else topology_arcs}
+        if 'id' in feature:
+            geometry['id'] = feature['id']
+        geometry['properties'] = properties
+        geometries.append(geometry)
+
+    # Every level is a threshold on the vertex importances, so shared arcs simplify identically for both sides
+    arrays = [np.array(arc) for arc in arcs]
+    importances = [_importance(arc, scale, translate) for arc in arrays]
+    _keep_rings(ring_arcs, importances)
+
+    def encode(arc, keep):
+        kept = arc[keep]
+        return np.concatenate([kept[:1], np.diff(kept, axis=0)]).tolist()
+
+    topologies = {}
+    for name, tolerance in levels.items():
+        keeps = [importance > tolerance if tolerance else np.ones(len(importance), dtype=bool)
+                 for importance in importances]
+        topologies[name] = {
+            'type': 'Topology',
+            'bbox': [x0, y0, x1, y1],
+            'transform': {'scale': scale.tolist(), 'translate': translate.tolist()},
+            'tolerance': tolerance,
+            'points': int(sum(keep.sum() for keep in keeps)),
+            'arcs': [encode(arc, keep) for arc, keep in zip(arrays, keeps)],
+            'objects': {'countries': {'type': 'GeometryCollection', 'geometries': geometries}}
+        }
+    return topologies
@@ -0,0 +1,95 @@
+"""
+Country Indicator Cube
+Dense country x year x indicator store, built once from the cleaned frame with units metadata
+The per-country JSON views (detail, time-series, birth/death, shards) are slices of it
+"""
+
+import numpy as np
+import pandas as pd
+
+from record_builder import group_offsets
+
+NAME_COL = 'Region, subregion, country or area *'
+ISO3_COL = 'ISO3 Alpha-code'
+
+
+def year_axis(values):
+    """
+    Sorted distinct years and the position of each value among them
+    Whole years come back as integers; sub-annual periods (fractional years such as 1950.0833)
+    keep their float labels, so each period gets its own position
+    """
+    years, codes = np.unique(np.asarray(values, dtype=float), return_inverse=True)
+    if np.array_equal(years, np.floor(years)):
+        years = years.astype(int)
+    return years, codes
+
+
+class IndicatorCube:
+    """
+    values[country, year, indicator] as float64, NaN where the source has no value
+    Countries keep their order of first appearance in the source frame; years are sorted (see year_axis)
+    `indicators` is a list of {'key', 'column', 'label', 'unit'} describing the third axis
+    """
+
+    def __init__(self, countries, iso3, years, indicators, values):
+        self.countries = countries
+        self.iso3 = iso3
+        self.years = years
+        self.indicators = indicators
+        self.values = values
+        self._axis = {indicator['key']: i for i, indicator in enumerate(indicators)}
+
+    @classmethod
+    def from_frame(cls, df, indicators):
+        """Scatter the rows of a countries-only frame into the dense cube in one pass"""
+        codes, countries = pd.factorize(df[NAME_COL], sort=False)
+        years, year_codes = year_axis(df['Year'])
+
+        values = np.full((len(countries), len(years), len(indicators)), np.nan)
+        values[codes, year_codes] = df[[indicator['column'] for indicator in indicators]].to_numpy(dtype=float)
+
+        # First ISO3 code seen for each country
+        iso3 = df[ISO3_COL].groupby(codes).first().reindex(range(len(countries))).fillna('')
+        return cls(countries.tolist(), iso3.tolist(), years, indicators, values)
+
+    def __getitem__(self, key):
+        """(country, year) matrix of one indicator"""
+        return self.values[:, :, self._axis[key]]
+
+    def select(self, mask):
+        """
+        Cells of a (country, year) boolean mask in country-major order
+        Returns (flat cell indices, [(country, start, stop)] offsets into them)
+        """
+        cells = np.flatnonzero(np.asarray(mask).ravel())
+        country_of_cell = cells // len(self.years)
+        offsets = [(self.countries[code], start, stop) for code, start, stop in group_offsets(country_of_cell)]
+        return cells, offsets
+
+    def take(self, key, cells):
+        """Values of one indicator at the selected cells"""
+        return self[key].ravel()[cells]
+
+    def years_of(self, cells):
+        return self.years[cells % len(self.years)]
+
+    def iso3_of(self, cells):
+        return np.asarray(self.iso3, dtype=object)[cells // len(self.years)]
+
+    def to_json(self):
+        """
+        Serializable layout: metadata plus one flat country-major array per indicator
+        (value of country c in year y at index c * len(years) + y, null where missing)
+        """
+        return {
+            'format': 'cube',
+            'version': 1,
+            'countries': {'name': self.countries, 'iso3': self.iso3},
+            'years': self.years.tolist(),
+            'indicators': [
+                {'key': indicator['key'], 'label': indicator['label'], 'unit': indicator['unit']}
+                for indicator in self.indicators
+            ],
+            'values': {indicator['key']: self[indicator['key']].ravel() for indicator in self.indicators}
+        }
@@ -0,0 +1,99 @@
+"""
+CSV Ingestion
+Parses the UN CSV directly (space-separated thousands, only the columns the pipeline uses)
+and keeps a binary snapshot of the cleaned frame keyed by the CSV hash
+"""
+
+import os
+import shutil
+import sys
+
+import pandas as pd
+
+from build_cache import file_sha256, source_sha256, text_sha256
+from frame_store import has_frame, read_frame, write_frame
+
+# Numeric columns - the UN file writes large numbers with spaces as thousands separators (" 2 471 424")
+NUMERIC_COLS = [
+    'Year',
+    'Total Population, as of 1 July (thousands)',
+    'Total Fertility Rate (live births per woman)',
+    'Life Expectancy at Birth, both sexes (years)',
+    'Male Life Expectancy at Birth (years)',
+    'Female Life Expectancy at Birth (years)',
+    'Crude Birth Rate (births per 1,000 population)',
+    'Crude Death Rate (deaths per 1,000 population)',
+    'Infant Mortality Rate (infant deaths per 1,000 live births)',
+    'Median Age, as of 1 July (years)',
+    'Population Growth Rate (percentage)',
+    'Population Density, as of 1 July (persons per square km)',
+    'Population Sex Ratio, as of 1 July (males per 100 females)',
+    'Net Migration Rate (per 1,000 population)',
+    'Rate of Natural Change (per 1,000 population)'
+]
+
+# Text columns are read as strings rather than letting the parser guess
+TEXT_COLS = [
+    'Region, subregion, country or area *',
+    'Type',
+    'ISO3 Alpha-code'
+]
+
+
+def read_un_csv(path, usecols=None):
+    """
+    Parse the UN CSV in one pass of the C parser
+    Thousands separators are handled by the parser itself; any numeric column that still
+    comes back as text (e.g. '...' placeholders) falls back to strip/replace + to_numeric
+    """
+    wanted = None if usecols is None else set(usecols)
+    df = pd.read_csv(
+        path,
+        usecols=None if wanted is None else (lambda col: col in wanted),
+        dtype={col: str for col in TEXT_COLS},
+        thousands=' ',
+        low_memory=False
+    )
+
+    for col in NUMERIC_COLS:
+        if col in df.columns and df[col].dtype == 'object':
+            df[col] = df[col].astype(str).str.strip().str.replace(' ', '', regex=False)
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def snapshot_key(csv_path, usecols=None):
+    """Snapshot name: CSV content hash + this module's source + the selected columns"""
+    return text_sha256(
+        file_sha256(csv_path),
+        source_sha256(sys.modules[__name__]),
+        *sorted(usecols or [])
+    )[:24]
+
+
+def load_cleaned(csv_path, usecols=None, snapshot_dir=None, refresh=False):
+    """
+    Cleaned frame for `csv_path`, read from the binary snapshot when one exists for this CSV
+    Returns (df, from_snapshot). Older snapshots in `snapshot_dir` are removed on write.
+    """
+    if snapshot_dir is None:
+        return read_un_csv(csv_path, usecols), False
+
+    key = snapshot_key(csv_path, usecols)
+    directory = os.path.join(snapshot_dir, key)
+    if not refresh and has_frame(directory):
+        return read_frame(directory), True
+
+    df = read_un_csv(csv_path, usecols)
+
+    # Write to a temporary directory and rename, so an interrupted run never leaves a partial snapshot
+    tmp_directory = directory + '.tmp'
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    write_frame(df, tmp_directory)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_directory, directory)
+
+    for name in os.listdir(snapshot_dir):
+        if name != key:
+            shutil.rmtree(os.path.join(snapshot_dir, name), ignore_errors=True)
+    return df, False
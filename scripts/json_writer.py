@@ -0,0 +1,180 @@
+"""
+Streaming JSON Writer
+Writes artifacts record by record from generators, with compact separators,
+the decimal precision each artifact declares per field and an atomic temp-file-then-rename
+"""
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+
+import numpy as np
+
+# Flat records are encoded with the C encoder after rounding
+_encoder = json.JSONEncoder(separators=(',', ':'))
+
+# Running totals of what write_json has written in this process (read by the --profile instrumentation)
+WRITE_STATS = {'files': 0, 'bytes': 0, 'records': 0}
+
+
+class JsonObject:
+    """
+    A JSON object streamed from an iterable of (key, value) pairs
+    Lets a stage emit e.g. {country: [records...]} without building the dict first
+    """
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+
+    def items(self):
+        return self.pairs
+
+
+def _round(value, decimals):
+    """Round a float to the field precision; NaN/inf become None (null)"""
+    value = float(value)
+    if not math.isfinite(value):
+        return None
+    if decimals is None:
+        return value
+    if decimals == 0:
+        return int(round(value))
+    return round(value, decimals)
+
+
+def _scalar(value, precision, field):
+    """Normalize a scalar (numpy types, NaN, precision) to a plain JSON-encodable value"""
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return _round(value, precision.get(field))
+    return value
+
+
+def _flat_record(record, precision):
+    """
+    Rounded copy of a record whose values are all scalars, or None if it holds containers
+    Plain Python floats/ints/strings (the common case) take the fast path
+    """
+    out = {}
+    for key, value in record.items():
+        kind = type(value)
+        if kind is float:
+            if value != value or value in (math.inf, -math.inf):
+                value = None
+            else:
+                decimals = precision.get(key)
+                if decimals == 0:
+                    value = int(round(value))
+                elif decimals is not None:
+                    value = round(value, decimals)
+        elif kind is str or kind is int or value is None:
+            pass
+        elif isinstance(value, (dict, list, tuple, np.ndarray, JsonObject)) or hasattr(value, '__next__'):
+            return None
+        else:
+            value = _scalar(value, precision, key)
+        out[key] = value
+    return out
+
+
+def _flat_array(items, decimals):
+    """
+    Rounded copy of a list of plain numbers (NaN/inf -> None), or None if it holds anything else
+    Lets numeric columns be encoded in one call instead of element by element
+    """
+    if not all(type(item) is float or type(item) is int for item in items):
+        return None
+    if decimals is None:
+        return [item if item - item == 0 else None for item in items]
+    if decimals == 0:
+        return [int(round(item)) if item - item == 0 else None for item in items]
+    return [round(item, decimals) if item - item == 0 else None for item in items]
+
+
+def _stream(value, write, precision, field=None):
+    """Write `value` as JSON through `write`, streaming containers and generators"""
+    # Flat records and numeric arrays are rounded in one pass and handed to the C encoder
+    if isinstance(value, dict):
+        flat = _flat_record(value, precision)
+        if flat is not None:
+            WRITE_STATS['records'] += 1
+            write(_encoder.encode(flat))
+            return
+    if isinstance(value, np.ndarray) and value.dtype.kind in 'fiu':
+        value = value.tolist()
+    if isinstance(value, list) and value:
+        flat = _flat_array(value, precision.get(field))
+        if flat is not None:
+            write(_encoder.encode(flat))
+            return
+
+    if isinstance(value, (dict, JsonObject)):
+        write('{')
+        for i, (key, item) in enumerate(value.items()):
+            if i:
+                write(',')
+            write(_encoder.encode(str(key)))
+            write(':')
+            _stream(item, write, precision, key)
+        write('}')
+    elif isinstance(value, np.ndarray):
+        _stream(value.tolist(), write, precision, field)
+    elif isinstance(value, (list, tuple)) or hasattr(value, '__next__'):
+        # Arrays inherit their field's precision (e.g. columnar value arrays)
+        write('[')
+        for i, item in enumerate(value):
+            if i:
+                write(',')
+            _stream(item, write, precision, field)
+        write(']')
+    else:
+        write(_encoder.encode(_scalar(value, precision, field)))
+
+
+def dumps(data, precision=None):
+    """`data` as a compact JSON string, encoded exactly as write_json would write it"""
+    chunks = []
+    _stream(data, chunks.append, precision or {})
+    return ''.join(chunks)
+
+
+def write_json(path, data, precision=None):
+    """
+    Stream `data` to `path` as compact JSON
+    dict/JsonObject -> object, list/tuple/generator -> array; `precision` maps this artifact's
+    field names to decimal places (0 writes an integer). Floats of other fields keep full precision,
+    so a field is only rounded where its artifact says so
+    The file is written to a temporary name and renamed into place, so readers never see
+    a partial artifact. Returns {'size', 'sha256'} of the written file.
+    """
+    precision = precision or {}
+    directory = os.path.dirname(path) or '.'
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', buffering=1 << 16) as f:
+            def write(chunk):
+                nonlocal size
+                encoded = chunk.encode('utf-8')
+                digest.update(encoded)
+                size += len(encoded)
+                f.write(chunk)
+
+            _stream(data, write, precision)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    WRITE_STATS['files'] += 1
+    WRITE_STATS['bytes'] += size
+    return {'size': size, 'sha256': digest.hexdigest()}
@@ -0,0 +1,30 @@
+"""
+Animation Keyframes
+Country x year x field matrices for the bubble animation, and the interpolated frames between
+consecutive years, computed for every country and year in one pass
+"""
+
+import numpy as np
+
+
+def keyframe_matrix(country_codes, year_codes, values, countries, years):
+    """
+    Scatter rows into a (countries, years, fields) matrix, NaN where a country has no row that year
+    `values` is (rows, fields); the codes are row positions on the first two axes
+    """
+    values = np.asarray(values, dtype=float)
+    matrix = np.full((countries, years, values.shape[1]), np.nan)
+    matrix[country_codes, year_codes] = values
+    return matrix
+
+
+def tween(matrix, steps):
+    """
+    (countries, years - 1, steps, fields) frames between each year and the next: frame k of year y
+    is k / (steps + 1) of the way from year y to year y + 1 (k = 1..steps), linear in every field
+    A value with no next-year value is held, so countries leaving the animation stay in place
+    """
+    current, following = matrix[:, :-1, None, :], matrix[:, 1:, None, :]
+    fraction = (np.arange(1, steps + 1) / (steps + 1))[None, None, :, None]
+    frames = current + (following - current) * fraction
+    return np.where(np.isnan(following), current, frames)
@@ -0,0 +1,126 @@
+"""
+Location Hierarchy Index
+Built once from the cleaned UN frame and shared by every prepare_* stage
+Maps Location code -> name, type, parent, subregion, region and ISO3 code
+"""
+
+import pandas as pd
+
+NAME_COL = 'Region, subregion, country or area *'
+ISO3_COL = 'ISO3 Alpha-code'
+
+# The UN hierarchy is at most a handful of levels deep (World > Region > Subregion > Country)
+MAX_DEPTH = 16
+
+
+class LocationHierarchy:
+    """
+    Keyed index over the unique locations of the dataset
+    All lookups are dictionary/index based - no scans over the yearly rows
+    """
+
+    def __init__(self, index):
+        # DataFrame indexed by Location code with columns:
+        # name, type, parent_code, iso3, subregion, region
+        self.index = index
+        self._code_by_name = pd.Series(index.index, index=index['name']).groupby(level=0).first()
+        self._children = index.reset_index().groupby('parent_code')['Location code'].apply(list).to_dict()
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build the index from the output of load_and_clean_data()"""
+        locations = df.drop_duplicates('Location code')
+        index = pd.DataFrame({
+            'name': locations[NAME_COL].values,
+            'type': locations['Type'].values,
+            'parent_code': pd.to_numeric(locations['Parent code'], errors='coerce').astype('Int64').values,
+            'iso3': locations[ISO3_COL].fillna('').values if ISO3_COL in locations else '',
+        }, index=pd.Index(locations['Location code'].astype(int).values, name='Location code'))
+
+        # Walk up the tree one level at a time with keyed joins on the unique locations,
+        # recording the nearest Subregion and Region ancestor of every location
+        index['subregion'] = None
+        index['region'] = None
+        ancestor = index['parent_code']
+        for _ in range(MAX_DEPTH):
+            if ancestor.isna().all():
+                break
+            ancestor_type = ancestor.map(index['type'])
+            ancestor_name = ancestor.map(index['name'])
+            for level, column in (('Subregion', 'subregion'), ('Region', 'region')):
+                found = (ancestor_type == level) & index[column].isna()
+                index.loc[found, column] = ancestor_name[found]
+            ancestor = ancestor.map(index['parent_code']).astype('Int64')
+
+        return cls(index)
+
+    def code_of(self, name):
+        """Location code for a location name (None if unknown)"""
+        code = self._code_by_name.get(name)
+        return None if code is None else int(code)
+
+    def parent_of(self, code):
+        """Parent Location code (None for the root)"""
+        if code not in self.index.index:
+            return None
+        parent = self.index.at[code, 'parent_code']
+        return None if pd.isna(parent) else int(parent)
+
+    def ancestors(self, code):
+        """Location codes from the direct parent up to the root"""
+        chain = []
+        parent = self.parent_of(code)
+        while parent is not None and parent not in chain:
+            chain.append(parent)
+            parent = self.parent_of(parent)
+        return chain
+
+    def children(self, code):
+        """Direct child Location codes"""
+        return list(self._children.get(code, []))
+
+    def descendants(self, code, location_type=None):
+        """All Location codes below `code`, optionally restricted to one Type"""
+        found = []
+        stack = self.children(code)
+        while stack:
+            child = stack.pop()
+            found.append(child)
+            stack.extend(self.children(child))
+        if location_type is not None:
+            found = [c for c in found if self.index.at[c, 'type'] == location_type]
+        return sorted(found)
+
+    def region_of(self, code):
+        """Region name for a Location code (None if it has no Region ancestor)"""
+        if code not in self.index.index:
+            return None
+        region = self.index.at[code, 'region']
+        return None if pd.isna(region) else region
+
+    def subregion_of(self, code):
+        """Subregion name for a Location code (None if attached directly to a Region)"""
+        if code not in self.index.index:
+            return None
+        subregion = self.index.at[code, 'subregion']
+        return None if pd.isna(subregion) else subregion
+
+    def region_of_country(self, name, default='Unknown'):
+        """Region name for a country name"""
+        code = self.code_of(name)
+        region = self.region_of(code) if code is not None else None
+        return default if region is None else region
+
+    def region_map(self, location_type='Country/Area'):
+        """Dictionary of location name -> region name for one location Type"""
+        subset = self.index[(self.index['type'] == location_type) & self.index['region'].notna()]
+        return dict(zip(subset['name'], subset['region']))
+
+    def iso3_map(self, location_type='Country/Area'):
+        """Dictionary of location name -> ISO3 code for one location Type"""
+        subset = self.index[self.index['type'] == location_type]
+        return dict(zip(subset['name'], subset['iso3']))
+
+    def region_column(self, df, default='Unknown'):
+        """Vectorized region lookup for every row of a frame (aligned to df.index)"""
+        return df['Location code'].map(self.index['region']).fillna(default)
@@ -0,0 +1,156 @@
+"""
+Precompressed Artifacts
+Writes .gz (and .br when the brotli package is installed) siblings for every JSON artifact,
+compressing files in parallel, plus a manifest of raw/compressed sizes and content hashes
+"""
+
+import gzip
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from build_cache import file_sha256
+from json_writer import write_json
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_NAME = 'compression_manifest.json'
+
+# Files in the output directory that are never served
+SKIP_FILES = {'build_manifest.json', MANIFEST_NAME}
+
+
+def _gzip(data):
+    # mtime=0 keeps the output byte-identical across builds
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+# Content-Encoding token -> (file suffix, compressor), in server preference order
+ENCODINGS = {'br': ('.br', _brotli), 'gzip': ('.gz', _gzip)}
+
+
+def available_encodings():
+    """Encodings that can be written in this environment"""
+    return [name for name in ENCODINGS if name != 'br' or brotli is not None]
+
+
+def etag(sha256, encoding=None):
+    """Strong ETag for an artifact (each encoded variant gets its own tag)"""
+    return f'"{sha256[:32]}-{encoding}"' if encoding else f'"{sha256[:32]}"'
+
+
+def _write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def list_artifacts(output_dir):
+    """Every JSON artifact under `output_dir` (relative paths, skipping dot-directories)"""
+    artifacts = []
+    for root, dirs, files in os.walk(output_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(files):
+            path = os.path.relpath(os.path.join(root, name), output_dir).replace(os.sep, '/')
+            if name.endswith('.json') and path not in SKIP_FILES:
+                artifacts.append(path)
+    return artifacts
+
+
+def load_manifest(output_dir):
+    """The compression manifest of `output_dir`, or an empty one"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'version': 1, 'files': {}}
+
+
+def _is_current(output_dir, entry, sha256, encodings):
+    """True if a previous manifest entry still describes the raw file and its compressed siblings"""
+    if entry is None or entry['sha256'] != sha256 or set(entry['encodings']) != set(encodings):
+        return False
+    return all(
+        os.path.exists(os.path.join(output_dir, variant['path']))
+        and os.path.getsize(os.path.join(output_dir, variant['path'])) == variant['size']
+        for variant in entry['encodings'].values()
+    )
+
+
+def _compress(output_dir, path, encodings):
+    """Write every encoded sibling of one artifact; returns its manifest entry"""
+    with open(os.path.join(output_dir, path), 'rb') as f:
+        data = f.read()
+    sha256 = file_sha256(os.path.join(output_dir, path))
+    entry = {'size': len(data), 'sha256': sha256, 'etag': etag(sha256), 'encodings': {}}
+    for encoding in encodings:
+        suffix, compress = ENCODINGS[encoding]
+        compressed = compress(data)
+        _write_atomic(os.path.join(output_dir, path + suffix), compressed)
+        entry['encodings'][encoding] = {
+            'path': path + suffix,
+            'size': len(compressed),
+            'etag': etag(sha256, encoding)
+        }
+    return entry
+
+
+def precompress_directory(output_dir, workers=None):
+    """
+    Compress every artifact in `output_dir` at maximum level, in parallel across files
+    (zlib and brotli release the GIL while compressing, so threads scale with cores)
+    Artifacts whose hash matches the previous manifest are not recompressed, and
+    stale siblings (removed artifacts, encodings no longer written) are deleted
+    Returns (manifest, number of artifacts compressed); the manifest is written to MANIFEST_NAME
+    """
+    encodings = available_encodings()
+    previous = load_manifest(output_dir).get('files', {})
+    artifacts = list_artifacts(output_dir)
+
+    files, todo = {}, []
+    for path in artifacts:
+        sha256 = file_sha256(os.path.join(output_dir, path))
+        if _is_current(output_dir, previous.get(path), sha256, encodings):
+            files[path] = previous[path]
+        else:
+            todo.append(path)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for path, entry in zip(todo, pool.map(lambda path: _compress(output_dir, path, encodings), todo)):
+            files[path] = entry
+
+    # Drop compressed siblings left over from removed artifacts (e.g. old shards)
+    current = set(artifacts)
+    suffixes = {ENCODINGS[encoding][0] for encoding in encodings}
+    for root, dirs, names in os.walk(output_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in names:
+            stem, suffix = os.path.splitext(name)
+            if suffix in ('.gz', '.br') and stem.endswith('.json'):
+                raw = os.path.relpath(os.path.join(root, stem), output_dir).replace(os.sep, '/')
+                if raw not in current or suffix not in suffixes:
+                    os.remove(os.path.join(root, name))
+
+    manifest = {
+        'version': 1,
+        'encodings': encodings,
+        'files': {path: files[path] for path in artifacts}
+    }
+    write_json(os.path.join(output_dir, MANIFEST_NAME), manifest)
+    return manifest, len(todo)
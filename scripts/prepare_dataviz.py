@@ -4,45 +4,105 @@ Prepares JSON data files from world-demographic.csv for the dashboard
 Includes advanced visualizations: Radar Charts, Ridgeline Plots, Growth Drivers, Gender Gaps
 """
 
-import pandas as pd
+import argparse
 import json
+import os
+import pstats
+import sys
+import warnings
+
+import pandas as pd
 import numpy as np
 
-def load_and_clean_data():
-    """Load and clean the demographic data"""
+import aggregate_cube
+import binary_cube
+import color_domains
+import density
+import frame_store
+import geometry
+import indicator_cube
+import ingest
+import json_writer
+import keyframes
+import location_hierarchy
+import precompress
+import profiles
+import projection
+import record_builder
+from aggregate_cube import AggregateCube, location_groups
+from binary_cube import write_cube
+from build_cache import BuildCache
+from color_domains import color_statistics
+from density import BANDWIDTH_RULES, bandwidths, gaussian_kde
+from geometry import LEVELS, build_topologies
+from ingest import load_cleaned
+from indicator_cube import IndicatorCube
+from json_writer import JsonObject, write_json
+from keyframes import keyframe_matrix, tween
+from location_hierarchy import LocationHierarchy
+from precompress import precompress_directory
+from projection import MODELS, PROJECTION_FIELDS, project
+from profiler import StageMonitor, max_rss, summary_table
+from record_builder import RecordStream, build_records, columnar_table, fixed_field, group_offsets, number_field, population_field
+from scheduler import run_stages
+
+INPUT_CSV = 'data/world-demographic.csv'
+GEOMETRY_PATH = 'data/globeCoordinates.json'
+OUTPUT_DIR = 'data'
+# Build-local directories inside the output directory
+SNAPSHOT_DIR_NAME = '.snapshot'
+PROFILE_DIR_NAME = '.profile'
+SNAPSHOT_DIR = os.path.join(OUTPUT_DIR, SNAPSHOT_DIR_NAME)
+
+# Build options a stage can take as an argument when run without the command line (e.g. benchmarks)
+DEFAULT_OPTIONS = {'columnar': False, 'output_dir': OUTPUT_DIR, 'projection_model': 'linear', 'projection_horizon': 2030,
+                   'geometry_path': GEOMETRY_PATH, 'animation_tweens': 0,
+                   'ridgeline_bandwidth': 'scott'}
+
+
+def load_and_clean_data(columns=None, refresh=False, csv_path=INPUT_CSV, snapshot_dir=SNAPSHOT_DIR,
+                        years=None, countries=None):
+    """
+    Load and clean the demographic data
+    Only `columns` are parsed; later runs on the same CSV read the binary snapshot instead
+    `years` and `countries` restrict the rows before any stage sees them (see select_rows)
+    """
     print("Loading data...")
-    df = pd.read_csv('data/world-demographic.csv', low_memory=False)
-    
-    # Convert numeric columns - handle space-separated thousands
-    numeric_cols = [
-        'Year',
-        'Total Population, as of 1 July (thousands)',
-        'Total Fertility Rate (live births per woman)',
-        'Life Expectancy at Birth, both sexes (years)',
-        'Male Life Expectancy at Birth (years)',
-        'Female Life Expectancy at Birth (years)',
-        'Crude Birth Rate (births per 1,000 population)',
-        'Crude Death Rate (deaths per 1,000 population)',
-        'Infant Mortality Rate (infant deaths per 1,000 live births)',
-        'Median Age, as of 1 July (years)',
-        'Population Growth Rate (percentage)',
-        'Population Density, as of 1 July (persons per square km)',
-        'Population Sex Ratio, as of 1 July (males per 100 females)',
-        'Net Migration Rate (per 1,000 population)',
-        'Rate of Natural Change (per 1,000 population)'
-    ]
+    df, from_snapshot = load_cleaned(csv_path, usecols=columns, snapshot_dir=snapshot_dir, refresh=refresh)
     
-    for col in numeric_cols:
-        if col in df.columns:
-            # Remove spaces (used as thousands separators) before converting
-            if df[col].dtype == 'object':
-                df[col] = df[col].astype(str).str.strip().str.replace(' ', '', regex=False)
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+    print(f"✓ Loaded {len(df):,} records" + (" (from snapshot)" if from_snapshot else ""))
     
-    print(f"✓ Loaded {len(df):,} records")
+    if years or countries:
+        df = select_rows(df, years, countries)
+        print(f"✓ Selected {len(df):,} records")
     return df
 
 
+def select_rows(df, years=None, countries=None):
+    """
+    Restrict the cleaned frame to a (first, last) year range (either end may be None)
+    and/or a list of ISO3 country codes
+    Aggregates (world, regions, subregions) are kept so the hierarchy and regional series still resolve
+    """
+    mask = np.ones(len(df), dtype=bool)
+    
+    if years:
+        first, last = years
+        if first is not None:
+            mask &= (df['Year'] >= first).to_numpy()
+        if last is not None:
+            mask &= (df['Year'] <= last).to_numpy()
+    
+    if countries:
+        iso3 = df['ISO3 Alpha-code']
+        unknown = sorted(set(countries) - set(iso3.dropna()))
+        if unknown:
+            print(f"⚠ Unknown ISO3 codes ignored: {', '.join(unknown)}")
+        mask &= ((df['Type'] != 'Country/Area') | iso3.isin(countries)).to_numpy()
+    
+    return df[mask]
+
+
 def format_population(num):
     """Format population for display"""
     if pd.isna(num) or num == 0:
@@ -56,11 +116,11 @@ def format_population(num):
     return str(int(num))
 
 
-def prepare_radar_chart_data(df):
+def prepare_radar_chart_data(df, hierarchy, country_cube, output_dir=OUTPUT_DIR):
     """
     Prepare data for Radar Chart (Country DNA Profile)
     For each country in latest year, normalize 5-6 key indicators
-    Also include regional and world averages
+    Also include regional and world averages (the world average is population-weighted)
     """
     print("\nPreparing radar chart data (Country DNA Profile)...")
     
@@ -88,27 +148,15 @@ def prepare_radar_chart_data(df):
             'median': float(values.median())
         }
     
-    # Build country-to-region mapping
-    region_map = {}
-    subregion_to_region = {}
-    
-    # First, build subregion to region map
-    for _, row in df[df['Type'] == 'Subregion'].iterrows():
-        parent_code = row.get('Parent code')
-        if pd.notna(parent_code):
-            parent = df[df['Location code'] == parent_code]
-            if not parent.empty:
-                subregion_to_region[row['Region, subregion, country or area *']] = parent.iloc[0]['Region, subregion, country or area *']
-    
-    # Map countries to regions
-    for _, row in df[df['Type'] == 'Country/Area'].iterrows():
-        parent_code = row.get('Parent code')
-        if pd.notna(parent_code):
-            parent = df[df['Location code'] == parent_code]
-            if not parent.empty:
-                subregion = parent.iloc[0]['Region, subregion, country or area *']
-                if subregion in subregion_to_region:
-                    region_map[row['Region, subregion, country or area *']] = subregion_to_region[subregion]
+    def normalize(key, value):
+        """0-1 position between the country min and max (inverted for infant mortality - lower is better)"""
+        normalized = (value - global_stats[key]['min']) / (global_stats[key]['max'] - global_stats[key]['min'])
+        if key == 'infantMortality':
+            normalized = 1 - normalized
+        return float(max(0, min(1, normalized)))  # Clamp to [0,1]
+    
+    # Country-to-region mapping from the shared hierarchy index
+    region_map = hierarchy.region_map()
     
     # Calculate regional averages
     regions_latest = df[(df['Type'] == 'Region') & (df['Year'] == latest_year)]
@@ -121,20 +169,23 @@ def prepare_radar_chart_data(df):
         for key, col in indicators.items():
             value = region_row[col]
             if pd.notna(value):
-                # Normalize (0-1 scale)
-                normalized = (value - global_stats[key]['min']) / (global_stats[key]['max'] - global_stats[key]['min'])
                 regional_averages[region_name][key] = {
                     'raw': float(value),
-                    'normalized': float(normalized)
+                    'normalized': normalize(key, value)
                 }
     
-    # Calculate world average
+    # World average: population-weighted mean over all countries, from the aggregate cube
+    world = AggregateCube.from_cube(country_cube, location_groups(hierarchy, country_cube.countries)[:1])
+    year_index = np.searchsorted(country_cube.years, latest_year)
+    cube_keys = {indicator['column']: indicator['key'] for indicator in COUNTRY_INDICATORS}
     world_average = {}
     for key, col in indicators.items():
-        world_average[key] = {
-            'raw': float(global_stats[key]['mean']),
-            'normalized': 0.5  # Mean is roughly in the middle
-        }
+        value = world.get('mean', 'World', cube_keys[col])[year_index]
+        if not np.isnan(value):
+            world_average[key] = {
+                'raw': float(value),
+                'normalized': normalize(key, value)
+            }
     
     # Process each country
     country_data = {}
@@ -155,16 +206,9 @@ def prepare_radar_chart_data(df):
         for key, col in indicators.items():
             value = row[col]
             if pd.notna(value):
-                # Normalize to 0-1 scale
-                normalized = (value - global_stats[key]['min']) / (global_stats[key]['max'] - global_stats[key]['min'])
-                
-                # Special handling for infant mortality (invert - lower is better)
-                if key == 'infantMortality':
-                    normalized = 1 - normalized
-                
                 country_profile['values'][key] = {
                     'raw': float(value),
-                    'normalized': float(max(0, min(1, normalized)))  # Clamp to [0,1]
+                    'normalized': normalize(key, value)
                 }
             else:
                 all_valid = False
@@ -188,13 +232,69 @@ def prepare_radar_chart_data(df):
         }
     }
     
-    with open('data/radar_chart_data.json', 'w') as f:
-        json.dump(output, f, indent=2)
+    write_json(os.path.join(output_dir, 'radar_chart_data.json'), output, ARTIFACT_PRECISION['radar_chart_data.json'])
     
     print(f"✓ Created radar_chart_data.json ({len(country_data)} countries)")
 
 
-def prepare_ridgeline_data(df):
+def prepare_radar_profiles(country_cube, hierarchy, output_dir=OUTPUT_DIR):
+    """
+    Radar profiles of every country and year, so the Country DNA view can move through time:
+    raw values plus min-max and percentile-rank normalizations against that year's countries
+    (see scripts/profiles.py), and population-weighted world and regional averages normalized
+    the same way. Per indicator, flat year-major arrays: country c in year y at index
+    y * len(countries) + c, group g at y * len(groups) + g (null where missing)
+    """
+    print("\nPreparing radar profiles (all years)...")
+
+    keys = [indicator['cube'] for indicator in RADAR_INDICATORS]
+    inverted = [i for i, indicator in enumerate(RADAR_INDICATORS) if indicator['inverted']]
+    values = np.stack([country_cube[key] for key in keys], axis=-1)
+
+    groups = [group for group in location_groups(hierarchy, country_cube.countries) if group[1] in ('World', 'Region')]
+    aggregates = AggregateCube.from_cube(country_cube, groups)
+    averages = np.stack([np.stack([aggregates.get('mean', name, key) for key in keys], axis=-1)
+                         for name, *_ in groups])
+
+    # (countries, years, indicators) and (groups, years, indicators), both against the countries of each year
+    scaled = profiles.normalize(values, values, inverted)
+    scaled_averages = profiles.normalize(averages, values, inverted)
+
+    def year_major(array):
+        return array.transpose(1, 0).ravel()
+
+    region_map = hierarchy.region_map()
+    output = {
+        'format': 'radar',
+        'version': 1,
+        'years': country_cube.years.tolist(),
+        'normalizations': profiles.NORMALIZATIONS,
+        'indicators': [{'key': indicator['key'], 'label': indicator['label'], 'inverted': indicator['inverted']}
+                       for indicator in RADAR_INDICATORS],
+        'countries': {
+            'name': list(country_cube.countries),
+            'iso3': list(country_cube.iso3),
+            'region': [region_map.get(name, 'Unknown') for name in country_cube.countries]
+        },
+        'groups': {'name': [name for name, *_ in groups], 'type': [kind for _, kind, *_ in groups]},
+        'values': {
+            indicator['key']: {'raw': year_major(values[:, :, i]),
+                               **{name: year_major(scaled[name][:, :, i]) for name in profiles.NORMALIZATIONS}}
+            for i, indicator in enumerate(RADAR_INDICATORS)
+        },
+        'averages': {
+            indicator['key']: {'raw': year_major(averages[:, :, i]),
+                               **{name: year_major(scaled_averages[name][:, :, i]) for name in profiles.NORMALIZATIONS}}
+            for i, indicator in enumerate(RADAR_INDICATORS)
+        }
+    }
+    write_json(os.path.join(output_dir, 'radar_profiles.json'), output, ARTIFACT_PRECISION['radar_profiles.json'])
+
+    print(f"✓ Created radar_profiles.json ({len(country_cube.countries)} countries, {len(groups)} averages, "
+          f"{len(country_cube.years)} years)")
+
+
+def prepare_ridgeline_data(df, output_dir=OUTPUT_DIR):
     """
     Prepare data for Ridgeline Plot (Global Ageing Distribution)
     Show distribution of Median Age across countries for each decade
@@ -233,290 +333,450 @@ def prepare_ridgeline_data(df):
                 'distribution': distribution
             })
     
-    with open('data/ridgeline_data.json', 'w') as f:
-        json.dump(decades, f, indent=2)
+    write_json(os.path.join(output_dir, 'ridgeline_data.json'), decades, ARTIFACT_PRECISION['ridgeline_data.json'])
     
     print(f"✓ Created ridgeline_data.json ({len(decades)} decades)")
 
 
-def prepare_growth_drivers_data(df):
+def prepare_ridgeline_density(country_cube, ridgeline_bandwidth='scott', output_dir=OUTPUT_DIR):
+    """
+    Smooth distributions of the ridgeline indicators across countries for every year: Gaussian KDEs
+    of all years x indicators in one batch (see scripts/density.py), each country counted once and
+    weighted by population, on one grid per indicator shared by every year
+    Densities are written as integers: density = value * scale (scale per indicator and variant)
+    """
+    print("\nPreparing ridgeline densities...")
+    
+    keys = RIDGELINE_INDICATORS
+    values = np.stack([country_cube[key] for key in keys], axis=-1)
+    population = np.nan_to_num(country_cube['population'])
+    n_years = len(country_cube.years)
+    
+    # One KDE row per (indicator, year), with the countries as samples
+    samples = values.transpose(2, 1, 0).reshape(len(keys) * n_years, -1)
+    variants = {'unweighted': None, 'weighted': np.tile(population.T, (len(keys), 1))}
+    widths = {name: bandwidths(samples, weights, ridgeline_bandwidth) for name, weights in variants.items()}
+    
+    # Grid per indicator: the observed range padded by three of its widest kernels, not below 0 (no indicator is negative)
+    with np.errstate(invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        low = np.nanmin(values, axis=(0, 1))
+        high = np.nanmax(values, axis=(0, 1))
+        pad = 3 * np.nanmax(np.stack([width.reshape(len(keys), n_years) for width in widths.values()]), axis=(0, 2))
+    start = np.nan_to_num(np.maximum(low - np.nan_to_num(pad), 0))
+    step = np.nan_to_num((high + np.nan_to_num(pad) - start) / (density.GRID_POINTS - 1))
+    grids = np.repeat(start[:, None] + step[:, None] * np.arange(density.GRID_POINTS), n_years, axis=0)
+    
+    # Kernels are kept at least one grid step wide, so every density is resolved by its grid
+    row_step = np.repeat(step, n_years)
+    densities = {name: gaussian_kde(samples, grids, np.maximum(widths[name], row_step), weights)
+                 .reshape(len(keys), n_years, density.GRID_POINTS)
+                 for name, weights in variants.items()}
+    
+    statistics = aggregate_cube.member_statistics(values, population[..., None])
+    valid = ~np.isnan(values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = {
+            'unweighted': np.nan_to_num(values).sum(0) / valid.sum(0),
+            'weighted': (np.nan_to_num(values) * population[..., None]).sum(0) / (valid * population[..., None]).sum(0)
+        }
+    medians = {'unweighted': statistics['median'], 'weighted': statistics['weightedMedian']}
+    
+    indicators = {}
+    labels = {indicator['key']: indicator for indicator in COUNTRY_INDICATORS}
+    for i, key in enumerate(keys):
+        entry = {
+            'label': labels[key]['label'],
+            'unit': labels[key]['unit'],
+            'grid': {'start': float(start[i]), 'step': float(step[i])},
+            'count': valid[:, :, i].sum(0)
+        }
+        for name in variants:
+            grid = densities[name][i]
+            peak = np.nanmax(grid) if np.isfinite(grid).any() else 0.0
+            scale = peak / DENSITY_LEVELS if peak > 0 else 1.0
+            entry[name] = {
+                'mean': means[name][:, i],
+                'median': medians[name][:, i],
+                'bandwidth': np.maximum(widths[name].reshape(len(keys), n_years)[i], step[i]),
+                'scale': float(scale),
+                'density': np.round(grid / scale).ravel()
+            }
+        indicators[key] = entry
+    
+    write_json(os.path.join(output_dir, 'ridgeline_density.json'), {
+        'format': 'density',
+        'version': 1,
+        'kernel': 'gaussian',
+        'bandwidth': ridgeline_bandwidth,
+        'weight': 'population',
+        'years': country_cube.years.tolist(),
+        'points': density.GRID_POINTS,
+        'indicators': indicators
+    }, ARTIFACT_PRECISION['ridgeline_density.json'])
+    
+    print(f"✓ Created ridgeline_density.json ({len(keys)} indicators, {n_years} years, "
+          f"{density.GRID_POINTS}-point grids, {ridgeline_bandwidth} bandwidth)")
+
+
+def prepare_growth_drivers_data(df, hierarchy, columnar=False, output_dir=OUTPUT_DIR):
     """
     Prepare data for Growth Drivers Scatter Plot
     X: Rate of Natural Change, Y: Net Migration Rate
     Size: Population, Color: Region
+    With `columnar`, writes the struct-of-arrays layout instead of one object per record
     """
     print("\nPreparing growth drivers scatter data...")
     
-    # Build country-to-region mapping
-    region_map = {}
-    subregion_to_region = {}
-    
-    for _, row in df[df['Type'] == 'Subregion'].iterrows():
-        parent_code = row.get('Parent code')
-        if pd.notna(parent_code):
-            parent = df[df['Location code'] == parent_code]
-            if not parent.empty:
-                subregion_to_region[row['Region, subregion, country or area *']] = parent.iloc[0]['Region, subregion, country or area *']
-    
-    for _, row in df[df['Type'] == 'Country/Area'].iterrows():
-        parent_code = row.get('Parent code')
-        if pd.notna(parent_code):
-            parent = df[df['Location code'] == parent_code]
-            if not parent.empty:
-                subregion = parent.iloc[0]['Region, subregion, country or area *']
-                if subregion in subregion_to_region:
-                    region_map[row['Region, subregion, country or area *']] = subregion_to_region[subregion]
-    
-    countries_df = df[df['Type'] == 'Country/Area'].copy()
+    countries_df = df[df['Type'] == 'Country/Area']
     
-    # Process data for each year
-    data = []
-    for _, row in countries_df.iterrows():
-        natural_change = row['Rate of Natural Change (per 1,000 population)']
-        migration_rate = row['Net Migration Rate (per 1,000 population)']
-        population = row['Total Population, as of 1 July (thousands)']
-        
-        if pd.notna(natural_change) and pd.notna(migration_rate) and pd.notna(population):
-            country_name = row['Region, subregion, country or area *']
-            data.append({
-                'country': country_name,
-                'year': int(row['Year']),
-                'naturalChange': float(natural_change),
-                'migrationRate': float(migration_rate),
-                'population': float(population),
-                'iso3': row.get('ISO3 Alpha-code', ''),
-                'region': region_map.get(country_name, 'Unknown')
-            })
+    # Keep rows with all three values
+    values = {
+        'naturalChange': countries_df['Rate of Natural Change (per 1,000 population)'],
+        'migrationRate': countries_df['Net Migration Rate (per 1,000 population)'],
+        'population': countries_df['Total Population, as of 1 July (thousands)']
+    }
+    rows = countries_df[pd.concat(values, axis=1).notna().all(axis=1)]
     
-    with open('data/growth_drivers_data.json', 'w') as f:
-        json.dump(data, f, indent=2)
+    write_country_year_records(rows, hierarchy, values, os.path.join(output_dir, 'growth_drivers_data.json'), columnar,
+                               ARTIFACT_PRECISION['growth_drivers_data.json'])
     
-    print(f"✓ Created growth_drivers_data.json ({len(data)} records)")
+    print(f"✓ Created growth_drivers_data.json ({len(rows)} records{', columnar' if columnar else ''})")
 
 
-def prepare_gender_gap_data(df):
+def prepare_gender_gap_data(country_cube, hierarchy, output_dir=OUTPUT_DIR):
     """
     Prepare data for Gender Gap Visualization (Slopegraph)
-    Compare Male vs Female Life Expectancy for 1950 and latest year
+    Male and female life expectancy and the gap (female - male) of every country in every year,
+    read off the country x year cube in one pass, so the slopegraph can compare any two years
+    Columnar: flat country-major arrays (country c in year y at index c * len(years) + y, null
+    where missing), plus the default comparison years and the featured countries' names
     """
     print("\nPreparing gender gap data (Life Expectancy Slopegraph)...")
     
-    countries_df = df[df['Type'] == 'Country/Area'].copy()
+    male = country_cube['lifeExpectancyMale']
+    female = country_cube['lifeExpectancyFemale']
+    gap = female - male
+    years = country_cube.years
     
-    # Get data for 1950 and latest year
-    year_1950 = countries_df[countries_df['Year'] == 1950]
-    latest_year = df['Year'].max()
-    year_latest = countries_df[countries_df['Year'] == latest_year]
-    
-    # Build country-to-region mapping
-    region_map = {}
-    subregion_to_region = {}
-    
-    for _, row in df[df['Type'] == 'Subregion'].iterrows():
-        parent_code = row.get('Parent code')
-        if pd.notna(parent_code):
-            parent = df[df['Location code'] == parent_code]
-            if not parent.empty:
-                subregion_to_region[row['Region, subregion, country or area *']] = parent.iloc[0]['Region, subregion, country or area *']
-    
-    for _, row in df[df['Type'] == 'Country/Area'].iterrows():
-        parent_code = row.get('Parent code')
-        if pd.notna(parent_code):
-            parent = df[df['Location code'] == parent_code]
-            if not parent.empty:
-                subregion = parent.iloc[0]['Region, subregion, country or area *']
-                if subregion in subregion_to_region:
-                    region_map[row['Region, subregion, country or area *']] = subregion_to_region[subregion]
-    
-    # Process data
-    data = []
+    # Default comparison: the first and latest years, countries with both sexes in both
+    complete = ~np.isnan(gap[:, [0, -1]]).any(1)
+    featured = [name for name in GENDER_GAP_FEATURED if name in set(country_cube.countries)]
     
-    for country in countries_df['Region, subregion, country or area *'].unique():
-        country_1950 = year_1950[year_1950['Region, subregion, country or area *'] == country]
-        country_latest = year_latest[year_latest['Region, subregion, country or area *'] == country]
-        
-        if not country_1950.empty and not country_latest.empty:
-            row_1950 = country_1950.iloc[0]
-            row_latest = country_latest.iloc[0]
-            
-            male_1950 = row_1950['Male Life Expectancy at Birth (years)']
-            female_1950 = row_1950['Female Life Expectancy at Birth (years)']
-            male_latest = row_latest['Male Life Expectancy at Birth (years)']
-            female_latest = row_latest['Female Life Expectancy at Birth (years)']
-            
-            if all(pd.notna([male_1950, female_1950, male_latest, female_latest])):
-                data.append({
-                    'country': country,
-                    'iso3': row_latest.get('ISO3 Alpha-code', ''),
-                    'region': region_map.get(country, 'Unknown'),
-                    'year1950': {
-                        'male': float(male_1950),
-                        'female': float(female_1950),
-                        'gap': float(female_1950 - male_1950)
-                    },
-                    f'year{latest_year}': {
-                        'male': float(male_latest),
-                        'female': float(female_latest),
-                        'gap': float(female_latest - male_latest)
-                    },
-                    'gapChange': float((female_latest - male_latest) - (female_1950 - male_1950))
-                })
+    region_map = hierarchy.region_map()
+    output = {
+        'format': 'gender-gap',
+        'version': 1,
+        'years': years.tolist(),
+        'comparisonYears': {'start': int(years[0]), 'end': int(years[-1])},
+        'countries': {
+            'name': list(country_cube.countries),
+            'iso3': list(country_cube.iso3),
+            'region': [region_map.get(name, 'Unknown') for name in country_cube.countries]
+        },
+        'featured': featured,
+        'male': male.ravel(),
+        'female': female.ravel(),
+        'gap': gap.ravel()
+    }
     
-    # Also create time series of gender gaps for selected countries
-    major_countries = ['China', 'India', 'United States of America', 'Indonesia', 
-                      'Pakistan', 'Brazil', 'Nigeria', 'Bangladesh', 'Russian Federation', 'Japan']
+    write_json(os.path.join(output_dir, 'gender_gap_data.json'), output, ARTIFACT_PRECISION['gender_gap_data.json'])
     
-    timeseries_data = []
-    for country in major_countries:
-        country_data = countries_df[countries_df['Region, subregion, country or area *'] == country]
-        
-        country_series = []
-        for _, row in country_data.iterrows():
-            male = row['Male Life Expectancy at Birth (years)']
-            female = row['Female Life Expectancy at Birth (years)']
-            
-            if pd.notna(male) and pd.notna(female):
-                country_series.append({
-                    'year': int(row['Year']),
-                    'male': float(male),
-                    'female': float(female),
-                    'gap': float(female - male)
-                })
-        
-        if country_series:
-            timeseries_data.append({
-                'country': country,
-                'values': country_series
-            })
+    print(f"✓ Created gender_gap_data.json ({len(country_cube.countries)} countries, {len(years)} years, "
+          f"{int(complete.sum())} in the {int(years[0])}-{int(years[-1])} comparison)")
+
+
+def globe_records(df):
+    """
+    Globe records of every year, built column-wise for all years at once
+    Returns (RecordStream, {year: (start, stop)}, all years); each year's records are in population order
+    """
+    pop_col = 'Total Population, as of 1 July (thousands)'
     
-    output = {
-        'comparison': data,
-        'timeseries': timeseries_data,
-        'years': {
-            'start': 1950,
-            'end': int(latest_year)
-        }
+    # Filter for countries, then keep rows with a known, positive population
+    countries_df = df[df['Type'] == 'Country/Area']
+    all_years = sorted(countries_df['Year'].unique())
+    countries_df = countries_df[countries_df[pop_col] > 0]
+    
+    # Sort by year, then population (descending) - a stable sort keeps source order for ties
+    countries_df = countries_df.sort_values(pop_col, ascending=False, kind='mergesort')
+    countries_df = countries_df.sort_values('Year', kind='mergesort')
+    
+    population = countries_df[pop_col] * 1000
+    
+    def col(name):
+        return countries_df[name]
+    
+    columns = {
+        'country': col('Region, subregion, country or area *'),
+        'alpha3_code': col('ISO3 Alpha-code'),
+        'population_number': number_field(population, 0),
+        'population': population_field(population),
+        'population_density_number': number_field(col('Population Density, as of 1 July (persons per square km)'), 0),
+        'population_density': fixed_field(col('Population Density, as of 1 July (persons per square km)'), 1),
+        'sex_ratio_number': number_field(col('Population Sex Ratio, as of 1 July (males per 100 females)'), 100),
+        'sex_ratio': fixed_field(col('Population Sex Ratio, as of 1 July (males per 100 females)'), 1),
+        'median_age_number': number_field(col('Median Age, as of 1 July (years)'), 0),
+        'median_age': fixed_field(col('Median Age, as of 1 July (years)'), 1),
+        # NEW: Fields for advanced visualization modes
+        'birth_rate_number': number_field(col('Crude Birth Rate (births per 1,000 population)'), 0),
+        'birth_rate': fixed_field(col('Crude Birth Rate (births per 1,000 population)'), 1),
+        'death_rate_number': number_field(col('Crude Death Rate (deaths per 1,000 population)'), 0),
+        'death_rate': fixed_field(col('Crude Death Rate (deaths per 1,000 population)'), 1),
+        'natural_change_number': number_field(col('Rate of Natural Change (per 1,000 population)'), 0),
+        'natural_change': fixed_field(col('Rate of Natural Change (per 1,000 population)'), 1),
+        'migration_rate_number': number_field(col('Net Migration Rate (per 1,000 population)'), 0),
+        'migration_rate': fixed_field(col('Net Migration Rate (per 1,000 population)'), 1),
+        'life_expectancy_number': number_field(col('Life Expectancy at Birth, both sexes (years)'), 0),
+        'life_expectancy': fixed_field(col('Life Expectancy at Birth, both sexes (years)'), 1),
+        'life_expectancy_male_number': number_field(col('Male Life Expectancy at Birth (years)'), 0),
+        'life_expectancy_female_number': number_field(col('Female Life Expectancy at Birth (years)'), 0),
+        'fertility_rate_number': number_field(col('Total Fertility Rate (live births per woman)'), 0),
+        'fertility_rate': fixed_field(col('Total Fertility Rate (live births per woman)'), 2),
+        'infant_mortality_number': number_field(col('Infant Mortality Rate (infant deaths per 1,000 live births)'), 0),
+        'infant_mortality': fixed_field(col('Infant Mortality Rate (infant deaths per 1,000 live births)'), 1),
+        # Rank within the year (rows are already in population order)
+        'rank': countries_df.groupby('Year').cumcount() + 1
     }
     
-    with open('data/gender_gap_data.json', 'w') as f:
-        json.dump(output, f, indent=2)
-    
-    print(f"✓ Created gender_gap_data.json ({len(data)} countries)")
+    offsets = {int(year): (start, stop) for year, start, stop in group_offsets(countries_df['Year'].to_numpy())}
+    return RecordStream(columns), offsets, all_years
 
 
-def prepare_globe_data_by_year(df):
+def prepare_globe_data_by_year(df, output_dir=OUTPUT_DIR):
     """
     Prepare data for globe visualization - one file per year would be too many
     Instead, create a structured file with all years
     """
     print("\nPreparing globe data (all years)...")
     
-    # Filter for countries only
-    countries_df = df[df['Type'] == 'Country/Area'].copy()
+    stream, offsets, all_years = globe_records(df)
     
-    # Group by year
-    data_by_year = {}
+    # Stream the per-year record lists straight from the sorted year offsets
+    data_by_year = JsonObject(
+        (int(year), stream.records(*offsets.get(int(year), (0, 0))))
+        for year in all_years
+    )
     
-    for year in sorted(countries_df['Year'].unique()):
-        year_data = countries_df[countries_df['Year'] == year].copy()
-        
-        # Sort by population
-        year_data = year_data.sort_values('Total Population, as of 1 July (thousands)', 
-                                          ascending=False, na_position='last')
-        
-        year_records = []
-        for idx, row in year_data.iterrows():
-            pop_thousands = row['Total Population, as of 1 July (thousands)']
-            if pd.isna(pop_thousands) or pop_thousands <= 0:
-                continue
-                
-            record = {
-                'country': row['Region, subregion, country or area *'],
-                'alpha3_code': row.get('ISO3 Alpha-code', ''),
-                'population_number': float(pop_thousands * 1000),
-                'population': format_population(pop_thousands * 1000),
-                'population_density_number': float(row['Population Density, as of 1 July (persons per square km)']) if pd.notna(row['Population Density, as of 1 July (persons per square km)']) else 0,
-                'population_density': f"{row['Population Density, as of 1 July (persons per square km)']:.1f}" if pd.notna(row['Population Density, as of 1 July (persons per square km)']) else 'N/A',
-                'sex_ratio_number': float(row['Population Sex Ratio, as of 1 July (males per 100 females)']) if pd.notna(row['Population Sex Ratio, as of 1 July (males per 100 females)']) else 100,
-                'sex_ratio': f"{row['Population Sex Ratio, as of 1 July (males per 100 females)']:.1f}" if pd.notna(row['Population Sex Ratio, as of 1 July (males per 100 females)']) else 'N/A',
-                'median_age_number': float(row['Median Age, as of 1 July (years)']) if pd.notna(row['Median Age, as of 1 July (years)']) else 0,
-                'median_age': f"{row['Median Age, as of 1 July (years)']:.1f}" if pd.notna(row['Median Age, as of 1 July (years)']) else 'N/A',
-                # NEW: Fields for advanced visualization modes
-                'birth_rate_number': float(row['Crude Birth Rate (births per 1,000 population)']) if pd.notna(row['Crude Birth Rate (births per 1,000 population)']) else 0,
-                'birth_rate': f"{row['Crude Birth Rate (births per 1,000 population)']:.1f}" if pd.notna(row['Crude Birth Rate (births per 1,000 population)']) else 'N/A',
-                'death_rate_number': float(row['Crude Death Rate (deaths per 1,000 population)']) if pd.notna(row['Crude Death Rate (deaths per 1,000 population)']) else 0,
-                'death_rate': f"{row['Crude Death Rate (deaths per 1,000 population)']:.1f}" if pd.notna(row['Crude Death Rate (deaths per 1,000 population)']) else 'N/A',
-                'natural_change_number': float(row['Rate of Natural Change (per 1,000 population)']) if pd.notna(row['Rate of Natural Change (per 1,000 population)']) else 0,
-                'natural_change': f"{row['Rate of Natural Change (per 1,000 population)']:.1f}" if pd.notna(row['Rate of Natural Change (per 1,000 population)']) else 'N/A',
-                'migration_rate_number': float(row['Net Migration Rate (per 1,000 population)']) if pd.notna(row['Net Migration Rate (per 1,000 population)']) else 0,
-                'migration_rate': f"{row['Net Migration Rate (per 1,000 population)']:.1f}" if pd.notna(row['Net Migration Rate (per 1,000 population)']) else 'N/A',
-                'life_expectancy_number': float(row['Life Expectancy at Birth, both sexes (years)']) if pd.notna(row['Life Expectancy at Birth, both sexes (years)']) else 0,
-                'life_expectancy': f"{row['Life Expectancy at Birth, both sexes (years)']:.1f}" if pd.notna(row['Life Expectancy at Birth, both sexes (years)']) else 'N/A',
-                'life_expectancy_male_number': float(row['Male Life Expectancy at Birth (years)']) if pd.notna(row['Male Life Expectancy at Birth (years)']) else 0,
-                'life_expectancy_female_number': float(row['Female Life Expectancy at Birth (years)']) if pd.notna(row['Female Life Expectancy at Birth (years)']) else 0,
-                'fertility_rate_number': float(row['Total Fertility Rate (live births per woman)']) if pd.notna(row['Total Fertility Rate (live births per woman)']) else 0,
-                'fertility_rate': f"{row['Total Fertility Rate (live births per woman)']:.2f}" if pd.notna(row['Total Fertility Rate (live births per woman)']) else 'N/A',
-                'infant_mortality_number': float(row['Infant Mortality Rate (infant deaths per 1,000 live births)']) if pd.notna(row['Infant Mortality Rate (infant deaths per 1,000 live births)']) else 0,
-                'infant_mortality': f"{row['Infant Mortality Rate (infant deaths per 1,000 live births)']:.1f}" if pd.notna(row['Infant Mortality Rate (infant deaths per 1,000 live births)']) else 'N/A'
-            }
-            year_records.append(record)
-        
-        # Add rank
-        for idx, record in enumerate(year_records):
-            record['rank'] = idx + 1
-        
-        data_by_year[int(year)] = year_records
+    write_json(os.path.join(output_dir, 'globe_data_all_years.json'), data_by_year,
+               ARTIFACT_PRECISION['globe_data_all_years.json'])
     
-    with open('data/globe_data_all_years.json', 'w') as f:
-        json.dump(data_by_year, f, indent=2)
+    print(f"✓ Created globe_data_all_years.json ({len(all_years)} years)")
+
+
+def globe_mode_values(df):
+    """
+    Values of every globe mode for all countries and years, rounded like the globe records
+    Returns (years, ISO3 codes, {mode: (years, countries) array}), NaN where a country has no record that year
+    """
+    stream, offsets, all_years = globe_records(df)
+    columns = dict(zip(stream.names, stream.arrays))
+    
+    year_of_row = np.empty(len(stream), dtype=int)
+    year_position = {int(year): i for i, year in enumerate(all_years)}
+    for year, (start, stop) in offsets.items():
+        year_of_row[start:stop] = year_position[year]
+    country_of_row, iso3 = pd.factorize(pd.Series(columns['alpha3_code'], dtype=object))
+    
+    def field(name):
+        values = np.array(columns[name], dtype=float)
+        decimals = GLOBE_FIELD_PRECISION.get(name)
+        return np.round(values, decimals) if decimals is not None else values
+    
+    # Records without an ISO3 code are left out
+    known = country_of_row >= 0
+    modes = {}
+    for mode, fields in GLOBE_MODE_FIELDS.items():
+        values = field(fields[0]) if len(fields) == 1 else field(fields[0]) - field(fields[1])
+        grid = np.full((len(all_years), len(iso3)), np.nan)
+        grid[year_of_row[known], country_of_row[known]] = values[known]
+        modes[mode] = grid
+    return [int(year) for year in all_years], list(iso3), modes
+
+
+def prepare_globe_values(df, geometry_path=GEOMETRY_PATH, output_dir=OUTPUT_DIR):
+    """
+    Choropleth values aligned to the globe features, so the globe recolors by index instead of
+    searching each year's records: per mode, one flat year-major array (feature f in year y at
+    index y * len(features) + f, null where the feature has no record that year), plus the
+    ISO3 -> feature index map
+    """
+    print("\nPreparing globe choropleth arrays...")
+    
+    with open(geometry_path) as f:
+        feature_ids = [feature.get('id') for feature in json.load(f)['features']]
+    index = {}
+    for i, iso3 in enumerate(feature_ids):
+        if iso3:
+            index.setdefault(iso3, i)
+    
+    all_years, iso3, values = globe_mode_values(df)
+    feature_of_country = np.array([index.get(code, -1) for code in iso3], dtype=int)
+    mapped = feature_of_country >= 0
+    
+    modes = {}
+    for mode, grid in values.items():
+        aligned = np.full((len(all_years), len(feature_ids)), np.nan)
+        aligned[:, feature_of_country[mapped]] = grid[:, mapped]
+        modes[mode] = aligned.ravel()
+    
+    write_json(os.path.join(output_dir, 'globe_values.json'), {
+        'format': 'choropleth',
+        'version': 1,
+        'years': all_years,
+        'features': len(feature_ids),
+        'index': index,
+        'fields': GLOBE_MODE_FIELDS,
+        'modes': modes
+    }, ARTIFACT_PRECISION['globe_values.json'])
+    
+    print(f"✓ Created globe_values.json ({len(modes)} modes, {len(all_years)} years, {len(feature_ids)} features, "
+          f"{int(mapped.sum())} matched countries)")
+
+
+def prepare_globe_statistics(df, output_dir=OUTPUT_DIR):
+    """
+    Color-scale inputs of every globe mode and year, so the globe builds its scales without scanning
+    the records: per-year and all-years extents of the colored values, quantile and Jenks class
+    breaks, and histograms on bins shared by all years (see scripts/color_domains.py)
+    Per-year arrays are indexed by year position; breaks are flat year-major (classes + 1 per year)
+    """
+    print("\nPreparing globe color statistics...")
+    
+    all_years, _, values = globe_mode_values(df)
+    statistics = {mode: color_statistics(grid, GLOBE_MODE_SCALES[mode]) for mode, grid in values.items()}
+    
+    write_json(os.path.join(output_dir, 'globe_statistics.json'), {
+        'format': 'color-domains',
+        'version': 1,
+        'years': all_years,
+        'classes': color_domains.CLASSES,
+        'bins': color_domains.BINS,
+        'scales': GLOBE_MODE_SCALES,
+        'extent': {mode: stats['extent'] for mode, stats in statistics.items()},
+        'statistics': {
+            name: {mode: stats[name].ravel() for mode, stats in statistics.items()}
+            for name in ('min', 'max', 'count', 'quantiles', 'jenks')
+        },
+        # Bin edges keep full precision (log-spaced edges are finer than the field precision)
+        'histograms': {
+            mode: {'edges': stats['edges'], 'counts': stats['histogram'].ravel()}
+            for mode, stats in statistics.items()
+        }
+    }, ARTIFACT_PRECISION['globe_statistics.json'])
     
-    print(f"✓ Created globe_data_all_years.json ({len(data_by_year)} years)")
+    print(f"✓ Created globe_statistics.json ({len(statistics)} modes, {len(all_years)} years)")
 
 
-def prepare_country_detail_data(df):
+def prepare_country_indicators(country_cube, output_dir=OUTPUT_DIR):
     """
-    Prepare time series data for country detail view
+    Write the canonical country x year x indicator cube with its units metadata
+    DataLoader serves the per-country detail, time-series and birth/death views from it
     """
-    print("\nPreparing country detail data...")
+    print("\nPreparing country indicator cube...")
     
-    countries_df = df[df['Type'] == 'Country/Area'].copy()
+    write_json(os.path.join(output_dir, 'country_indicators.json'), country_cube.to_json(),
+               ARTIFACT_PRECISION['country_indicators.json'])
     
-    # Create a dictionary with country name as key
-    country_data = {}
+    print(f"✓ Created country_indicators.json ({len(country_cube.countries)} countries, "
+          f"{len(country_cube.years)} years, {len(country_cube.indicators)} indicators)")
+
+
+def prepare_binary_cube(df, output_dir=OUTPUT_DIR):
+    """
+    Write the memory-mapped float32 location x year x indicator cube (cube/) for offline analysis,
+    covering every location with the indicators of the country cube; read it with binary_cube.open_cube
+    """
+    print("\nPreparing binary indicator cube...")
     
-    for country in countries_df['Region, subregion, country or area *'].unique():
-        country_rows = countries_df[countries_df['Region, subregion, country or area *'] == country].sort_values('Year')
-        
-        timeseries = []
-        for _, row in country_rows.iterrows():
-            pop = row['Total Population, as of 1 July (thousands)']
-            if pd.isna(pop):
-                continue
-                
-            timeseries.append({
-                'year': int(row['Year']),
-                'population': float(pop * 1000),
-                'density': float(row['Population Density, as of 1 July (persons per square km)']) if pd.notna(row['Population Density, as of 1 July (persons per square km)']) else 0,
-                'sexRatio': float(row['Population Sex Ratio, as of 1 July (males per 100 females)']) if pd.notna(row['Population Sex Ratio, as of 1 July (males per 100 females)']) else 100,
-                'medianAge': float(row['Median Age, as of 1 July (years)']) if pd.notna(row['Median Age, as of 1 July (years)']) else 0
-            })
-        
-        if timeseries:
-            country_data[country] = timeseries
+    shape = write_cube(df, COUNTRY_INDICATORS, os.path.join(output_dir, 'cube'))
+    
+    print(f"✓ Created cube/ ({shape[0]} locations, {shape[1]} years, {shape[2]} indicators, "
+          f"{np.prod(shape) * 4 / 1e6:.1f} MB float32)")
+
+
+def prepare_geometry(geometry_path=GEOMETRY_PATH, output_dir=OUTPUT_DIR):
+    """
+    Quantized, delta-encoded TopoJSON versions of the globe GeoJSON at several detail levels:
+      geometry/<level>.json - one topology per level (shared borders simplified once, so neighbours stay joined)
+      geometry/index.json   - the levels with their tolerance (degrees), vertex count and size
+    Features carry precomputed centroid, bbox, label anchor and bounding radius for the globe
+    """
+    print("\nPreparing globe geometry...")
+    
+    with open(geometry_path) as f:
+        features = json.load(f)['features']
+    
+    directory = os.path.join(output_dir, 'geometry')
+    os.makedirs(directory, exist_ok=True)
     
-    with open('data/country_detail_data.json', 'w') as f:
-        json.dump(country_data, f, indent=2)
+    levels = []
+    for name, topology in build_topologies(features).items():
+        written = write_json(os.path.join(directory, f'{name}.json'), topology, ARTIFACT_PRECISION['geometry/<level>.json'])
+        levels.append({'name': name, 'tolerance': topology['tolerance'], 'points': topology['points'],
+                       'path': f'geometry/{name}.json', 'size': written['size']})
+    write_json(os.path.join(directory, 'index.json'), {'version': 1, 'levels': levels})
     
-    print(f"✓ Created country_detail_data.json ({len(country_data)} countries)")
+    print(f"✓ Created geometry/ ({len(features)} features, "
+          + ', '.join(f"{level['name']} {level['points']:,} points" for level in levels) + ")")
 
 
-def prepare_regional_timeseries(df):
+def prepare_region_aggregates(country_cube, hierarchy, output_dir=OUTPUT_DIR):
     """
-    Prepare data for regional time-series chart
-    Includes all demographic metrics for graduate-level analysis
+    Write world/region/subregion x year x indicator statistics of the country cube
+    Population-weighted means and medians, order statistics and population totals, so the
+    dashboard looks aggregates up instead of recomputing them from country rows
     """
-    print("\nPreparing regional time-series data...")
+    print("\nPreparing region aggregate cube...")
+    
+    aggregates = AggregateCube.from_cube(country_cube, location_groups(hierarchy, country_cube.countries))
+    write_json(os.path.join(output_dir, 'region_aggregates.json'), aggregates.to_json(),
+               ARTIFACT_PRECISION['region_aggregates.json'])
     
+    print(f"✓ Created region_aggregates.json ({len(aggregates.groups)} groups, {len(aggregates.years)} years, "
+          f"{len(aggregates.indicators)} indicators)")
+
+
+def country_detail_records(country_cube):
+    """
+    Per-country detail records from the indicator cube (population as an absolute count)
+    Returns (RecordStream, [(country, start, stop)])
+    """
+    # Cells in (country, year) order, keeping those with a known population
+    cells, offsets = country_cube.select(~np.isnan(country_cube['population']))
+    
+    stream = RecordStream({
+        'year': country_cube.years_of(cells),
+        'population': country_cube.take('population', cells) * 1000,
+        'density': number_field(country_cube.take('density', cells), 0),
+        'sexRatio': number_field(country_cube.take('sexRatio', cells), 100),
+        'medianAge': number_field(country_cube.take('medianAge', cells), 0)
+    })
+    return stream, offsets
+
+
+def prepare_country_detail_data(country_cube, output_dir=OUTPUT_DIR):
+    """
+    Prepare time series data for country detail view
+    Derived from the indicator cube; population is written as an absolute count
+    """
+    print("\nPreparing country detail data...")
+    
+    stream, offsets = country_detail_records(country_cube)
+    
+    # Stream a dictionary with country name as key
+    country_data = JsonObject((country, stream.records(start, stop)) for country, start, stop in offsets)
+    
+    write_json(os.path.join(output_dir, 'country_detail_data.json'), country_data,
+               ARTIFACT_PRECISION['country_detail_data.json'])
+    
+    print(f"✓ Created country_detail_data.json ({len(offsets)} countries)")
+
+
+def regional_timeseries(df):
+    """
+    [{'region', 'values': [yearly records]}] for every Region, with all demographic metrics
+    """
     regions_df = df[df['Type'] == 'Region'].copy()
     
     data = []
@@ -551,21 +811,47 @@ def prepare_regional_timeseries(df):
                 'region': region,
                 'values': values
             })
+    return data
+
+
+def prepare_regional_timeseries(df, output_dir=OUTPUT_DIR):
+    """
+    Prepare data for regional time-series chart
+    Includes all demographic metrics for graduate-level analysis
+    """
+    print("\nPreparing regional time-series data...")
+    
+    data = regional_timeseries(df)
     
-    with open('data/regional_population_nested.json', 'w') as f:
-        json.dump(data, f, indent=2)
+    write_json(os.path.join(output_dir, 'regional_population_nested.json'), data,
+               ARTIFACT_PRECISION['regional_population_nested.json'])
     
     print(f"✓ Created regional_population_nested.json ({len(data)} regions)")
 
 
-def prepare_birth_death_rates(df):
+def country_birth_death_records(country_cube):
     """
-    Prepare data for small multiples visualization
-    Includes both regional and country-level data
+    Per-country birth/death rate records from the indicator cube, for years with both rates
+    Returns (RecordStream, [(country, start, stop)])
+    """
+    birth, death = country_cube['birthRate'], country_cube['deathRate']
+    cells, offsets = country_cube.select(~np.isnan(birth) & ~np.isnan(death))
+    birth = country_cube.take('birthRate', cells)
+    death = country_cube.take('deathRate', cells)
+    
+    stream = RecordStream({
+        'year': country_cube.years_of(cells),
+        'birthRate': birth,
+        'deathRate': death,
+        'naturalChange': birth - death
+    })
+    return stream, offsets
+
+
+def regional_birth_death(df):
+    """
+    [{'region', 'values': [yearly birth/death records]}] for every Region, for years with both rates
     """
-    print("\nPreparing birth/death rate data...")
-    
-    # Regional data
     regions_df = df[df['Type'] == 'Region'].copy()
     regional_data = []
     
@@ -590,91 +876,78 @@ def prepare_birth_death_rates(df):
                 'region': region,
                 'values': values
             })
+    return regional_data
+
+
+def prepare_birth_death_rates(df, output_dir=OUTPUT_DIR):
+    """
+    Prepare data for small multiples visualization (regional data)
+    Country-level rates are served from the indicator cube (country_indicators.json)
+    """
+    print("\nPreparing birth/death rate data...")
     
-    # Country-level data (nested dictionary)
-    countries_df = df[df['Type'] == 'Country/Area'].copy()
-    country_data = {}
-    
-    for country in countries_df['Region, subregion, country or area *'].unique():
-        country_rows = countries_df[countries_df['Region, subregion, country or area *'] == country].sort_values('Year')
-        
-        values = []
-        for _, row in country_rows.iterrows():
-            birth = row['Crude Birth Rate (births per 1,000 population)']
-            death = row['Crude Death Rate (deaths per 1,000 population)']
-            
-            if pd.notna(birth) and pd.notna(death):
-                values.append({
-                    'year': int(row['Year']),
-                    'birthRate': float(birth),
-                    'deathRate': float(death),
-                    'naturalChange': float(birth - death)
-                })
-        
-        if values:
-            country_data[country] = values
+    regional_data = regional_birth_death(df)
     
-    # Combine both into one file
     output = {
-        'regions': regional_data,
-        'countries': country_data
+        'regions': regional_data
     }
     
-    with open('data/birth_death_rates.json', 'w') as f:
-        json.dump(output, f, indent=2)
+    write_json(os.path.join(output_dir, 'birth_death_rates.json'), output, ARTIFACT_PRECISION['birth_death_rates.json'])
     
-    print(f"✓ Created birth_death_rates.json ({len(regional_data)} regions, {len(country_data)} countries)")
+    print(f"✓ Created birth_death_rates.json ({len(regional_data)} regions)")
 
 
-def prepare_country_timeseries(df):
+def country_timeseries_records(country_cube):
+    """
+    Per-country time-series records with all demographic metrics (population in thousands)
+    Returns (RecordStream, [(country, start, stop)])
+    """
+    cells, offsets = country_cube.select(~np.isnan(country_cube['population']))
+    
+    def col(key, fallback=0):
+        return number_field(country_cube.take(key, cells), fallback)
+    
+    stream = RecordStream({
+        'year': country_cube.years_of(cells),
+        'population': country_cube.take('population', cells),
+        'density': col('density'),
+        'sexRatio': col('sexRatio', 100),
+        'medianAge': col('medianAge'),
+        'birthRate': col('birthRate'),
+        'deathRate': col('deathRate'),
+        'naturalChange': col('naturalChange'),
+        'migrationRate': col('migrationRate'),
+        'fertilityRate': col('fertilityRate'),
+        'meanAgeChildbearing': col('meanAgeChildbearing'),
+        'infantMortality': col('infantMortality'),
+        'underFiveMortality': col('underFiveMortality'),
+        'lifeExpectancyMale': col('lifeExpectancyMale'),
+        'lifeExpectancyFemale': col('lifeExpectancyFemale'),
+        'lifeExpectancyBoth': col('lifeExpectancyBoth'),
+        'iso3': country_cube.iso3_of(cells)
+    })
+    return stream, offsets
+
+
+def prepare_country_timeseries(country_cube, output_dir=OUTPUT_DIR):
     """
     Prepare country-level time-series for comparison tool
-    Organized as nested dictionary with all demographic metrics
+    Organized as nested dictionary with all demographic metrics, derived from the indicator cube
     """
     print("\nPreparing country time-series data...")
     
-    countries_df = df[df['Type'] == 'Country/Area'].copy()
-    
-    # Create nested dictionary by country
-    country_data = {}
+    stream, offsets = country_timeseries_records(country_cube)
     
-    for country in countries_df['Region, subregion, country or area *'].unique():
-        country_rows = countries_df[countries_df['Region, subregion, country or area *'] == country].sort_values('Year')
-        
-        timeseries = []
-        for _, row in country_rows.iterrows():
-            pop = row['Total Population, as of 1 July (thousands)']
-            if pd.notna(pop):
-                timeseries.append({
-                    'year': int(row['Year']),
-                    'population': float(pop),
-                    'density': float(row['Population Density, as of 1 July (persons per square km)']) if pd.notna(row['Population Density, as of 1 July (persons per square km)']) else 0,
-                    'sexRatio': float(row['Population Sex Ratio, as of 1 July (males per 100 females)']) if pd.notna(row['Population Sex Ratio, as of 1 July (males per 100 females)']) else 100,
-                    'medianAge': float(row['Median Age, as of 1 July (years)']) if pd.notna(row['Median Age, as of 1 July (years)']) else 0,
-                    'birthRate': float(row['Crude Birth Rate (births per 1,000 population)']) if pd.notna(row['Crude Birth Rate (births per 1,000 population)']) else 0,
-                    'deathRate': float(row['Crude Death Rate (deaths per 1,000 population)']) if pd.notna(row['Crude Death Rate (deaths per 1,000 population)']) else 0,
-                    'naturalChange': float(row['Rate of Natural Change (per 1,000 population)']) if pd.notna(row['Rate of Natural Change (per 1,000 population)']) else 0,
-                    'migrationRate': float(row['Net Migration Rate (per 1,000 population)']) if pd.notna(row['Net Migration Rate (per 1,000 population)']) else 0,
-                    'fertilityRate': float(row['Total Fertility Rate (live births per woman)']) if pd.notna(row['Total Fertility Rate (live births per woman)']) else 0,
-                    'meanAgeChildbearing': float(row['Mean Age Childbearing (years)']) if pd.notna(row['Mean Age Childbearing (years)']) else 0,
-                    'infantMortality': float(row['Infant Mortality Rate (infant deaths per 1,000 live births)']) if pd.notna(row['Infant Mortality Rate (infant deaths per 1,000 live births)']) else 0,
-                    'underFiveMortality': float(row['Under-Five Mortality (deaths under age 5 per 1,000 live births)']) if pd.notna(row['Under-Five Mortality (deaths under age 5 per 1,000 live births)']) else 0,
-                    'lifeExpectancyMale': float(row['Male Life Expectancy at Birth (years)']) if pd.notna(row['Male Life Expectancy at Birth (years)']) else 0,
-                    'lifeExpectancyFemale': float(row['Female Life Expectancy at Birth (years)']) if pd.notna(row['Female Life Expectancy at Birth (years)']) else 0,
-                    'lifeExpectancyBoth': float(row['Life Expectancy at Birth, both sexes (years)']) if pd.notna(row['Life Expectancy at Birth, both sexes (years)']) else 0,
-                    'iso3': row.get('ISO3 Alpha-code', '')
-                })
-        
-        if timeseries:
-            country_data[country] = timeseries
+    # Stream nested dictionary by country
+    country_data = JsonObject((country, stream.records(start, stop)) for country, start, stop in offsets)
     
-    with open('data/country_population_timeseries.json', 'w') as f:
-        json.dump(country_data, f, indent=2)
+    write_json(os.path.join(output_dir, 'country_population_timeseries.json'), country_data,
+               ARTIFACT_PRECISION['country_population_timeseries.json'])
     
-    print(f"✓ Created country_population_timeseries.json ({len(country_data)} countries)")
+    print(f"✓ Created country_population_timeseries.json ({len(offsets)} countries)")
 
 
-def prepare_countries_list(df):
+def prepare_countries_list(df, output_dir=OUTPUT_DIR):
     """
     Create list of all countries for selector
     """
@@ -683,133 +956,254 @@ def prepare_countries_list(df):
     countries_df = df[df['Type'] == 'Country/Area']
     countries_list = sorted(countries_df['Region, subregion, country or area *'].unique().tolist())
     
-    with open('data/countries_list.json', 'w') as f:
-        json.dump(countries_list, f, indent=2)
+    write_json(os.path.join(output_dir, 'countries_list.json'), countries_list)
     
     print(f"✓ Created countries_list.json ({len(countries_list)} countries)")
 
 
-def prepare_projection_uncertainty(df):
+def projection_records(country_cube, projection_model='linear', projection_horizon=2030):
+    """
+    Population projections with uncertainty bands, one record per (country, future year), country-major
+    Every country's trend is fitted in one batch (see projection.py), with residual-bootstrap bands
     """
-    Create confidence intervals for 2024-2030 population projections
-    Uses simple extrapolation with increasing uncertainty bands
+    result = project(country_cube.years, country_cube['population'], projection_horizon, model=projection_model)
+    
+    n_years = len(result['years'])
+    countries = np.asarray(country_cube.countries, dtype=object)[result['rows']]
+    return build_records({
+        'country': np.repeat(countries, n_years),
+        'year': np.tile(result['years'], len(countries)),
+        **{field: result[field].ravel() for field in PROJECTION_FIELDS}
+    })
+
+
+def prepare_projection_uncertainty(country_cube, projection_model='linear', projection_horizon=2030,
+                                   output_dir=OUTPUT_DIR):
     """
-    print("\nPreparing projection uncertainty data...")
+    Create confidence intervals for population projections from the last data year to `projection_horizon`
+    """
+    print(f"\nPreparing projection uncertainty data ({projection_model} trend to {projection_horizon})...")
     
-    countries_df = df[df['Type'] == 'Country/Area'].copy()
-    projection_data = []
+    projection_data = projection_records(country_cube, projection_model, projection_horizon)
     
-    for country in countries_df['Region, subregion, country or area *'].unique():
-        # Get historical data for this country
-        country_data = countries_df[countries_df['Region, subregion, country or area *'] == country].sort_values('Year')
-        
-        # Get last 10 years for trend calculation
-        historical = country_data.tail(10)
-        
-        if len(historical) < 5:  # Need at least 5 years for reasonable trend
-            continue
-        
-        # Simple linear trend calculation
-        years = historical['Year'].values
-        populations = historical['Total Population, as of 1 July (thousands)'].values
-        
-        # Remove NaN values
-        valid_mask = ~np.isnan(populations)
-        years = years[valid_mask]
-        populations = populations[valid_mask]
-        
-        if len(years) < 5:
-            continue
-        
-        # Calculate linear trend
-        coefficients = np.polyfit(years, populations, 1)
-        trend_slope = coefficients[0]
-        trend_intercept = coefficients[1]
-        
-        # Project future years (2024-2030)
-        for year in range(2024, 2031):
-            years_ahead = year - 2023
-            uncertainty_factor = 1 + (years_ahead * 0.05)  # 5% per year
-            
-            # Predicted value
-            predicted_pop = trend_slope * year + trend_intercept
-            
-            # Ensure non-negative
-            if predicted_pop < 0:
-                predicted_pop = populations[-1]  # Use last known value
-            
-            projection_data.append({
-                'country': country,
-                'year': int(year),
-                'median': float(predicted_pop),
-                'lower_50': float(predicted_pop * (1 - 0.25 * uncertainty_factor)),
-                'upper_50': float(predicted_pop * (1 + 0.25 * uncertainty_factor)),
-                'lower_95': float(predicted_pop * (1 - 0.5 * uncertainty_factor)),
-                'upper_95': float(predicted_pop * (1 + 0.5 * uncertainty_factor))
-            })
-    
-    with open('data/projection_uncertainty.json', 'w') as f:
-        json.dump(projection_data, f, indent=2)
+    # 'median' here is a population (thousands), not a statistic
+    write_json(os.path.join(output_dir, 'projection_uncertainty.json'), projection_data,
+               ARTIFACT_PRECISION['projection_uncertainty.json'])
     
     print(f"✓ Created projection_uncertainty.json ({len(projection_data)} projections)")
 
 
-def prepare_animation_data(df):
+def prepare_animation_data(df, hierarchy, columnar=False, animation_tweens=0, output_dir=OUTPUT_DIR):
     """
     Prepare data for Hans Rosling animation
+    With `columnar`, writes the struct-of-arrays layout instead of one object per record
+    Also writes the year-keyed frames the animation plays (see write_animation_frames)
     """
     print("\nPreparing animation data...")
     
-    # Build country-to-region mapping
-    region_map = {}
-    
-    # First, build subregion to region map
-    subregion_to_region = {}
-    for _, row in df[df['Type'] == 'Subregion'].iterrows():
-        parent_code = row.get('Parent code')
-        if pd.notna(parent_code):
-            parent = df[df['Location code'] == parent_code]
-            if not parent.empty:
-                subregion_to_region[row['Region, subregion, country or area *']] = parent.iloc[0]['Region, subregion, country or area *']
-    
-    # Now map countries to regions via subregions
-    for _, row in df[df['Type'] == 'Country/Area'].iterrows():
-        parent_code = row.get('Parent code')
-        if pd.notna(parent_code):
-            parent = df[df['Location code'] == parent_code]
-            if not parent.empty:
-                subregion = parent.iloc[0]['Region, subregion, country or area *']
-                if subregion in subregion_to_region:
-                    region_map[row['Region, subregion, country or area *']] = subregion_to_region[subregion]
-    
-    # Now create animation data
-    countries_df = df[df['Type'] == 'Country/Area'].copy()
+    countries_df = df[df['Type'] == 'Country/Area']
     
-    data = []
-    for _, row in countries_df.iterrows():
-        fertility = row['Total Fertility Rate (live births per woman)']
-        life_exp = row['Life Expectancy at Birth, both sexes (years)']
-        pop = row['Total Population, as of 1 July (thousands)']
-        
-        if pd.notna(fertility) and pd.notna(life_exp) and pd.notna(pop):
-            country_name = row['Region, subregion, country or area *']
-            data.append({
-                'country': country_name,
-                'year': int(row['Year']),
-                'fertility': float(fertility),
-                'lifeExpectancy': float(life_exp),
-                'population': float(pop),
-                'iso3': row.get('ISO3 Alpha-code', ''),
-                'region': region_map.get(country_name, 'Unknown')
-            })
+    # Keep rows with all three values
+    values = {
+        'fertility': countries_df['Total Fertility Rate (live births per woman)'],
+        'lifeExpectancy': countries_df['Life Expectancy at Birth, both sexes (years)'],
+        'population': countries_df['Total Population, as of 1 July (thousands)']
+    }
+    rows = countries_df[pd.concat(values, axis=1).notna().all(axis=1)]
+    
+    write_country_year_records(rows, hierarchy, values, os.path.join(output_dir, 'country_animation_data.json'), columnar,
+                               ARTIFACT_PRECISION['country_animation_data.json'])
+    
+    print(f"✓ Created country_animation_data.json ({len(rows)} records{', columnar' if columnar else ''})")
     
-    with open('data/country_animation_data.json', 'w') as f:
-        json.dump(data, f, indent=2)
+    frames = write_animation_frames(rows, hierarchy, values, animation_tweens, output_dir)
     
-    print(f"✓ Created country_animation_data.json ({len(data)} records)")
+    print(f"✓ Created animation/index.json ({len(frames)} year files, {animation_tweens} tween frames per year)")
 
 
-def create_region_metadata():
+def write_animation_frames(rows, hierarchy, values, tweens, output_dir):
+    """
+    Year-keyed animation frames, so playback reads a prepared frame instead of filtering the records:
+      animation/<year>.json - the countries drawn that year (positions in the index's country table)
+                              and, per field, a flat frame-major array: the year's keyframe, then
+                              `tweens` frames interpolated towards the next year (none after the last year)
+      animation/index.json  - the country table (name, ISO3, region), the years and every year file
+                              with its size and hash
+    Countries without a region ('Unknown') are left out, as the animation never draws them
+    Returns the index's year entries
+    """
+    region_map = hierarchy.region_map()
+    countries = rows['Region, subregion, country or area *']
+    regions = countries.map(region_map)
+    known = regions.notna().to_numpy()
+    
+    country_codes, names = pd.factorize(countries[known], sort=False)
+    years, year_codes = np.unique(rows['Year'].to_numpy(dtype=int)[known], return_inverse=True)
+    fields = list(values)
+    matrix = keyframe_matrix(country_codes, year_codes,
+                             np.column_stack([values[name][rows.index].to_numpy(dtype=float)[known] for name in fields]),
+                             len(names), len(years))
+    tween_frames = tween(matrix, tweens) if tweens else None
+    
+    first = pd.DataFrame({'iso3': rows['ISO3 Alpha-code'][known].to_numpy(), 'region': regions[known].to_numpy()}
+                         ).groupby(country_codes, sort=True).first()
+    index = {
+        'format': 'keyframes',
+        'version': 1,
+        'years': years.tolist(),
+        'tweens': tweens,
+        'fields': fields,
+        'countries': {'name': list(names), 'iso3': first['iso3'].tolist(), 'region': first['region'].tolist()},
+        'frames': {}
+    }
+    
+    os.makedirs(os.path.join(output_dir, 'animation'), exist_ok=True)
+    for y, year in enumerate(years):
+        present = np.flatnonzero(~np.isnan(matrix[:, y, 0]))
+        # (frames, countries present, fields): the keyframe, then the tweens towards the next year
+        frames = matrix[present, y][None]
+        if tween_frames is not None and y < len(years) - 1:
+            frames = np.concatenate([frames, tween_frames[present, y].transpose(1, 0, 2)])
+        path = f'animation/{year}.json'
+        index['frames'][int(year)] = {
+            'path': path,
+            **write_json(os.path.join(output_dir, path), {
+                'year': int(year),
+                'frames': len(frames),
+                'countries': present,
+                'values': {name: frames[:, :, f].ravel() for f, name in enumerate(fields)}
+            }, ARTIFACT_PRECISION['animation/<year>.json'])
+        }
+    
+    # Remove year files left over from a previous build (e.g. a wider --years selection)
+    current = {entry['path'] for entry in index['frames'].values()}
+    for name in os.listdir(os.path.join(output_dir, 'animation')):
+        if name.endswith('.json') and name != 'index.json' and f'animation/{name}' not in current:
+            os.remove(os.path.join(output_dir, 'animation', name))
+    
+    write_json(os.path.join(output_dir, 'animation', 'index.json'), index)
+    return index['frames']
+
+
+def write_country_year_records(rows, hierarchy, values, path, columnar, precision):
+    """
+    Write {country, year, <values>, iso3, region} records for the given rows
+    Row mode: a list of objects. Columnar mode: dictionary-encoded countries/regions
+    plus parallel numeric arrays sorted by year with per-year offsets (see columnar_table)
+    Values are rounded by `precision`, the artifact's ARTIFACT_PRECISION entry
+    """
+    # Country-to-region mapping from the shared hierarchy index
+    region_map = hierarchy.region_map()
+    countries = rows['Region, subregion, country or area *']
+    regions = countries.map(region_map).fillna('Unknown')
+    values = {name: column[rows.index] for name, column in values.items()}
+    
+    if columnar:
+        output = columnar_table(rows['Year'], countries, rows['ISO3 Alpha-code'], regions, values)
+        write_json(path, output, precision)
+        return
+    
+    data = RecordStream({
+        'country': countries,
+        'year': rows['Year'].astype(int),
+        **{name: column.astype(float) for name, column in values.items()},
+        'iso3': rows['ISO3 Alpha-code'],
+        'region': regions
+    })
+    
+    write_json(path, data.records(), precision)
+
+
+def prepare_shards(hierarchy, country_cube, output_dir=OUTPUT_DIR):
+    """
+    Split the monolithic artifacts into lazily loadable shards:
+      globe/<year>.json     - the globe records of one year
+      countries/<ISO3>.json - every per-country series (detail, time-series, birth/death, projections)
+    plus manifest.json listing every shard with its size and hash
+    Runs after the stages whose outputs it splits
+    """
+    print("\nPreparing sharded artifacts...")
+    
+    def load(name):
+        with open(os.path.join(output_dir, name)) as f:
+            return json.load(f)
+    
+    globe_data = load('globe_data_all_years.json')
+    detail_data = load('country_detail_data.json')
+    timeseries_data = load('country_population_timeseries.json')
+    birth_death_stream, birth_death_offsets = country_birth_death_records(country_cube)
+    birth_death_data = {country: list(birth_death_stream.records(start, stop))
+                        for country, start, stop in birth_death_offsets}
+    projections = {}
+    for record in load('projection_uncertainty.json'):
+        projections.setdefault(record['country'], []).append(record)
+    
+    manifest = {
+        'version': 1,
+        'globe': {},
+        'countries': {}
+    }
+    
+    # Per-year globe shards
+    os.makedirs(os.path.join(output_dir, 'globe'), exist_ok=True)
+    for year, records in globe_data.items():
+        path = f'globe/{year}.json'
+        manifest['globe'][year] = {'path': path,
+                                   **write_json(os.path.join(output_dir, path), records, ARTIFACT_PRECISION['globe/<year>.json'])}
+    
+    # Per-country shards, keyed by ISO3 code
+    os.makedirs(os.path.join(output_dir, 'countries'), exist_ok=True)
+    region_map = hierarchy.region_map()
+    for country, iso3 in hierarchy.iso3_map().items():
+        if not isinstance(iso3, str) or not iso3:
+            continue
+        shard = {
+            'country': country,
+            'iso3': iso3,
+            'region': region_map.get(country, 'Unknown'),
+            'detail': detail_data.get(country, []),
+            'timeseries': timeseries_data.get(country, []),
+            'birthDeath': birth_death_data.get(country, []),
+            'projection': projections.get(country, [])
+        }
+        path = f'countries/{iso3}.json'
+        manifest['countries'][iso3] = {
+            'path': path,
+            'country': country,
+            **write_json(os.path.join(output_dir, path), shard, ARTIFACT_PRECISION['countries/<iso3>.json'])
+        }
+    
+    # Remove shards left over from a previous build (their .gz/.br siblings are cleaned up by the compress stage)
+    current = {entry['path'] for group in ('globe', 'countries') for entry in manifest[group].values()}
+    for folder in ('globe', 'countries'):
+        for name in os.listdir(os.path.join(output_dir, folder)):
+            if name.endswith('.json') and f'{folder}/{name}' not in current:
+                os.remove(os.path.join(output_dir, folder, name))
+    
+    write_json(os.path.join(output_dir, 'manifest.json'), manifest)
+    
+    print(f"✓ Created manifest.json ({len(manifest['globe'])} year shards, {len(manifest['countries'])} country shards)")
+
+
+def prepare_compressed_artifacts(output_dir=OUTPUT_DIR):
+    """
+    Write precompressed .gz/.br siblings of every artifact for static serving (scripts/serve.py)
+    plus compression_manifest.json with raw/compressed sizes, content hashes and ETags
+    Runs last; only artifacts whose content changed are recompressed
+    """
+    print("\nPreparing precompressed artifacts...")
+    
+    manifest, compressed = precompress_directory(output_dir)
+    if 'br' not in manifest['encodings']:
+        print("⚠ brotli is not installed - writing gzip variants only (pip install brotli)")
+    
+    raw_size = sum(entry['size'] for entry in manifest['files'].values())
+    gzip_size = sum(entry['encodings']['gzip']['size'] for entry in manifest['files'].values())
+    print(f"✓ Created compression_manifest.json ({len(manifest['files'])} artifacts, {compressed} recompressed, "
+          f"{raw_size / 1e6:.1f} MB raw -> {gzip_size / 1e6:.1f} MB gzip)")
+
+
+def create_region_metadata(output_dir=OUTPUT_DIR):
     """
     Create metadata for regions including color schemes
     """
@@ -824,57 +1218,479 @@ def create_region_metadata():
         {'name': 'Oceania', 'color': '#a65628'}
     ]
     
-    with open('data/region_metadata.json', 'w') as f:
-        json.dump(regions, f, indent=2)
+    write_json(os.path.join(output_dir, 'region_metadata.json'), regions)
     
     print(f"✓ Created region_metadata.json ({len(regions)} regions)")
 
 
-def main():
+# Column groups read by the stages (used to fingerprint each stage's inputs)
+NAME_COL = 'Region, subregion, country or area *'
+ROW_COLS = [NAME_COL, 'Type', 'Year']
+HIERARCHY_COLS = ['Location code', 'Parent code', 'ISO3 Alpha-code']
+POP_COL = 'Total Population, as of 1 July (thousands)'
+DETAIL_COLS = [
+    'Population Density, as of 1 July (persons per square km)',
+    'Population Sex Ratio, as of 1 July (males per 100 females)',
+    'Median Age, as of 1 July (years)'
+]
+RATE_COLS = [
+    'Crude Birth Rate (births per 1,000 population)',
+    'Crude Death Rate (deaths per 1,000 population)',
+    'Rate of Natural Change (per 1,000 population)',
+    'Net Migration Rate (per 1,000 population)'
+]
+LIFE_COLS = [
+    'Life Expectancy at Birth, both sexes (years)',
+    'Male Life Expectancy at Birth (years)',
+    'Female Life Expectancy at Birth (years)'
+]
+FERTILITY_COL = 'Total Fertility Rate (live births per woman)'
+INFANT_COL = 'Infant Mortality Rate (infant deaths per 1,000 live births)'
+TIMESERIES_COLS = ([POP_COL] + DETAIL_COLS + RATE_COLS + [FERTILITY_COL, 'Mean Age Childbearing (years)', INFANT_COL,
+                   'Under-Five Mortality (deaths under age 5 per 1,000 live births)'] + LIFE_COLS)
+
+GLOBE_COLS = ROW_COLS + ['ISO3 Alpha-code', POP_COL] + DETAIL_COLS + RATE_COLS + LIFE_COLS + [FERTILITY_COL, INFANT_COL]
+
+# Globe modes -> the globe record field each colors by; two fields mean their difference (female - male)
+GLOBE_MODE_FIELDS = {
+    'population': ['population_number'],
+    'density': ['population_density_number'],
+    'sex-ratio': ['sex_ratio_number'],
+    'median-age': ['median_age_number'],
+    'demographic-transition': ['birth_rate_number'],
+    'growth-drivers': ['natural_change_number'],
+    'longevity-gap': ['life_expectancy_number'],
+    'fertility-health': ['fertility_rate_number'],
+    'healthcare-quality': ['infant_mortality_number'],
+    'gender-gap': ['life_expectancy_female_number', 'life_expectancy_male_number']
+}
+
+# Decimals of the globe records' numeric fields (the *_number fields in their source units; population in persons)
+GLOBE_FIELD_PRECISION = {
+    'population_number': 0, 'population_density_number': 1, 'sex_ratio_number': 1, 'median_age_number': 1,
+    'birth_rate_number': 2, 'death_rate_number': 2, 'natural_change_number': 2, 'migration_rate_number': 2,
+    'life_expectancy_number': 1, 'life_expectancy_male_number': 1, 'life_expectancy_female_number': 1,
+    'fertility_rate_number': 2, 'infant_mortality_number': 2
+}
+GLOBE_MODE_PRECISION = {mode: GLOBE_FIELD_PRECISION[fields[0]] for mode, fields in GLOBE_MODE_FIELDS.items()}
+
+# Color scale of each globe mode, as globe.js draws it: log for counts and densities, diverging for the gender gap
+GLOBE_MODE_SCALES = {mode: 'linear' for mode in GLOBE_MODE_FIELDS}
+GLOBE_MODE_SCALES.update({'population': 'log', 'density': 'log', 'gender-gap': 'diverging'})
+
+# Canonical per-country indicators (the axes of the indicator cube) with their units and the decimals they are written with
+COUNTRY_INDICATORS = [
+    {'key': 'population', 'column': POP_COL, 'label': 'Total population', 'unit': 'thousands', 'decimals': 3},
+    {'key': 'density', 'column': DETAIL_COLS[0], 'label': 'Population density',
+    'unit': 'persons per square km', 'decimals': 1},
+    {'key': 'sexRatio', 'column': DETAIL_COLS[1], 'label': 'Sex ratio',
+    'unit': 'males per 100 females', 'decimals': 1},
+    {'key': 'medianAge', 'column': DETAIL_COLS[2], 'label': 'Median age', 'unit': 'years', 'decimals': 1},
+    {'key': 'birthRate', 'column': RATE_COLS[0], 'label': 'Crude birth rate',
+    'unit': 'per 1,000 population', 'decimals': 2},
+    {'key': 'deathRate', 'column': RATE_COLS[1], 'label': 'Crude death rate',
+    'unit': 'per 1,000 population', 'decimals': 2},
+    {'key': 'naturalChange', 'column': RATE_COLS[2], 'label': 'Rate of natural change',
+    'unit': 'per 1,000 population', 'decimals': 2},
+    {'key': 'migrationRate', 'column': RATE_COLS[3], 'label': 'Net migration rate',
+    'unit': 'per 1,000 population', 'decimals': 2},
+    {'key': 'fertilityRate', 'column': FERTILITY_COL, 'label': 'Total fertility rate',
+    'unit': 'live births per woman', 'decimals': 2},
+    {'key': 'meanAgeChildbearing', 'column': 'Mean Age Childbearing (years)', 'label': 'Mean age at childbearing',
+     'unit': 'years', 'decimals': 1},
+    {'key': 'infantMortality', 'column': INFANT_COL, 'label': 'Infant mortality rate',
+    'unit': 'per 1,000 live births', 'decimals': 2},
+    {'key': 'underFiveMortality', 'column': 'Under-Five Mortality (deaths under age 5 per 1,000 live births)',
+     'label': 'Under-five mortality', 'unit': 'per 1,000 live births', 'decimals': 2},
+    {'key': 'lifeExpectancyMale', 'column': LIFE_COLS[1], 'label': 'Male life expectancy',
+    'unit': 'years', 'decimals': 1},
+    {'key': 'lifeExpectancyFemale', 'column': LIFE_COLS[2], 'label': 'Female life expectancy',
+    'unit': 'years', 'decimals': 1},
+    {'key': 'lifeExpectancyBoth', 'column': LIFE_COLS[0], 'label': 'Life expectancy at birth',
+    'unit': 'years', 'decimals': 1}
+]
+CUBE_COLS = ROW_COLS + ['ISO3 Alpha-code'] + [indicator['column'] for indicator in COUNTRY_INDICATORS]
+INDICATOR_PRECISION = {indicator['key']: indicator['decimals'] for indicator in COUNTRY_INDICATORS}
+
+# Indicators of the ridgeline densities (cube keys), and the integer levels a density peak is written with
+RIDGELINE_INDICATORS = ['medianAge', 'fertilityRate', 'lifeExpectancyBoth', 'infantMortality']
+DENSITY_LEVELS = 1000
+
+# Countries whose gender gap series the dashboard features
+GENDER_GAP_FEATURED = ['China', 'India', 'United States of America', 'Indonesia', 'Pakistan', 'Brazil', 'Nigeria',
+                       'Bangladesh', 'Russian Federation', 'Japan']
+
+# Radar profile axes: artifact key, cube key, label, and whether lower is better (flipped when normalized)
+RADAR_INDICATORS = [
+    {'key': 'fertility', 'cube': 'fertilityRate', 'label': 'Total Fertility Rate', 'inverted': False},
+    {'key': 'migration', 'cube': 'migrationRate', 'label': 'Net Migration Rate', 'inverted': False},
+    {'key': 'lifeExpectancy', 'cube': 'lifeExpectancyBoth', 'label': 'Life Expectancy', 'inverted': False},
+    {'key': 'medianAge', 'cube': 'medianAge', 'label': 'Median Age', 'inverted': False},
+    {'key': 'infantMortality', 'cube': 'infantMortality', 'label': 'Infant Mortality (inverted)', 'inverted': True}
+]
+
+# Decimal places of every artifact's rounded fields, by artifact (per-year and per-country files by pattern);
+# fields an artifact does not list keep full precision. Population is in thousands to 3 decimals (whole persons)
+# unless an artifact converts it to persons
+PROJECTION_PRECISION = {'median': 3, 'lower_50': 3, 'upper_50': 3, 'lower_95': 3, 'upper_95': 3}
+ANIMATION_PRECISION = {'population': 3, 'fertility': 2, 'lifeExpectancy': 1}
+ARTIFACT_PRECISION = {
+    'globe_data_all_years.json': GLOBE_FIELD_PRECISION,
+    'globe/<year>.json': GLOBE_FIELD_PRECISION,
+    'globe_values.json': GLOBE_MODE_PRECISION,
+    'globe_statistics.json': GLOBE_MODE_PRECISION,
+    'country_indicators.json': INDICATOR_PRECISION,
+    'region_aggregates.json': INDICATOR_PRECISION,
+    'country_detail_data.json': {**INDICATOR_PRECISION, 'population': 0},
+    'country_population_timeseries.json': INDICATOR_PRECISION,
+    'regional_population_nested.json': INDICATOR_PRECISION,
+    'birth_death_rates.json': INDICATOR_PRECISION,
+    'countries/<iso3>.json': {**INDICATOR_PRECISION, **PROJECTION_PRECISION},
+    'projection_uncertainty.json': PROJECTION_PRECISION,
+    'country_animation_data.json': ANIMATION_PRECISION,
+    'animation/<year>.json': ANIMATION_PRECISION,
+    'growth_drivers_data.json': {'population': 3, 'naturalChange': 2, 'migrationRate': 2},
+    'gender_gap_data.json': {'male': 1, 'female': 1, 'gap': 1},
+    'radar_chart_data.json': {'raw': 2, 'normalized': 4, 'mean': 2},
+    'radar_profiles.json': {'raw': 2, **{name: 3 for name in profiles.NORMALIZATIONS}},
+    # 'density' here is the share of countries in a bin, not population density
+    'ridgeline_data.json': {'age': 1, 'density': 4, 'mean': 2},
+    # ... and here integer density levels
+    'ridgeline_density.json': {'mean': 2, 'median': 2, 'bandwidth': 4, 'density': 0},
+    'geometry/<level>.json': {'centroid': 4, 'bbox': 4, 'label': 4, 'radius': 4}
+}
+
+# Stage registry - every output file, the shared inputs each stage takes, the columns it reads,
+# ('files') the options naming input files it reads and ('after') the stages whose artifacts it reads
+STAGES = [
+    {'name': 'globe', 'func': prepare_globe_data_by_year, 'args': ('df', 'output_dir'),
+     'outputs': ['globe_data_all_years.json'],
+     'columns': GLOBE_COLS},
+    {'name': 'globe_values', 'func': prepare_globe_values, 'args': ('df', 'geometry_path', 'output_dir'),
+     'files': ['geometry_path'],
+     'outputs': ['globe_values.json'],
+     'columns': GLOBE_COLS},
+    {'name': 'globe_statistics', 'func': prepare_globe_statistics, 'args': ('df', 'output_dir'),
+     'outputs': ['globe_statistics.json'],
+     'columns': GLOBE_COLS},
+    {'name': 'country_indicators', 'func': prepare_country_indicators, 'args': ('country_cube', 'output_dir'),
+     'outputs': ['country_indicators.json'],
+     'columns': CUBE_COLS},
+    {'name': 'binary_cube', 'func': prepare_binary_cube, 'args': ('df', 'output_dir'),
+     'outputs': ['cube/values.npy', 'cube/location_codes.npy', 'cube/years.npy', 'cube/index.json'],
+     'columns': CUBE_COLS + ['Location code']},
+    {'name': 'geometry', 'func': prepare_geometry, 'args': ('geometry_path', 'output_dir'),
+     'files': ['geometry_path'],
+     'outputs': [f'geometry/{name}.json' for name in LEVELS] + ['geometry/index.json'],
+     'columns': []},
+    {'name': 'region_aggregates', 'func': prepare_region_aggregates, 'args': ('country_cube', 'hierarchy', 'output_dir'),
+     'outputs': ['region_aggregates.json'],
+     'columns': ROW_COLS + HIERARCHY_COLS + CUBE_COLS},
+    {'name': 'country_detail', 'func': prepare_country_detail_data, 'args': ('country_cube', 'output_dir'),
+     'outputs': ['country_detail_data.json'],
+     'columns': CUBE_COLS},
+    {'name': 'regional_timeseries', 'func': prepare_regional_timeseries, 'args': ('df', 'output_dir'),
+     'outputs': ['regional_population_nested.json'],
+     'columns': ROW_COLS + TIMESERIES_COLS},
+    {'name': 'birth_death', 'func': prepare_birth_death_rates, 'args': ('df', 'output_dir'),
+     'outputs': ['birth_death_rates.json'],
+     'columns': ROW_COLS + RATE_COLS[:2]},
+    {'name': 'country_timeseries', 'func': prepare_country_timeseries, 'args': ('country_cube', 'output_dir'),
+     'outputs': ['country_population_timeseries.json'],
+     'columns': CUBE_COLS},
+    {'name': 'countries_list', 'func': prepare_countries_list, 'args': ('df', 'output_dir'),
+     'outputs': ['countries_list.json'],
+     'columns': ROW_COLS},
+    {'name': 'animation', 'func': prepare_animation_data,
+     'args': ('df', 'hierarchy', 'columnar', 'animation_tweens', 'output_dir'),
+     'outputs': ['country_animation_data.json', 'animation/index.json'],
+     'columns': ROW_COLS + HIERARCHY_COLS + [FERTILITY_COL, LIFE_COLS[0], POP_COL]},
+    {'name': 'region_metadata', 'func': create_region_metadata, 'args': ('output_dir',),
+     'outputs': ['region_metadata.json'],
+     'columns': []},
+    {'name': 'radar', 'func': prepare_radar_chart_data, 'args': ('df', 'hierarchy', 'country_cube', 'output_dir'),
+     'outputs': ['radar_chart_data.json'],
+     'columns': ROW_COLS + HIERARCHY_COLS + CUBE_COLS},
+    {'name': 'radar_profiles', 'func': prepare_radar_profiles, 'args': ('country_cube', 'hierarchy', 'output_dir'),
+     'outputs': ['radar_profiles.json'],
+     'columns': ROW_COLS + HIERARCHY_COLS + CUBE_COLS},
+    {'name': 'ridgeline', 'func': prepare_ridgeline_data, 'args': ('df', 'output_dir'),
+     'outputs': ['ridgeline_data.json'],
+     'columns': ROW_COLS + [DETAIL_COLS[2]]},
+    {'name': 'ridgeline_density', 'func': prepare_ridgeline_density,
+     'args': ('country_cube', 'ridgeline_bandwidth', 'output_dir'),
+     'outputs': ['ridgeline_density.json'],
+     'columns': CUBE_COLS},
+    {'name': 'growth_drivers', 'func': prepare_growth_drivers_data, 'args': ('df', 'hierarchy', 'columnar', 'output_dir'),
+     'outputs': ['growth_drivers_data.json'],
+     'columns': ROW_COLS + HIERARCHY_COLS + [RATE_COLS[2], RATE_COLS[3], POP_COL]},
+    {'name': 'gender_gap', 'func': prepare_gender_gap_data, 'args': ('country_cube', 'hierarchy', 'output_dir'),
+     'outputs': ['gender_gap_data.json'],
+     'columns': ROW_COLS + HIERARCHY_COLS + CUBE_COLS},
+    {'name': 'projection_uncertainty', 'func': prepare_projection_uncertainty,
+     'args': ('country_cube', 'projection_model', 'projection_horizon', 'output_dir'),
+     'outputs': ['projection_uncertainty.json'],
+     'columns': CUBE_COLS},
+    {'name': 'shards', 'func': prepare_shards, 'args': ('hierarchy', 'country_cube', 'output_dir'),
+     'after': ['globe', 'country_detail', 'country_timeseries', 'projection_uncertainty'],
+     'outputs': ['manifest.json'],
+     'columns': ROW_COLS + HIERARCHY_COLS + CUBE_COLS}
+]
+
+# Compression runs after every other stage, so any rebuilt artifact gets fresh .gz/.br siblings
+STAGES.append({'name': 'compress', 'func': prepare_compressed_artifacts, 'args': ('output_dir',),
+               'after': [stage['name'] for stage in STAGES],
+               'outputs': ['compression_manifest.json'],
+               'columns': []})
+
+STAGE_NAMES = [stage['name'] for stage in STAGES]
+
+# Every column the pipeline reads - the loader parses only these
+PIPELINE_COLUMNS = sorted({col for stage in STAGES for col in stage['columns']})
+
+
+def build_hierarchy(df):
+    """Location hierarchy is built once per process and shared by every stage"""
+    return LocationHierarchy.from_frame(df)
+
+
+def build_country_cube(df):
+    """Country x year x indicator cube, shared by the per-country views"""
+    return IndicatorCube.from_frame(df[df['Type'] == 'Country/Area'], COUNTRY_INDICATORS)
+
+
+# Derived inputs a stage can ask for in its 'args' (besides the cleaned frame 'df' and build options)
+SHARED_INPUTS = {
+    'hierarchy': build_hierarchy,
+    'country_cube': build_country_cube
+}
+
+
+def parse_year_range(text):
+    """'2000:2023' -> (2000, 2023); either end may be left open ('2000:', ':1990'), '2015' is one year"""
+    first, separator, last = text.partition(':')
+    try:
+        first = int(first) if first else None
+        last = (int(last) if last else None) if separator else first
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid year range {text!r} (expected FIRST:LAST, e.g. 2000:2023)")
+    if first is not None and last is not None and first > last:
+        raise argparse.ArgumentTypeError(f"invalid year range {text!r} (first year after last year)")
+    return first, last
+
+
+def parse_bandwidth(text):
+    """'scott' / 'silverman' -> the rule name; a positive number -> the bandwidth factor itself"""
+    if text in BANDWIDTH_RULES:
+        return text
+    try:
+        factor = float(text)
+    except ValueError:
+        factor = 0
+    if not factor > 0:
+        raise argparse.ArgumentTypeError(
+            f"invalid bandwidth {text!r} (choose from {', '.join(BANDWIDTH_RULES)} or give a positive factor)")
+    return factor
+
+
+def parse_list(text):
+    """'a,b, c' -> ['a', 'b', 'c']"""
+    return [item.strip() for item in text.split(',') if item.strip()]
+
+
+def parse_args(argv=None):
+    """Command-line options"""
+    parser = argparse.ArgumentParser(description="Prepare JSON data files for the D3.js dashboard")
+    parser.add_argument('--input', default=INPUT_CSV, metavar='CSV',
+                        help=f"UN World Population Prospects CSV (default: {INPUT_CSV})")
+    parser.add_argument('--geometry', default=GEOMETRY_PATH, metavar='GEOJSON',
+                        help=f"country polygons for the globe geometry levels (default: {GEOMETRY_PATH})")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, metavar='DIR',
+                        help=f"directory the artifacts, build manifest and snapshot are written to (default: {OUTPUT_DIR})")
+    parser.add_argument('--only', type=parse_list, metavar='STAGE,...',
+                        help=f"run only these stages (and stale stages they read from): {', '.join(STAGE_NAMES)}")
+    parser.add_argument('--years', type=parse_year_range, metavar='FIRST:LAST',
+                        help="keep only these years, e.g. 2000:2023 (filtered before any stage runs)")
+    parser.add_argument('--countries', type=lambda text: [code.upper() for code in parse_list(text)],
+                        metavar='ISO3,...', help="keep only these countries, e.g. FRA,DEU (regions are kept)")
+    parser.add_argument('--projection-model', choices=sorted(MODELS), default=DEFAULT_OPTIONS['projection_model'],
+                        help=f"population trend model for projection_uncertainty.json (default: {DEFAULT_OPTIONS['projection_model']})")
+    parser.add_argument('--projection-horizon', type=int, default=DEFAULT_OPTIONS['projection_horizon'], metavar='YEAR',
+                        help=f"last projected year, e.g. 2100 (default: {DEFAULT_OPTIONS['projection_horizon']})")
+    parser.add_argument('--animation-tweens', type=int, default=DEFAULT_OPTIONS['animation_tweens'], metavar='N',
+                        help="interpolated animation frames between consecutive years (default: 0, keyframes only)")
+    parser.add_argument('--ridgeline-bandwidth', type=parse_bandwidth, default=DEFAULT_OPTIONS['ridgeline_bandwidth'],
+                        metavar='RULE', help="KDE bandwidth of ridgeline_density.json: scott, silverman or a factor "
+                                             f"of each sample's standard deviation (default: {DEFAULT_OPTIONS['ridgeline_bandwidth']})")
+    parser.add_argument('--force', action='store_true',
+                        help="re-parse the CSV and rebuild every artifact, ignoring the snapshot and build manifest")
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help="run independent stages on N worker processes (default: 1, serial)")
+    parser.add_argument('--columnar', action='store_true',
+                        help="write animation and growth drivers data in the compact columnar layout")
+    parser.add_argument('--profile', action='store_true',
+                        help=f"measure time, memory and I/O of every stage that runs; report in <output-dir>/{PROFILE_DIR_NAME}/")
+    parser.add_argument('--profile-dump', action='store_true',
+                        help="with --profile, re-run the slowest stage under cProfile and save its stats")
+    args = parser.parse_args(argv)
+    
+    unknown = sorted(set(args.only or ()) - set(STAGE_NAMES))
+    if unknown:
+        parser.error(f"unknown stage(s) for --only: {', '.join(unknown)} (choose from {', '.join(STAGE_NAMES)})")
+    if args.animation_tweens < 0:
+        parser.error("--animation-tweens must be 0 or more")
+    return args
+
+
+def select_stages(stages, names):
+    """`names` plus, transitively, every stage they read artifacts from ('after')"""
+    by_name = {stage['name']: stage for stage in stages}
+    selected, pending = set(), list(names)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(by_name[name].get('after', ()))
+    return selected
+
+
+def write_profile_report(report, df, options, profile_dir, dump=False):
+    """
+    Save the --profile report as JSON and print its summary table
+    With `dump`, the slowest stage is re-run under cProfile (its outputs are rewritten unchanged)
+    """
+    if report['stages']:
+        report['slowest'] = max(report['stages'], key=lambda name: report['stages'][name]['wall_seconds'])
+        if dump:
+            print(f"\nRe-running {report['slowest']} under cProfile...")
+            stage = next(stage for stage in STAGES if stage['name'] == report['slowest'])
+            run_stages([stage], df, SHARED_INPUTS, options=options, dump_dir=profile_dir)
+            report['dump'] = os.path.join(profile_dir, f"{report['slowest']}.prof")
+    report['process_max_rss'] = max_rss()
+    
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, 'report.json')
+    write_json(path, report)
+    
+    print("\n" + "=" * 80)
+    print("STAGE PROFILE")
+    print("=" * 80)
+    print(summary_table(report))
+    if report.get('dump'):
+        print(f"\nTop functions of {report['slowest']} (cumulative time):")
+        pstats.Stats(report['dump']).sort_stats('cumulative').print_stats(15)
+    print(f"\n✓ Profile report: {path}")
+
+
+def main(argv=None):
     """Main preprocessing pipeline"""
     print("=" * 80)
     print("DATA PREPROCESSING FOR D3.JS DASHBOARD - ENHANCED VERSION")
     print("=" * 80)
     
-    # Load data
-    df = load_and_clean_data()
-    
-    # Generate original data files
-    prepare_globe_data_by_year(df)
-    prepare_country_detail_data(df)
-    prepare_regional_timeseries(df)
-    prepare_birth_death_rates(df)
-    prepare_country_timeseries(df)
-    prepare_countries_list(df)
-    prepare_animation_data(df)
-    create_region_metadata()
-    
-    # Generate NEW advanced visualization data files
-    prepare_radar_chart_data(df)
-    prepare_ridgeline_data(df)
-    prepare_growth_drivers_data(df)
-    prepare_gender_gap_data(df)
-    prepare_projection_uncertainty(df)
+    args = parse_args(argv)
+    
+    # Build options a stage can take as an argument (part of the stage fingerprint)
+    options = {'columnar': args.columnar, 'output_dir': args.output_dir,
+               'projection_model': args.projection_model, 'projection_horizon': args.projection_horizon,
+               'geometry_path': args.geometry, 'animation_tweens': args.animation_tweens,
+               'ridgeline_bandwidth': args.ridgeline_bandwidth}
+    os.makedirs(args.output_dir, exist_ok=True)
+    
+    # Row filters are applied once, right after loading, so every stage works on the reduced frame
+    selection = {'years': args.years, 'countries': sorted(args.countries) if args.countries else None}
+    
+    def load_frame():
+        return load_and_clean_data(PIPELINE_COLUMNS, refresh=args.force, csv_path=args.input,
+                                   snapshot_dir=os.path.join(args.output_dir, SNAPSHOT_DIR_NAME), **selection)
+    
+    # Every stage fingerprint covers this whole script (the helpers and constants the stages call,
+    # not only the stage functions) and every build module that shapes an artifact
+    # Fingerprint the input (CSV, loader code and row selection); stored column hashes are only
+    # reused while it is unchanged
+    cache = BuildCache(args.output_dir, enabled=not args.force, options=options,
+                       shared_sources=(sys.modules[__name__], location_hierarchy, indicator_cube, aggregate_cube,
+                                       binary_cube, geometry, color_domains, density, keyframes, profiles,
+                                       record_builder, json_writer, projection, precompress))
+    input_changed = cache.set_input(args.input, load_and_clean_data, select_rows, ingest, frame_store,
+                                    selection=json.dumps(selection, sort_keys=True))
+    
+    # Per-stage measurements with --profile (StageMonitor metrics, sizes in bytes)
+    report = {'jobs': args.jobs, 'load': None, 'stages': {}, 'slowest': None, 'dump': None} if args.profile else None
+    
+    def load():
+        if report is None:
+            return load_frame()
+        with StageMonitor() as monitor:
+            frame = load_frame()
+        report['load'] = {**monitor.metrics, 'rows_read': len(frame)}
+        return frame
+    
+    def record_profile(stage, metrics):
+        report['stages'][stage['name']] = metrics
+    
+    df = None
+    if input_changed:
+        df = load()
+        cache.hash_columns(df, {col for stage in STAGES for col in stage['columns']})
+    
+    stale = cache.stale_stages(STAGES)
+    selected = select_stages(STAGES, args.only) if args.only else set(STAGE_NAMES)
+    for stage in STAGES:
+        if stage['name'] not in selected:
+            print(f"\n- {', '.join(stage['outputs'])} not selected (skipped)")
+        elif stage not in stale:
+            print(f"\n✓ {', '.join(stage['outputs'])} is up to date (skipped)")
+    stale = [stage for stage in stale if stage['name'] in selected]
+    
+    if stale:
+        if df is None:
+            df = load()
+            cache.hash_columns(df, {col for stage in stale for col in stage['columns']})
+        
+        # Generate every stale data file (independent stages run in parallel with --jobs)
+        run_stages(stale, df, SHARED_INPUTS, options=options, jobs=args.jobs, on_complete=cache.record,
+                   on_profile=record_profile if report is not None else None)
+    
+    cache.save()
+    
+    if report is not None:
+        write_profile_report(report, df, options, os.path.join(args.output_dir, PROFILE_DIR_NAME),
+                             dump=args.profile_dump)
     
     print("\n" + "=" * 80)
     print("PREPROCESSING COMPLETE!")
     print("=" * 80)
-    print("\nGenerated files in data/ directory:")
+    print(f"\nGenerated files in {args.output_dir}/ directory:")
     print("\n=== ORIGINAL FILES ===")
     print("  1. globe_data_all_years.json - Globe visualization (all years)")
-    print("  2. country_detail_data.json - Country detail charts")
+    print("     globe_values.json - Per-mode choropleth arrays aligned to the globe features")
+    print("     globe_statistics.json - Color domains, class breaks and histograms per globe mode and year")
+    print("  2. country_detail_data.json - Country detail charts (view of the indicator cube)")
     print("  3. regional_population_nested.json - Regional time-series")
-    print("  4. birth_death_rates.json - Small multiples")
-    print("  5. country_population_timeseries.json - Country comparisons")
+    print("  4. birth_death_rates.json - Small multiples (regions)")
+    print("  5. country_population_timeseries.json - Country comparisons (view of the indicator cube)")
     print("  6. countries_list.json - List of all countries")
     print("  7. country_animation_data.json - Animation data")
+    print("     animation/ - Year-keyed animation frames (index.json + one file per year)")
     print("  8. region_metadata.json - Region colors")
     print("\n=== NEW ADVANCED VISUALIZATION FILES ===")
     print("  9. radar_chart_data.json - Country DNA Profile (Radar Charts)")
+    print("     radar_profiles.json - Radar profiles of every country and year (min-max and percentile rank)")
     print(" 10. ridgeline_data.json - Global Ageing Distribution (Ridgeline)")
+    print("     ridgeline_density.json - Annual KDE densities of the ridgeline indicators")
     print(" 11. growth_drivers_data.json - Natural Change vs Migration (Scatter)")
     print(" 12. gender_gap_data.json - Life Expectancy Gender Gaps (Slopegraph)")
-    print(" 13. projection_uncertainty.json - Population Projections with Confidence Bands (2024-2030)")
+    print(" 13. projection_uncertainty.json - Population Projections with Confidence Bands")
+    print("\n=== CANONICAL COUNTRY STORE ===")
+    print(" 14. country_indicators.json - Country x year x indicator cube with units")
+    print(" 15. region_aggregates.json - World/region/subregion x year x indicator statistics")
+    print(" 16. cube/ - Memory-mapped float32 location x year x indicator cube (binary_cube.open_cube)")
+    print(" 17. geometry/ - Quantized TopoJSON globe geometry at several detail levels")
+    print("\n=== LAZY LOADING SHARDS ===")
+    print(" 18. manifest.json - Shard index (globe/<year>.json, countries/<ISO3>.json)")
+    print(" 19. compression_manifest.json - Precompressed .gz/.br variants with sizes and ETags")
+    print(f"\nRebuilt {len(stale)} of {len(STAGES)} stages (build manifest: {cache.path})")
     print("\nReady for enhanced D3.js visualizations! 🚀\n")
 
 
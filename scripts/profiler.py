@@ -0,0 +1,160 @@
+"""
+Stage Profiler
+Measures one pipeline stage at a time when prepare_dataviz.py runs with --profile:
+wall/CPU time, peak RSS, tracemalloc peak, rows read, records emitted and bytes written
+"""
+
+import cProfile
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+import json_writer
+
+# How often the background thread samples the resident set size
+RSS_INTERVAL = 0.01
+
+
+def current_rss():
+    """Resident set size of this process in bytes (None where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def max_rss():
+    """High-water mark of the resident set size over the process lifetime, in bytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def io_counters():
+    """(bytes read, bytes written) by this process so far, from /proc/self/io (None if unavailable)"""
+    try:
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(':') for line in f if ':' in line)
+        return int(fields['rchar']), int(fields['wchar'])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def rows_of(value):
+    """Number of rows a stage input holds (frames, the cube, the hierarchy)"""
+    if isinstance(value, pd.DataFrame):
+        return len(value)
+    if hasattr(value, 'values') and hasattr(value, 'years'):
+        return value.values.shape[0] * value.values.shape[1]
+    if isinstance(getattr(value, 'index', None), pd.DataFrame):
+        return len(value.index)
+    return 0
+
+
+class StageMonitor:
+    """
+    Context manager measuring the code run inside it
+    `inputs` are the stage's resolved arguments (used for rows read); with `dump_path`
+    the stage also runs under cProfile and the stats are dumped there
+    After exit, `metrics` holds the measurements (sizes in bytes)
+    """
+
+    def __init__(self, inputs=(), dump_path=None):
+        self.inputs = inputs
+        self.dump_path = dump_path
+        self.metrics = None
+        self._peak_rss = 0
+        self._sampling = threading.Event()
+
+    def _sample_rss(self):
+        while not self._sampling.wait(RSS_INTERVAL):
+            self._peak_rss = max(self._peak_rss, current_rss() or 0)
+
+    def __enter__(self):
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._traced_start = tracemalloc.get_traced_memory()[0]
+
+        self._writes_start = dict(json_writer.WRITE_STATS)
+        self._io_start = io_counters()
+        self._rss_start = current_rss()
+        self._peak_rss = self._rss_start or 0
+        self._sampler = threading.Thread(target=self._sample_rss, daemon=True)
+        self._sampler.start()
+
+        self._profile = cProfile.Profile() if self.dump_path else None
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        if self._profile:
+            self._profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._profile:
+            self._profile.disable()
+        wall = time.perf_counter() - self._wall_start
+        cpu = time.process_time() - self._cpu_start
+
+        self._sampling.set()
+        self._sampler.join()
+        rss_end = current_rss()
+        peak_rss = max(self._peak_rss, rss_end or 0) or max_rss()
+
+        traced_peak = tracemalloc.get_traced_memory()[1] - self._traced_start
+        if self._started_tracing:
+            tracemalloc.stop()
+
+        writes = {key: json_writer.WRITE_STATS[key] - self._writes_start[key] for key in json_writer.WRITE_STATS}
+        io_end = io_counters()
+        if self._io_start and io_end:
+            bytes_read, bytes_written = (end - start for start, end in zip(self._io_start, io_end))
+        else:
+            bytes_read, bytes_written = None, writes['bytes']
+
+        if self._profile:
+            os.makedirs(os.path.dirname(self.dump_path) or '.', exist_ok=True)
+            self._profile.dump_stats(self.dump_path)
+
+        self.metrics = {
+            'wall_seconds': round(wall, 4),
+            'cpu_seconds': round(cpu, 4),
+            'rss_start': self._rss_start,
+            'peak_rss': peak_rss,
+            'tracemalloc_peak': traced_peak,
+            'rows_read': sum(rows_of(value) for value in self.inputs),
+            'records_emitted': writes['records'],
+            'files_written': writes['files'],
+            'bytes_read': bytes_read,
+            'bytes_written': bytes_written
+        }
+        return False
+
+
+def _megabytes(value):
+    return f"{value / 1e6:9.1f}" if value is not None else f"{'-':>9}"
+
+
+def summary_table(report):
+    """Fixed-width summary of a profile report: the loader, then one line per stage, slowest first"""
+    lines = [
+        f"{'stage':<24} {'wall s':>8} {'cpu s':>8} {'peak RSS':>9} {'traced':>9} {'rows':>9} "
+        f"{'records':>9} {'MB out':>9}",
+        f"{'':<24} {'':>8} {'':>8} {'MB':>9} {'MB':>9}"
+    ]
+    entries = sorted(report['stages'].items(), key=lambda item: item[1]['wall_seconds'], reverse=True)
+    if report.get('load'):
+        entries.insert(0, ('load_and_clean_data', report['load']))
+    for name, metrics in entries:
+        lines.append(
+            f"{name:<24} {metrics['wall_seconds']:8.3f} {metrics['cpu_seconds']:8.3f} "
+            f"{_megabytes(metrics['peak_rss'])} {_megabytes(metrics['tracemalloc_peak'])} "
+            f"{metrics['rows_read']:9,} {metrics['records_emitted']:9,} {_megabytes(metrics['bytes_written'])}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,50 @@
+"""
+Radar Profiles
+Indicator profiles of every country and year scaled to 0-1 against that year's countries:
+min-max position and percentile rank, for country values and for group averages alike
+"""
+
+import numpy as np
+
+# Normalizations in artifact order
+NORMALIZATIONS = ['minmax', 'percentile']
+
+
+def minmax_scale(values, reference):
+    """
+    Position of `values` between the smallest and largest `reference` value, clamped to [0, 1]
+    `reference` is (members, ...) and `values` (k, ...) with the same trailing axes; NaN where a
+    value is missing or the members have no spread
+    """
+    # fmin/fmax skip NaN, and give NaN (without a warning) when every member is missing
+    low, high = np.fmin.reduce(reference, axis=0), np.fmax.reduce(reference, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scaled = (values - low) / (high - low)
+    return np.where(high > low, np.clip(scaled, 0, 1), np.nan)
+
+
+def percentile_ranks(values, reference):
+    """
+    Mid-rank percentile of `values` among the `reference` members: (members below + half the members
+    equal) / members with a value, so a member in a set of n ranks from 0.5 / n to 1 - 0.5 / n
+    Shapes as in minmax_scale; one broadcast comparison of every value with every member
+    """
+    valid = ~np.isnan(reference)
+    below = (reference[None] < values[:, None]).sum(1)
+    equal = (reference[None] == values[:, None]).sum(1)
+    count = valid.sum(0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ranks = (below + 0.5 * equal) / count
+    return np.where(np.isnan(values) | (count == 0), np.nan, ranks)
+
+
+def normalize(values, reference, inverted=()):
+    """
+    {normalization: scaled values} of `values` (k, years, indicators) against `reference`
+    (members, years, indicators); indicator positions in `inverted` are flipped (1 - x), for
+    indicators where lower is better
+    """
+    scaled = {'minmax': minmax_scale(values, reference), 'percentile': percentile_ranks(values, reference)}
+    flip = np.zeros(values.shape[-1], dtype=bool)
+    flip[list(inverted)] = True
+    return {name: np.where(flip, 1 - array, array) for name, array in scaled.items()}
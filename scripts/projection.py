@@ -0,0 +1,131 @@
+"""
+Population Projections
+Batched trend models for every country at once: closed-form least squares over a padded
+country x year matrix (NaN where missing), with residual-bootstrap uncertainty bands
+"""
+
+import numpy as np
+
+# Trend models: fit on log values or raw values, and the per-year damping of the slope
+# (1.0 = straight line; below 1 the trend flattens out, see trend_steps)
+MODELS = {
+    'linear': {'log': False, 'damping': 1.0},
+    'log_linear': {'log': True, 'damping': 1.0},
+    'damped': {'log': False, 'damping': 0.9}
+}
+
+# Band names and their central coverage
+LEVELS = {'50': 0.5, '95': 0.95}
+
+# Fields of a projection: the central trend and the band edges
+PROJECTION_FIELDS = ['median'] + [f'{side}_{name}' for name in LEVELS for side in ('lower', 'upper')]
+
+# Bootstrap samples per country, and the most (country, sample, year) cells held in memory at once
+BOOTSTRAP_SAMPLES = 200
+CHUNK_CELLS = 2_000_000
+
+
+def trend_steps(steps, damping):
+    """Slope multiplier h steps ahead: h for a straight trend, phi + phi^2 + ... + phi^h when damped"""
+    steps = np.asarray(steps, dtype=float)
+    if damping == 1.0:
+        return steps
+    return damping * (1 - damping ** steps) / (1 - damping)
+
+
+def fit_trends(t, y, mask):
+    """
+    Least-squares lines through the masked points of every row, in closed form
+    t, y and mask broadcast to (..., points); returns (level at t = 0, slope), each of shape (...)
+    """
+    n = mask.sum(-1)
+    t_mean = np.where(mask, t, 0).sum(-1) / n
+    y_mean = np.where(mask, y, 0).sum(-1) / n
+    dt = np.where(mask, t - t_mean[..., None], 0)
+    slope = (dt * np.where(mask, y - y_mean[..., None], 0)).sum(-1) / (dt * dt).sum(-1)
+    return y_mean - slope * t_mean, slope
+
+
+def _draws(rng, n, shape):
+    """Uniform indices below n[i] for every row i, each row of `shape`"""
+    return (rng.random((len(n),) + shape) * n[:, None, None]).astype(int)
+
+
+def _quantiles(values, quantiles):
+    """
+    np.quantile(values, quantiles, axis=-1) with linear interpolation, from one sort of the last axis
+    (a full sort of a few hundred samples is much faster than np.quantile's repeated partitioning)
+    """
+    ordered = np.sort(values, axis=-1)
+    position = np.asarray(quantiles) * (values.shape[-1] - 1)
+    below = np.floor(position).astype(int)
+    above = np.minimum(below + 1, values.shape[-1] - 1)
+    weight = position - below
+    return np.stack([ordered[..., lo] * (1 - w) + ordered[..., hi] * w for lo, hi, w in zip(below, above, weight)])
+
+
+def project(years, values, horizon, model='linear', window=10, min_points=5,
+            samples=BOOTSTRAP_SAMPLES, seed=0):
+    """
+    Project every row of `values` (rows x years) from the last year to `horizon`
+    The trend is fitted on the last `window` years; rows with fewer than `min_points` usable
+    values there are dropped. Bands come from a residual bootstrap: each sample refits the trend
+    on the fitted values plus resampled residuals and adds one more resampled residual per year,
+    so they widen with the parameter uncertainty
+    Returns {'rows', 'years', 'median', 'lower_50', 'upper_50', ...} with (rows, years) arrays
+    """
+    spec = MODELS[model]
+    years = np.asarray(years)
+    base_year = years[-1]
+    future = np.arange(base_year + 1, horizon + 1)
+    steps = trend_steps(future - base_year, spec['damping'])
+
+    # Window relative to the base year, so the fitted level is the trend value in the last year
+    t = (years[-window:] - base_year).astype(float)
+    y = np.asarray(values, dtype=float)[:, -window:]
+    mask = ~np.isnan(y)
+    if spec['log']:
+        mask &= y > 0
+        y = np.log(np.where(mask, y, 1))
+
+    rows = np.flatnonzero(mask.sum(1) >= min_points)
+    y, mask = y[rows], mask[rows]
+    n = mask.sum(1)
+
+    level, slope = fit_trends(t, y, mask)
+    point = level[:, None] + slope[:, None] * steps
+
+    # Residuals packed to the front of each row (n[i] valid entries), inflated for the two fitted parameters
+    fitted = level[:, None] + slope[:, None] * t
+    residuals = np.where(mask, y - fitted, 0) * np.sqrt(n / (n - 2))[:, None]
+    residuals = np.take_along_axis(residuals, np.argsort(~mask, axis=1, kind='stable'), axis=1)
+
+    quantiles = [q for coverage in LEVELS.values() for q in ((1 - coverage) / 2, (1 + coverage) / 2)]
+    bands = np.empty((len(quantiles), len(rows), len(future)))
+    rng = np.random.default_rng(seed)
+    chunk = max(1, CHUNK_CELLS // (samples * max(len(t), len(future))))
+
+    for start in range(0, len(rows), chunk):
+        part = slice(start, start + chunk)
+        pool, index = residuals[part], np.arange(len(residuals[part]))[:, None, None]
+
+        # (row, sample, year) refits, then (row, year, sample) forecasts so quantiles reduce the last axis
+        sample_level, sample_slope = fit_trends(
+            t, fitted[part, None, :] + pool[index, _draws(rng, n[part], (samples, len(t)))], mask[part, None, :])
+        forecasts = (sample_level[:, None, :] + steps[None, :, None] * sample_slope[:, None, :]
+                     + pool[index, _draws(rng, n[part], (len(future), samples))])
+        bands[:, part] = _quantiles(forecasts, quantiles)
+
+    if spec['log']:
+        point, bands = np.exp(point), np.exp(bands)
+    else:
+        # A trend falling below zero keeps the last observed value; bands stop at zero
+        last = np.take_along_axis(y, (mask.shape[1] - 1 - np.argmax(mask[:, ::-1], axis=1))[:, None], axis=1)
+        point = np.where(point < 0, last, point)
+        bands = np.maximum(bands, 0)
+
+    result = {'rows': rows, 'years': future, 'median': point}
+    for i, name in enumerate(LEVELS):
+        result[f'lower_{name}'] = np.minimum(bands[2 * i], point)
+        result[f'upper_{name}'] = np.maximum(bands[2 * i + 1], point)
+    return result
@@ -0,0 +1,353 @@
+"""
+Query API Server
+Answers slice queries from an in-memory store built once from the cleaned frame, instead of
+shipping whole artifacts: /api/country/<ISO3>, /api/year/<Y> and /api/region/<name>
+Responses are cached (LRU) with their compressed bodies; other paths are served like serve.py
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import threading
+from collections import OrderedDict
+from functools import partial
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlencode, urlsplit
+
+import numpy as np
+
+import prepare_dataviz as pipeline
+from aggregate_cube import STATISTICS, AggregateCube, location_groups
+from json_writer import dumps
+from precompress import ENCODINGS, available_encodings, etag
+from serve import PrecompressedRequestHandler, negotiate
+
+API_PREFIX = '/api/'
+
+# Globe record fields each globe mode reads: the fields it colors by (the pipeline's GLOBE_MODE_FIELDS,
+# as in globe_values.json) followed by the ones its tooltip shows; every record keeps GLOBE_KEYS
+GLOBE_KEYS = ['country', 'alpha3_code', 'rank']
+GLOBE_TOOLTIP_FIELDS = {
+    'population': ['population'],
+    'density': ['population_density', 'population'],
+    'sex-ratio': ['sex_ratio'],
+    'median-age': ['median_age'],
+    'demographic-transition': ['birth_rate', 'death_rate_number', 'death_rate'],
+    'growth-drivers': ['natural_change', 'migration_rate_number', 'migration_rate'],
+    'longevity-gap': ['life_expectancy'],
+    'fertility-health': ['fertility_rate'],
+    'healthcare-quality': ['infant_mortality']
+}
+MODE_RECORD_FIELDS = {mode: fields + GLOBE_TOOLTIP_FIELDS.get(mode, [])
+                      for mode, fields in pipeline.GLOBE_MODE_FIELDS.items()}
+
+# Precision of each endpoint: that of the artifact its responses mirror
+PRECISION = {
+    'country': pipeline.ARTIFACT_PRECISION['countries/<iso3>.json'],
+    'year': pipeline.ARTIFACT_PRECISION['globe/<year>.json'],
+    'region': pipeline.ARTIFACT_PRECISION['region_aggregates.json']
+}
+
+# Default number of cached responses
+CACHE_ENTRIES = 512
+
+
+class QueryError(Exception):
+    """A request that cannot be answered; carries the HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_years(text):
+    """'2000:2023' / '2000:' / ':1990' / '2015' -> (first, last) for the `years` query parameter"""
+    try:
+        return pipeline.parse_year_range(text)
+    except argparse.ArgumentTypeError as error:
+        raise QueryError(HTTPStatus.BAD_REQUEST, str(error))
+
+
+def _in_years(year, years):
+    first, last = years
+    return (first is None or year >= first) and (last is None or year <= last)
+
+
+class QueryStore:
+    """
+    Everything the endpoints slice, built once at startup with the pipeline's own record builders,
+    so responses have the shapes of the artifacts (and shards) DataLoader reads
+    """
+
+    def __init__(self, df, projection_model='linear', projection_horizon=2030):
+        hierarchy = pipeline.build_hierarchy(df)
+        self.cube = pipeline.build_country_cube(df)
+        self.aggregates = AggregateCube.from_cube(self.cube, location_groups(hierarchy, self.cube.countries))
+
+        self.globe, self.globe_offsets, _ = pipeline.globe_records(df)
+        self.detail = self._by_country(*pipeline.country_detail_records(self.cube))
+        self.timeseries = self._by_country(*pipeline.country_timeseries_records(self.cube))
+        self.birth_death = self._by_country(*pipeline.country_birth_death_records(self.cube))
+        self.projections = {}
+        for record in pipeline.projection_records(self.cube, projection_model, projection_horizon):
+            self.projections.setdefault(record['country'], []).append(record)
+
+        self.regional = {entry['region']: entry['values'] for entry in pipeline.regional_timeseries(df)}
+        self.regional_birth_death = {entry['region']: entry['values'] for entry in pipeline.regional_birth_death(df)}
+
+        region_map = hierarchy.region_map()
+        self.countries = {}
+        for country, iso3 in hierarchy.iso3_map().items():
+            if isinstance(iso3, str) and iso3:
+                self.countries[iso3.upper()] = (country, region_map.get(country, 'Unknown'))
+        self.country_index = {name: i for i, name in enumerate(self.cube.countries)}
+        self.groups = {name.lower(): i for i, (name, *_) in enumerate(self.aggregates.groups)}
+        self.indicators = {indicator['key']: i for i, indicator in enumerate(self.cube.indicators)}
+
+    @staticmethod
+    def _by_country(stream, offsets):
+        return {country: (stream, start, stop) for country, start, stop in offsets}
+
+    def manifest(self):
+        """Shard index in the layout of manifest.json, pointing at the API endpoints"""
+        return {
+            'version': 1,
+            'globe': {str(year): {'path': f'year/{year}'} for year in self.globe_offsets},
+            'countries': {iso3: {'path': f'country/{iso3}', 'country': country}
+                          for iso3, (country, _) in self.countries.items()}
+        }
+
+    def country(self, iso3, indicators=None, years=None):
+        """
+        The country shard (detail, timeseries, birthDeath, projection), or with `indicators` a
+        one-country slice of the indicator cube in the country_indicators.json layout
+        """
+        if iso3.upper() not in self.countries:
+            raise QueryError(HTTPStatus.NOT_FOUND, f"unknown country {iso3!r}")
+        country, region = self.countries[iso3.upper()]
+        years = years or (None, None)
+
+        if indicators:
+            unknown = [key for key in indicators if key not in self.indicators]
+            if unknown:
+                raise QueryError(HTTPStatus.BAD_REQUEST, f"unknown indicator(s): {', '.join(unknown)} "
+                                                         f"(choose from {', '.join(self.indicators)})")
+            keep = np.array([_in_years(int(year), years) for year in self.cube.years], dtype=bool)
+            row = self.country_index.get(country)
+            values = self.cube.values[row][keep] if row is not None else np.empty((0, len(self.indicators)))
+            return {
+                'format': 'cube',
+                'version': 1,
+                'countries': {'name': [country], 'iso3': [iso3.upper()]},
+                'years': self.cube.years[keep].tolist() if row is not None else [],
+                'indicators': [{name: self.cube.indicators[self.indicators[key]][name] for name in ('key', 'label', 'unit')}
+                               for key in indicators],
+                'values': {key: values[:, self.indicators[key]] for key in indicators}
+            }
+
+        def records(table):
+            if country not in table:
+                return []
+            stream, start, stop = table[country]
+            return [record for record in stream.records(start, stop) if _in_years(record['year'], years)]
+
+        return {
+            'country': country,
+            'iso3': iso3.upper(),
+            'region': region,
+            # Written as whole people in country_detail_data.json
+            'detail': [{**record, 'population': round(record['population'])} for record in records(self.detail)],
+            'timeseries': records(self.timeseries),
+            'birthDeath': records(self.birth_death),
+            'projection': [record for record in self.projections.get(country, [])
+                           if _in_years(record['year'], years)]
+        }
+
+    def year(self, year, mode=None):
+        """Globe records of one year (as in globe/<year>.json), optionally only the fields of one globe mode"""
+        if year not in self.globe_offsets:
+            raise QueryError(HTTPStatus.NOT_FOUND, f"no globe data for {year}")
+        records = self.globe.records(*self.globe_offsets[year])
+        if mode is None:
+            return list(records)
+        if mode not in MODE_RECORD_FIELDS:
+            raise QueryError(HTTPStatus.BAD_REQUEST, f"unknown mode {mode!r} (choose from {', '.join(MODE_RECORD_FIELDS)})")
+        fields = GLOBE_KEYS + MODE_RECORD_FIELDS[mode]
+        return [{field: record[field] for field in fields} for record in records]
+
+    def region(self, name, years=None):
+        """
+        Series of a world/region/subregion: the regional time-series and birth/death records (Regions only)
+        plus every aggregate statistic, as {statistic: {indicator: [value per year]}}
+        """
+        if name.lower() not in self.groups:
+            raise QueryError(HTTPStatus.NOT_FOUND, f"unknown region {name!r}")
+        group = self.groups[name.lower()]
+        name, level, parent, _ = self.aggregates.groups[group]
+        years = years or (None, None)
+        keep = np.array([_in_years(int(year), years) for year in self.aggregates.years], dtype=bool)
+
+        aggregates = {statistic: {key: self.aggregates.statistics[statistic][group, keep, axis]
+                                  for key, axis in self.indicators.items()}
+                      for statistic in STATISTICS}
+        aggregates['total'] = {key: values[group, keep] for key, values in self.aggregates.totals.items()}
+        return {
+            'region': name,
+            'type': level,
+            'parent': parent,
+            'timeseries': [record for record in self.regional.get(name, []) if _in_years(record['year'], years)],
+            'birthDeath': [record for record in self.regional_birth_death.get(name, [])
+                           if _in_years(record['year'], years)],
+            'years': self.aggregates.years[keep].tolist(),
+            'aggregates': aggregates
+        }
+
+    def query(self, path, params):
+        """Route an API path (without the /api/ prefix) and its query parameters to an endpoint"""
+        def param(name):
+            values = params.get(name)
+            return values[-1] if values else None
+
+        years = parse_years(param('years')) if param('years') else None
+        parts = [unquote(part) for part in path.strip('/').split('/')]
+        if parts == ['manifest']:
+            return self.manifest()
+        if len(parts) == 2 and parts[0] == 'country':
+            indicators = pipeline.parse_list(param('indicators')) if param('indicators') else None
+            return self.country(parts[1], indicators, years)
+        if len(parts) == 2 and parts[0] == 'year':
+            try:
+                year = int(parts[1])
+            except ValueError:
+                raise QueryError(HTTPStatus.BAD_REQUEST, f"invalid year {parts[1]!r}")
+            return self.year(year, param('mode'))
+        if len(parts) == 2 and parts[0] == 'region':
+            return self.region(parts[1], years)
+        raise QueryError(HTTPStatus.NOT_FOUND, f"unknown endpoint /api/{path}")
+
+
+class ResponseCache:
+    """
+    Least-recently-used cache of encoded responses: the JSON body, its hash and
+    its compressed variants (compressed once, when the response is first built)
+    """
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry, True
+            self.misses += 1
+
+        body = build().encode('utf-8')
+        entry = {'sha256': hashlib.sha256(body).hexdigest(), 'bodies': {None: body}}
+        for encoding in available_encodings():
+            entry['bodies'][encoding] = ENCODINGS[encoding][1](body)
+
+        with self._lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry, False
+
+
+class QueryRequestHandler(PrecompressedRequestHandler):
+    """/api/ requests are answered from the QueryStore through the ResponseCache; the rest is static"""
+
+    def __init__(self, *args, store, cache, **kwargs):
+        self.store = store
+        self.cache = cache
+        super().__init__(*args, **kwargs)
+
+    def send_head(self):
+        url = urlsplit(self.path)
+        if not url.path.startswith(API_PREFIX):
+            return super().send_head()
+
+        params = parse_qs(url.query)
+        key = url.path + '?' + urlencode(sorted((name, values[-1]) for name, values in params.items()))
+        path = url.path[len(API_PREFIX):]
+        precision = PRECISION.get(path.split('/')[0])
+        try:
+            entry, hit = self.cache.get(key, lambda: dumps(self.store.query(path, params), precision))
+        except QueryError as error:
+            self.send_error(error.status, str(error))
+            return None
+
+        encoding = negotiate(self.headers.get('Accept-Encoding'),
+                             [name for name in entry['bodies'] if name is not None])
+        tag = etag(entry['sha256'], encoding)
+        if tag in [value.strip() for value in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', tag)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return None
+
+        body = entry['bodies'][encoding]
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'application/json')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', tag)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('X-Cache', 'HIT' if hit else 'MISS')
+        self.end_headers()
+        return io.BytesIO(body)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the dashboard plus slice queries over the demographic data")
+    parser.add_argument('port', type=int, nargs='?', default=8000, help="port (default: 8000)")
+    parser.add_argument('--bind', '-b', default='127.0.0.1', metavar='ADDRESS',
+                        help="bind address (default: 127.0.0.1)")
+    parser.add_argument('--directory', '-d', default=os.getcwd(),
+                        help="directory to serve static files from (default: current directory)")
+    parser.add_argument('--input', default=pipeline.INPUT_CSV, metavar='CSV',
+                        help=f"UN World Population Prospects CSV (default: {pipeline.INPUT_CSV})")
+    parser.add_argument('--snapshot-dir', default=pipeline.SNAPSHOT_DIR, metavar='DIR',
+                        help=f"binary snapshot of the cleaned frame (default: {pipeline.SNAPSHOT_DIR})")
+    parser.add_argument('--cache-entries', type=int, default=CACHE_ENTRIES, metavar='N',
+                        help=f"responses kept in the LRU cache (default: {CACHE_ENTRIES})")
+    parser.add_argument('--projection-model', choices=sorted(pipeline.MODELS),
+                        default=pipeline.DEFAULT_OPTIONS['projection_model'])
+    parser.add_argument('--projection-horizon', type=int, default=pipeline.DEFAULT_OPTIONS['projection_horizon'],
+                        metavar='YEAR')
+    args = parser.parse_args(argv)
+
+    print("Loading data...")
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = pipeline.load_and_clean_data(pipeline.PIPELINE_COLUMNS, csv_path=args.input,
+                                          snapshot_dir=args.snapshot_dir)
+    store = QueryStore(df, args.projection_model, args.projection_horizon)
+    print(f"✓ Loaded {len(store.countries)} countries, {len(store.globe_offsets)} years, "
+          f"{len(store.groups)} regions")
+
+    handler = partial(QueryRequestHandler, directory=args.directory, store=store,
+                      cache=ResponseCache(args.cache_entries))
+    with ThreadingHTTPServer((args.bind, args.port), handler) as httpd:
+        print(f"Serving {args.directory} on http://{args.bind}:{args.port}/ (query API under {API_PREFIX})")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\nKeyboard interrupt received, exiting.")
+            sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
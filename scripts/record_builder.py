@@ -0,0 +1,126 @@
+"""
+Columnar Record Builder
+Whole-column helpers for turning the cleaned frame into JSON-ready records
+Replaces per-row iterrows()/pd.notna()/f-string formatting in the prepare_* stages
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def number_field(values, fallback):
+    """
+    Numeric column as Python floats, with `fallback` (kept as given, e.g. int 0) for missing values
+    """
+    values = pd.Series(values, copy=False)
+    out = values.astype(float).astype(object)
+    out[values.isna().values] = fallback
+    return out
+
+
+def fixed_field(values, decimals, missing='N/A'):
+    """
+    Numeric column formatted with a fixed number of decimals (same as f"{x:.Nf}"), `missing` for NaN
+    """
+    values = pd.Series(values, copy=False)
+    text = np.char.mod(f'%.{decimals}f', values.to_numpy(dtype=float))
+    out = pd.Series(text, index=values.index, dtype=object)
+    out[values.isna().values] = missing
+    return out
+
+
+def population_field(values):
+    """
+    Vectorized equivalent of format_population() for a column of absolute population counts
+    """
+    values = pd.Series(values, copy=False)
+    numbers = values.to_numpy(dtype=float)
+    with np.errstate(invalid='ignore'):
+        billions = np.char.add(np.char.mod('%.2f', numbers / 1000000000), ' billion')
+        millions = np.char.add(np.char.mod('%.2f', numbers / 1000000), ' million')
+        thousands = np.char.add(np.char.mod('%.2f', numbers / 1000), ' thousand')
+        units = np.char.mod('%d', np.where(np.isfinite(numbers), numbers, 0))
+
+        text = np.select(
+            [np.isnan(numbers) | (numbers == 0), numbers >= 1000000000, numbers >= 1000000, numbers >= 1000],
+            ['N/A', billions, millions, thousands],
+            default=units
+        )
+    return pd.Series(text, index=values.index, dtype=object)
+
+
+def group_offsets(keys):
+    """
+    Start/stop offsets of each run of equal keys in an already sorted column
+    Returns a list of (key, start, stop)
+    """
+    keys = np.asarray(keys)
+    if len(keys) == 0:
+        return []
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    stops = np.r_[starts[1:], len(keys)]
+    return [(keys[start], int(start), int(stop)) for start, stop in zip(starts, stops)]
+
+
+class RecordStream:
+    """
+    Columns converted to Python values once, yielding dict records lazily
+    `records(start, stop)` streams a contiguous slice (e.g. one country or one year)
+    """
+
+    def __init__(self, columns):
+        self.names = list(columns)
+        self.arrays = [pd.Series(columns[name], copy=False).tolist() for name in self.names]
+
+    def __len__(self):
+        return len(self.arrays[0]) if self.arrays else 0
+
+    def records(self, start=0, stop=None):
+        names = self.names
+        for row in zip(*(array[start:stop] for array in self.arrays)):
+            yield dict(zip(names, row))
+
+
+def build_records(columns):
+    """
+    Serialize an ordered mapping of field name -> column into a list of dicts in one pass
+    """
+    return list(RecordStream(columns).records())
+
+
+def columnar_table(years, countries, iso3, regions, values):
+    """
+    Struct-of-arrays layout for per-country, per-year records
+    Countries and regions are dictionary-encoded, rows are sorted by year and
+    `yearOffsets[i]:yearOffsets[i + 1]` is the slice of rows for `years[i]`
+    `values` is an ordered mapping of field name -> numeric column
+    """
+    years = np.asarray(years, dtype=int)
+    order = np.argsort(years, kind='mergesort')
+
+    country_codes, country_names = pd.factorize(pd.Series(countries, copy=False))
+    first_row = pd.Series(np.arange(len(country_codes))).groupby(country_codes).first().to_numpy()
+    country_regions = pd.Series(regions, copy=False).to_numpy()[first_row]
+    region_codes, region_names = pd.factorize(pd.Series(country_regions))
+    country_iso3 = pd.Series(iso3, copy=False).to_numpy()[first_row]
+
+    sorted_years = years[order]
+    year_list = np.unique(sorted_years)
+    offsets = np.searchsorted(sorted_years, year_list, side='left').tolist() + [len(sorted_years)]
+
+    return {
+        'format': 'columnar',
+        'countries': {
+            'name': country_names.tolist(),
+            'iso3': [code if isinstance(code, str) else '' for code in country_iso3],
+            'region': region_codes.tolist()
+        },
+        'regions': region_names.tolist(),
+        'years': year_list.tolist(),
+        'yearOffsets': offsets,
+        'columns': {
+            'country': country_codes[order].tolist(),
+            **{name: pd.Series(column, copy=False).to_numpy(dtype=float)[order].tolist()
+               for name, column in values.items()}
+        }
+    }
@@ -0,0 +1,148 @@
+"""
+Stage Scheduler
+Runs the declared prepare_* stages as a DAG, serially or on a process pool
+The cleaned frame is shared with workers as memory-mapped columns, not re-pickled per task
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from frame_store import read_frame, write_frame
+from profiler import StageMonitor
+
+
+def export_frame(df, columns):
+    """
+    Write the given columns of the cleaned frame to a temporary directory (tmpfs when available)
+    Workers memory-map the numeric columns instead of receiving a pickled copy of the frame
+    Returns the directory path
+    """
+    root = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    directory = tempfile.mkdtemp(prefix='prepare_dataviz_', dir=root)
+    write_frame(df, directory, columns)
+    return directory
+
+
+# Per-process state: the shared frame, build options and memoized derived inputs (hierarchy, country cube)
+_worker_state = {}
+
+
+def _init_worker(frame_dir, providers, options):
+    _worker_state['df'] = read_frame(frame_dir)
+    _worker_state['providers'] = providers
+    _worker_state['options'] = options
+    _worker_state['derived'] = {}
+
+
+def _resolve(arg):
+    if arg == 'df':
+        return _worker_state['df']
+    if arg in _worker_state['options']:
+        return _worker_state['options'][arg]
+    derived = _worker_state['derived']
+    if arg not in derived:
+        derived[arg] = _worker_state['providers'][arg](_worker_state['df'])
+    return derived[arg]
+
+
+def _run_stage(func, args, capture, profile=False, dump_path=None):
+    """
+    Run one stage with its resolved inputs; returns (seconds, captured log, profile metrics or None)
+    With `profile` the stage runs inside a StageMonitor (and under cProfile when `dump_path` is set)
+    """
+    log = io.StringIO()
+    redirect = contextlib.redirect_stdout(log) if capture else contextlib.nullcontext()
+    with redirect:
+        inputs = [_resolve(arg) for arg in args]
+        monitor = StageMonitor(inputs, dump_path) if profile else contextlib.nullcontext()
+        start = time.perf_counter()
+        with monitor:
+            func(*inputs)
+        seconds = time.perf_counter() - start
+    return seconds, log.getvalue(), monitor.metrics if profile else None
+
+
+def run_stages(stages, df, providers, options=None, jobs=1, on_complete=None, on_profile=None, dump_dir=None):
+    """
+    Run `stages` (registry entries) respecting their optional 'after' dependencies
+    Stage 'args' resolve to the frame ('df'), a build option or a derived input from `providers`
+    jobs <= 1 runs in-process in registry order; otherwise ready stages run on a process pool
+    on_complete(stage, seconds) is called in the parent as each stage finishes
+    With on_profile, every stage is measured and on_profile(stage, metrics) is called too;
+    with dump_dir, each stage also runs under cProfile, dumped to <dump_dir>/<name>.prof
+    """
+    names = {stage['name'] for stage in stages}
+    pending = {
+        stage['name']: {dep for dep in stage.get('after', ()) if dep in names}
+        for stage in stages
+    }
+    by_name = {stage['name']: stage for stage in stages}
+    options = options or {}
+    profile = on_profile is not None or dump_dir is not None
+    
+    def task(stage):
+        dump_path = os.path.join(dump_dir, f"{stage['name']}.prof") if dump_dir else None
+        return stage['func'], stage['args'], jobs > 1, profile, dump_path
+    
+    def complete(stage, seconds, metrics):
+        if on_complete:
+            on_complete(stage, seconds)
+        if on_profile:
+            on_profile(stage, metrics)
+
+    if jobs <= 1:
+        _worker_state.update({'df': df, 'providers': providers, 'options': options, 'derived': {}})
+        try:
+            for stage in _topological_order(stages, pending):
+                seconds, _, metrics = _run_stage(*task(stage))
+                complete(stage, seconds, metrics)
+        finally:
+            _worker_state.clear()
+        return
+
+    columns = {col for stage in stages for col in stage['columns']}
+    frame_dir = export_frame(df, columns)
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(frame_dir, providers, options)) as pool:
+            running = {}
+            done = set()
+            while pending or running:
+                ready = [name for name, deps in pending.items() if deps <= done]
+                for name in ready:
+                    stage = by_name[name]
+                    del pending[name]
+                    running[pool.submit(_run_stage, *task(stage))] = stage
+                if not running:
+                    raise RuntimeError(f"Stage dependency cycle: {sorted(pending)}")
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage = running.pop(future)
+                    seconds, log, metrics = future.result()
+                    print(log, end='')
+                    done.add(stage['name'])
+                    complete(stage, seconds, metrics)
+    finally:
+        shutil.rmtree(frame_dir, ignore_errors=True)
+
+
+def _topological_order(stages, pending):
+    """Registry order, delaying any stage until its dependencies have run"""
+    pending = {name: set(deps) for name, deps in pending.items()}
+    ordered, done = [], set()
+    remaining = list(stages)
+    while remaining:
+        ready = [stage for stage in remaining if pending[stage['name']] <= done]
+        if not ready:
+            raise RuntimeError(f"Stage dependency cycle: {[stage['name'] for stage in remaining]}")
+        for stage in ready:
+            ordered.append(stage)
+            done.add(stage['name'])
+        remaining = [stage for stage in remaining if stage['name'] not in done]
+    return ordered
@@ -0,0 +1,137 @@
+"""
+Local Static Server
+`python -m http.server` with Accept-Encoding negotiation: artifacts listed in
+data/compression_manifest.json are served from their precompressed .br/.gz siblings
+"""
+
+import argparse
+import email.utils
+import os
+import posixpath
+import sys
+from functools import partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from precompress import ENCODINGS, MANIFEST_NAME, load_manifest
+
+DATA_DIR = 'data'
+
+
+def parse_accept_encoding(header):
+    """Accept-Encoding header -> {coding: q}; codings with q=0 are refused"""
+    accepted = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate(header, available):
+    """
+    Best encoding in `available` (in server preference order) for an Accept-Encoding header,
+    or None for the identity (uncompressed) body
+    """
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = accepted.get(coding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class PrecompressedRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Serves precompressed variants of manifest-listed artifacts with Content-Encoding,
+    Vary and per-variant ETags (If-None-Match answers 304); everything else is plain http.server
+    """
+
+    # Reloaded when the manifest file changes, shared by every handler thread
+    _manifest = {'mtime': None, 'files': {}}
+
+    def _artifacts(self):
+        path = os.path.join(self.directory, DATA_DIR, MANIFEST_NAME)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return {}
+        cached = PrecompressedRequestHandler._manifest
+        if cached['mtime'] != mtime:
+            files = load_manifest(os.path.join(self.directory, DATA_DIR)).get('files', {})
+            PrecompressedRequestHandler._manifest = cached = {'mtime': mtime, 'files': files}
+        return cached['files']
+
+    def send_head(self):
+        url_path = posixpath.normpath(unquote(urlsplit(self.path).path)).lstrip('/')
+        prefix = DATA_DIR + '/'
+        entry = self._artifacts().get(url_path[len(prefix):]) if url_path.startswith(prefix) else None
+        raw_path = self.translate_path(self.path)
+        if entry is None or not os.path.isfile(raw_path) or os.path.getsize(raw_path) != entry['size']:
+            return super().send_head()
+
+        encoding = negotiate(self.headers.get('Accept-Encoding'),
+                             [name for name in ENCODINGS if name in entry['encodings']])
+        if encoding:
+            variant = entry['encodings'][encoding]
+            file_path, tag = os.path.join(self.directory, DATA_DIR, variant['path']), variant['etag']
+        else:
+            file_path, tag = raw_path, entry['etag']
+
+        if tag in [value.strip() for value in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', tag)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return None
+
+        try:
+            f = open(file_path, 'rb')
+        except OSError:
+            return super().send_head()
+        stat = os.fstat(f.fileno())
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', self.guess_type(raw_path))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(stat.st_size))
+        self.send_header('Last-Modified', email.utils.formatdate(stat.st_mtime, usegmt=True))
+        self.send_header('ETag', tag)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.end_headers()
+        return f
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the dashboard with precompressed data artifacts")
+    parser.add_argument('port', type=int, nargs='?', default=8000, help="port (default: 8000)")
+    parser.add_argument('--bind', '-b', default='127.0.0.1', metavar='ADDRESS',
+                        help="bind address (default: 127.0.0.1)")
+    parser.add_argument('--directory', '-d', default=os.getcwd(),
+                        help="directory to serve (default: current directory)")
+    args = parser.parse_args(argv)
+
+    handler = partial(PrecompressedRequestHandler, directory=args.directory)
+    with ThreadingHTTPServer((args.bind, args.port), handler) as httpd:
+        print(f"Serving {args.directory} on http://{args.bind}:{args.port}/ (precompressed data artifacts)")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\nKeyboard interrupt received, exiting.")
+            sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Synthetic UN Dataset
+Generates CSVs with the UN World Population Prospects schema for benchmarking:
+same columns, space-separated thousands, and the World > Region > Subregion > Country
+Type/Parent code hierarchy, scaled in locations and in periods per year
+"""
+
+import argparse
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+
+# Column layout of the real file (the demo CSV ships with only its header)
+SCHEMA_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'world-demographic_demo.csv')
+
+FIRST_YEAR = 1950
+LAST_YEAR = 2023
+
+# Number of countries in the real dataset (scale 1)
+BASE_COUNTRIES = 237
+
+# Periods per year for each frequency - monthly data writes fractional years (1950.0833...)
+FREQUENCIES = {'annual': 1, 'monthly': 12}
+
+# UN region and subregion codes; Northern America has no subregions, its countries hang off the region
+REGIONS = {
+    903: ('Africa', {910: 'Eastern Africa', 911: 'Middle Africa', 912: 'Northern Africa',
+                     913: 'Southern Africa', 914: 'Western Africa'}),
+    935: ('Asia', {5500: 'Central Asia', 906: 'Eastern Asia', 920: 'South-Eastern Asia',
+                   5501: 'Southern Asia', 922: 'Western Asia'}),
+    908: ('Europe', {923: 'Eastern Europe', 924: 'Northern Europe', 925: 'Southern Europe',
+                     926: 'Western Europe'}),
+    904: ('Latin America and the Caribbean', {915: 'Caribbean', 916: 'Central America', 931: 'South America'}),
+    905: ('Northern America', {}),
+    909: ('Oceania', {927: 'Australia/New Zealand', 928: 'Melanesia', 954: 'Micronesia', 957: 'Polynesia'})
+}
+
+# Value ranges (low, high, decimals) by column; other numeric columns get a generic range
+RANGES = {
+    'Population Density, as of 1 July (persons per square km)': (1, 2000, 3),
+    'Population Sex Ratio, as of 1 July (males per 100 females)': (85, 120, 3),
+    'Median Age, as of 1 July (years)': (12, 50, 3),
+    'Crude Birth Rate (births per 1,000 population)': (5, 50, 3),
+    'Crude Death Rate (deaths per 1,000 population)': (2, 25, 3),
+    'Rate of Natural Change (per 1,000 population)': (-10, 40, 3),
+    'Net Migration Rate (per 1,000 population)': (-20, 20, 3),
+    'Total Fertility Rate (live births per woman)': (1, 8, 3),
+    'Mean Age Childbearing (years)': (25, 33, 3),
+    'Infant Mortality Rate (infant deaths per 1,000 live births)': (1, 200, 3),
+    'Under-Five Mortality (deaths under age 5 per 1,000 live births)': (2, 300, 3),
+    'Male Life Expectancy at Birth (years)': (30, 80, 3),
+    'Female Life Expectancy at Birth (years)': (32, 86, 3),
+    'Life Expectancy at Birth, both sexes (years)': (31, 83, 3),
+    'Population Growth Rate (percentage)': (-1, 4, 3)
+}
+
+
+def read_schema(path=SCHEMA_CSV):
+    """Column names of the UN CSV"""
+    with open(path, newline='', encoding='utf-8') as f:
+        return next(csv.reader(f))
+
+
+def _iso3(i):
+    """Unique three-character code for the i-th synthetic country"""
+    alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+    return ''.join(alphabet[(i // 36 ** k) % 36] for k in (2, 1, 0))
+
+
+def build_locations(scale=1):
+    """
+    Locations as a frame of name, code, type, parent code and ISO3, in UN file order
+    (World, SDG region, regions, subregions, then countries spread round-robin over subregions)
+    """
+    locations = [('WORLD', 900, 'World', None, ''), ('Sub-Saharan Africa', 947, 'SDG region', 1828, '')]
+    parents = []
+    for region_code, (region, subregions) in REGIONS.items():
+        locations.append((region, region_code, 'Region', 900, ''))
+        for code, name in subregions.items():
+            locations.append((name, code, 'Subregion', region_code, ''))
+            parents.append(code)
+        if not subregions:
+            parents.append(region_code)
+
+    for i in range(BASE_COUNTRIES * scale):
+        locations.append((f'Country {i + 1}', 10000 + i, 'Country/Area', parents[i % len(parents)], _iso3(i)))
+
+    return pd.DataFrame(locations, columns=['name', 'code', 'type', 'parent', 'iso3'])
+
+
+def _thousands(values):
+    """Numbers written the way the UN file does, with spaces as thousands separators (' 2 471 424.125')"""
+    return [f' {value:,.3f}'.replace(',', ' ') if value == value else '' for value in values]
+
+
+def generate_frame(scale=1, frequency='annual', seed=0, missing=0.02, schema=None):
+    """
+    Synthetic UN frame with `scale` x the real number of countries and FREQUENCIES[frequency] periods a year
+    Values follow smooth per-location trends with noise; `missing` is the share of blank cells
+    """
+    rng = np.random.default_rng(seed)
+    columns = schema or read_schema()
+    locations = build_locations(scale)
+    periods = FREQUENCIES[frequency]
+    years = np.round(FIRST_YEAR + np.arange((LAST_YEAR - FIRST_YEAR + 1) * periods) / periods, 4)
+
+    n_locations, n_years = len(locations), len(years)
+    n_rows = n_locations * n_years
+    location_index = np.repeat(np.arange(n_locations), n_years)
+    t = np.tile(np.linspace(0, 1, n_years), n_locations)
+
+    data = {
+        'Index': np.arange(1, n_rows + 1),
+        'Region, subregion, country or area *': locations['name'].to_numpy()[location_index],
+        'Notes': '',
+        'Location code': locations['code'].to_numpy()[location_index],
+        'ISO3 Alpha-code': locations['iso3'].to_numpy()[location_index],
+        'ISO2 Alpha-code': [code[:2] for code in locations['iso3'].to_numpy()[location_index]],
+        'SDMX code**': locations['code'].to_numpy()[location_index],
+        'Type': locations['type'].to_numpy()[location_index],
+        'Parent code': pd.array(locations['parent'], dtype='Int64')[location_index],
+        'Year': years[np.tile(np.arange(n_years), n_locations)]
+    }
+    if periods == 1:
+        data['Year'] = data['Year'].astype(int)
+
+    # Population grows from a per-location base; aggregates are larger than countries
+    base = rng.lognormal(8, 2, n_locations) * np.where(locations['type'] == 'Country/Area', 1, 50)
+    growth = rng.uniform(-0.005, 0.035, n_locations)
+    population = base[location_index] * np.exp(growth[location_index] * t * (LAST_YEAR - FIRST_YEAR))
+
+    for col in columns:
+        if col in data:
+            continue
+        if col == 'Total Population, as of 1 July (thousands)':
+            values = population
+        elif '(thousands)' in col:
+            values = population * rng.uniform(0.05, 1.0)
+        else:
+            low, high, _ = RANGES.get(col, (0, 100, 3))
+            start = rng.uniform(low, high, n_locations)[location_index]
+            end = rng.uniform(low, high, n_locations)[location_index]
+            values = start + (end - start) * t + rng.normal(0, (high - low) * 0.01, n_rows)
+        values = np.where(rng.random(n_rows) < missing, np.nan, values)
+        data[col] = values
+
+    frame = pd.DataFrame(data, columns=columns)
+    for col in columns:
+        if '(thousands)' in col:
+            frame[col] = _thousands(frame[col].to_numpy())
+        elif frame[col].dtype == float and col != 'Year':
+            frame[col] = frame[col].round(RANGES.get(col, (0, 100, 3))[2])
+    return frame
+
+
+def generate_csv(path, scale=1, frequency='annual', seed=0, missing=0.02):
+    """Write a synthetic UN CSV to `path`; returns the number of rows"""
+    frame = generate_frame(scale, frequency, seed, missing)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    frame.to_csv(path, index=False)
+    return len(frame)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic CSV with the UN World Population Prospects schema")
+    parser.add_argument('output', help="path of the CSV to write")
+    parser.add_argument('--scale', type=int, default=1,
+                        help=f"multiple of the real number of countries ({BASE_COUNTRIES}) (default: 1)")
+    parser.add_argument('--frequency', choices=sorted(FREQUENCIES), default='annual',
+                        help="periods per year (default: annual)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default: 0)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    rows = generate_csv(args.output, args.scale, args.frequency, args.seed)
+    print(f"✓ Wrote {rows:,} rows to {args.output}")